@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Keyword matching benchmark: ordered ``kw in text`` loops vs KeywordMatcher.
+
+Collects every key-value key (scan_kv_pairs) and every paragraph / cell text
+the qualification scan sees from the .docx files (or a synthetic document
+from make_bid_docx.py), then for each key family in extract_text.py:
+
+- checks that KeywordMatcher.first() / .all() return exactly what the old
+  ``for kw, field in KEYS.items(): if kw in text`` loops returned, on the
+  document strings plus a set of overlapping / nested keyword cases
+- times both over the same strings
+- compares extract_qualifications() (one scan over the joined document
+  text) with the old per-text loop over the same document
+
+Usage:
+    python benchmarks/bench_keywords.py [file.docx ...] [--repeat 5]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+from docx import Document  # noqa: E402
+
+import extract_text as et  # noqa: E402
+from make_bid_docx import make_bid_docx  # noqa: E402
+from table_model import build_model  # noqa: E402
+
+# Nested and overlapping keywords the matcher must resolve like the loops
+EDGE_CASES = [
+    '开户行联行号', '联行号', '开户银行账号', '注册资本金', '统一社会信用代码（税号）',
+    '母公司及控股公司名称', '法定代表人姓名', '姓\t名', '身份证号码', '联系手机/电话',
+    'CMMITSS', 'ISO 9001ISO9001', 'OHSAS18001ISO45001', 'ISO 27001 / ISO 20000 / CMMI 5',
+    '', '无',
+]
+
+
+def legacy_first(mapping, text):
+    for kw, value in mapping.items():
+        if kw in text:
+            return kw, value
+    return None
+
+
+def legacy_all(mapping, text):
+    return [(kw, value) for kw, value in mapping.items() if kw in text]
+
+
+FAMILIES = [
+    ('company', et.COMPANY_KEYS, et.COMPANY_MATCHER, 'first'),
+    ('bank', et.BANK_KEYS, et.BANK_MATCHER, 'first'),
+    ('legal_rep', et.LEGAL_REP_KEYS, et.LEGAL_REP_MATCHER, 'first'),
+    ('person', et.PERSON_KEYS, et.PERSON_MATCHER, 'first'),
+    ('cert', et.CERT_KEYWORDS, et.CERT_MATCHER, 'all'),
+]
+
+
+def legacy_qualifications(texts):
+    certs, found = [], set()
+    for text in texts:
+        for kw, desc in et.CERT_KEYWORDS.items():
+            if kw in text and kw not in found:
+                found.add(kw)
+                certs.append({'name': kw, 'description': desc})
+    return certs
+
+
+def collect(paths):
+    keys, texts, models = list(EDGE_CASES), list(EDGE_CASES), []
+    for path in paths:
+        model = build_model(Document(path))
+        models.append(model)
+        for table in model['tables']:
+            keys.extend(key for key, _ in et.scan_kv_pairs(table))
+            for cells in table['rows']:
+                texts.extend(c for c in cells if c)
+        texts.extend(model['paragraphs'])
+    # The edge cases as one more document, mentions spread over several texts
+    models.append({'paragraphs': EDGE_CASES[::-1], 'tables': [{'rows': [EDGE_CASES], 'context': []}]})
+    return keys, texts, models
+
+
+def timed(fn, strings, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for s in strings:
+            fn(s)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark extract_text.py keyword matching')
+    parser.add_argument('docx', nargs='*', help='bid response .docx files (default: synthetic)')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = args.docx
+        if not paths:
+            paths = [os.path.join(tmp, 'synthetic.docx')]
+            make_bid_docx(paths[0])
+        keys, texts, models = collect(paths)
+
+    print(f"{len(keys)} kv keys, {len(texts)} texts")
+    print(f"{'family':<10}{'strings':>8}{'loops ms':>10}{'matcher ms':>12}{'speedup':>9}  identical")
+    ok = True
+    for name, mapping, matcher, mode in FAMILIES:
+        strings = texts if mode == 'all' else keys
+        legacy = (lambda s: legacy_all(mapping, s)) if mode == 'all' else (lambda s: legacy_first(mapping, s))
+        compiled = getattr(matcher, mode)
+        same = all(legacy(s) == compiled(s) for s in strings)
+        ok = ok and same
+        before, after = timed(legacy, strings, args.repeat), timed(compiled, strings, args.repeat)
+        print(f"{name:<10}{len(strings):>8}{before * 1000:>10.2f}{after * 1000:>12.2f}"
+              f"{before / after:>8.1f}x  {same}")
+
+    def doc_texts(model):
+        return model['paragraphs'] + [c for t in model['tables'] for cells in t['rows'] for c in cells if c]
+
+    same = all(legacy_qualifications(doc_texts(m)) == et.extract_qualifications(m) for m in models)
+    ok = ok and same
+    before = timed(lambda m: legacy_qualifications(doc_texts(m)), models, args.repeat)
+    after = timed(et.extract_qualifications, models, args.repeat)
+    print(f"{'quals':<10}{len(models):>8}{before * 1000:>10.2f}{after * 1000:>12.2f}"
+          f"{before / after:>8.1f}x  {same}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+PDF image benchmark: decode-first vs metadata prefilter in extract_images.py.
+
+Times the image part of extract_images.py on one process against the
+previous implementation:
+
+- before: extract_image() on every image occurrence not yet taken (small
+  icons and QR codes are copied out on every page they appear on), size
+  check on the decoded image, get_image_rects() for its position (decodes
+  every image on the page for the digest match), then the survivors' bytes
+  are written
+- after: small images rejected from the get_images(full=True) width/height,
+  positions from the page's image info (_ImagePositions), survivors
+  extracted and written in one batch (save_images)
+
+Both sides must select the same (page, xref, y) images and write the same
+bytes. "copied" is the image bytes extract_image() returned to Python.
+
+Usage:
+    python benchmarks/bench_pdf_images.py [file.pdf] [--small-per-page 2] [--repeat 3]
+"""
+import argparse
+import filecmp
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+import fitz  # noqa: E402
+
+import extract_images as ei  # noqa: E402
+from make_bid_pdf import make_bid_pdf  # noqa: E402
+
+
+# ── Previous implementation ─────────────────────────────────────────────
+
+def legacy_images(pdf_path, output_dir):
+    taken, selected, copied = set(), [], 0
+    with fitz.open(pdf_path) as doc:
+        for i, page in enumerate(doc):
+            for img_tuple in page.get_images(full=True):
+                xref = img_tuple[0]
+                if xref in taken:
+                    continue
+                base_img = doc.extract_image(xref)
+                copied += len(base_img["image"])
+                if base_img["width"] < ei.MIN_WIDTH or base_img["height"] < ei.MIN_HEIGHT:
+                    continue
+                rects = page.get_image_rects(xref)
+                img_y = min(r.y0 for r in rects) if rects else 0
+                taken.add(xref)
+                selected.append((i, xref, img_y))
+                with open(os.path.join(output_dir, f"{xref}.{base_img['ext']}"), "wb") as f:
+                    f.write(base_img["image"])
+    return selected, copied
+
+
+def new_images(pdf_path, output_dir):
+    taken, selected = set(), []
+    with fitz.open(pdf_path) as doc:
+        for i, page in enumerate(doc):
+            img_tuples = page.get_images(full=True)
+            positions = ei._ImagePositions(page, img_tuples)
+            for xref, _, width, height, *_ in img_tuples:
+                if xref in taken or 0 < width < ei.MIN_WIDTH or 0 < height < ei.MIN_HEIGHT:
+                    continue
+                rects = positions.rects(xref, width, height)
+                taken.add(xref)
+                selected.append((i, xref, min(r.y0 for r in rects) if rects else 0))
+    jobs = [(xref, os.path.join(output_dir, f"{xref}.tmp")) for _, xref, _ in selected]
+    results = ei.save_images(pdf_path, jobs, 1)
+    for (xref, path), result in zip(jobs, results):
+        if result:
+            os.replace(path, os.path.join(output_dir, f"{xref}.{result[0]}"))
+    selected = [s for s, result in zip(selected, results) if result]
+    return selected, sum(result[1] for result in results if result)
+
+
+# ── Runner ──────────────────────────────────────────────────────────────
+
+def timed(fn, pdf_path, tmp, repeat):
+    samples, result = [], None
+    for _ in range(repeat):
+        out = tempfile.mkdtemp(dir=tmp)
+        start = time.perf_counter()
+        result = fn(pdf_path, out)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), result, out
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark extract_images.py image selection and extraction')
+    parser.add_argument('pdf', nargs='?', help='bid response PDF (default: synthetic)')
+    parser.add_argument('--small-per-page', type=int, default=2,
+                        help='distinct small images per page of the synthetic PDF')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.pdf
+        if not path:
+            path = os.path.join(tmp, 'synthetic.pdf')
+            make_bid_pdf(path, small_per_page=args.small_per_page)
+        with fitz.open(path) as doc:
+            pages = len(doc)
+            occurrences = sum(len(page.get_images(full=True)) for page in doc)
+        print(f"{pages} pages, {occurrences} image occurrences, {os.path.getsize(path) / 2 ** 20:.1f} MB")
+
+        before, (old, old_copied), old_dir = timed(legacy_images, path, tmp, args.repeat)
+        after, (new, new_written), new_dir = timed(new_images, path, tmp, args.repeat)
+        cmp = filecmp.dircmp(old_dir, new_dir)
+        ok = old == new and not (cmp.left_only or cmp.right_only or cmp.diff_files)
+
+        print(f"{len(new)} images selected")
+        print(f"{'':<8}{'time s':>10}{'copied MB':>12}")
+        print(f"{'before':<8}{before:>10.3f}{old_copied / 2 ** 20:>12.1f}")
+        print(f"{'after':<8}{after:>10.3f}{new_written / 2 ** 20:>12.1f}")
+        print(f"speedup {before / after:.1f}x, {before - after:.3f} s and "
+              f"{(old_copied - new_written) / 2 ** 20:.1f} MB saved, identical: {ok}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
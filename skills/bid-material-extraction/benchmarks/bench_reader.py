@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Body reading benchmark: python-docx Document() vs the streaming DocxReader.
+
+Each measurement runs in a fresh subprocess so that peak RSS (ru_maxrss) is
+that of one reader only. Both sides do what extract_toc.py needs: the text
+and style name of every body paragraph. The python-docx side loads the
+package and walks ``doc.paragraphs`` reading ``para.text`` and
+``para.style.name``. The DocxReader side calls ``reader.paragraphs()``. The
+benchmark checks that both sides return the same (text, style) list.
+
+Without arguments a large image-heavy document is generated with
+make_bid_docx.py (--scan-size controls how big it gets).
+
+Usage:
+    python benchmarks/bench_reader.py [file.docx ...] [--repeat 3] [--scan-size 1240x1754]
+"""
+import argparse
+import hashlib
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "scripts"))
+
+
+def child(mode, path):
+    """Read path with one reader and print timing, peak RSS and a digest of the result."""
+    start = time.perf_counter()
+    if mode == 'docx':
+        from docx import Document
+        doc = Document(path)
+        paras = [(p.text, p.style.name if p.style is not None else '') for p in doc.paragraphs]
+    else:
+        from ooxml_reader import DocxReader
+        with DocxReader(path) as reader:
+            paras = [(p['text'], p['style'] or '') for p in reader.paragraphs()]
+    elapsed = time.perf_counter() - start
+    digest = hashlib.sha256(json.dumps(paras, ensure_ascii=False).encode()).hexdigest()
+    rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({'seconds': elapsed, 'rss_mb': rss_kb / 1024, 'paragraphs': len(paras), 'digest': digest}))
+
+
+def measure(mode, path, repeat):
+    runs = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, __file__, '--child', mode, path],
+                             check=True, capture_output=True, text=True).stdout
+        runs.append(json.loads(out))
+    return {'seconds': statistics.median(r['seconds'] for r in runs),
+            'rss_mb': max(r['rss_mb'] for r in runs),
+            'paragraphs': runs[0]['paragraphs'], 'digest': runs[0]['digest']}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark Document() vs DocxReader')
+    parser.add_argument('docx', nargs='*', help='bid response .docx files (default: synthetic)')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--scan-size', default='1240x1754', help='scan image size of the synthetic document')
+    parser.add_argument('--child', nargs=2, metavar=('MODE', 'PATH'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(*args.child)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = args.docx
+        if not paths:
+            paths = [os.path.join(tmp, 'synthetic.docx')]
+            # In its own process: children forked from a parent that held the
+            # document would inherit its peak RSS
+            subprocess.run([sys.executable, os.path.join(HERE, 'make_bid_docx.py'), paths[0],
+                            '--people', '60', '--sections', '400', '--scan-size', args.scan_size],
+                           check=True, stdout=subprocess.DEVNULL)
+
+        print(f"{'file':<24}{'MB':>7}{'paras':>7}{'docx s':>9}{'reader s':>10}{'speedup':>9}"
+              f"{'docx RSS':>10}{'reader RSS':>12}  identical")
+        ok = True
+        for path in paths:
+            old, new = measure('docx', path, args.repeat), measure('reader', path, args.repeat)
+            same = old['digest'] == new['digest']
+            ok = ok and same
+            print(f"{os.path.basename(path)[:23]:<24}{os.path.getsize(path) / 2 ** 20:>7.1f}"
+                  f"{new['paragraphs']:>7}{old['seconds']:>9.2f}{new['seconds']:>10.2f}"
+                  f"{old['seconds'] / new['seconds']:>8.1f}x{old['rss_mb']:>9.0f}M{new['rss_mb']:>11.0f}M  {same}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
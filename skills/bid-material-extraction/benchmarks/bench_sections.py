@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Section extraction benchmark: per-section scans vs precomputed indexes.
+
+Builds a plan with one entry per TOC entry (1000+ sections on the synthetic
+document from make_bid_docx.py) and times the two phases of
+extract_sections.py against the previous implementation:
+
+- resolve: linear scan of the sorted TOC for every plan entry to find the
+  next non-descendant vs one pass (section_ends)
+- text: python-docx Document with ``{id(t._element): t for t in doc.tables}``
+  rebuilt and tables formatted inside every section vs one streaming pass
+  (build_para_to_elem_map + build_text_index) and a slice per section
+
+Both sides must produce the same (start, end) positions and section texts.
+
+Usage:
+    python benchmarks/bench_sections.py [file.docx] [--sections 1000] [--repeat 3]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+from docx import Document  # noqa: E402
+from docx.oxml.ns import qn  # noqa: E402
+
+import extract_sections as es  # noqa: E402
+from extract_toc import extract_toc  # noqa: E402
+from make_bid_docx import make_bid_docx  # noqa: E402
+from ooxml_reader import DocxReader  # noqa: E402
+
+
+# ── Previous implementation ─────────────────────────────────────────────
+
+def legacy_resolve_positions(plan_entries, toc_entries, para_to_elem, total_elements):
+    toc_lookup, toc_by_idx = {}, []
+    for te in toc_entries:
+        pi = te.get('para_index')
+        if pi is not None:
+            toc_lookup[(te['number'], te['title'])] = pi
+            toc_by_idx.append((pi, te['number']))
+    toc_by_idx.sort()
+    positions = []
+    for entry in plan_entries:
+        pi = toc_lookup.get((entry['number'], entry['title']))
+        if pi is None or para_to_elem.get(pi) is None:
+            continue
+        next_pi = None
+        for tp, tn in toc_by_idx:
+            if tp > pi and not es._is_descendant(tn, entry['number']):
+                next_pi = tp
+                break
+        end_ei = para_to_elem[next_pi] if next_pi is not None and next_pi in para_to_elem else total_elements
+        positions.append((para_to_elem[pi], end_ei, entry))
+    return positions
+
+
+def legacy_format_table(table):
+    lines = []
+    for row in table.rows:
+        seen, cells = set(), []
+        for cell in row.cells:
+            if id(cell._tc) not in seen:
+                seen.add(id(cell._tc))
+                cells.append(cell.text.strip().replace('\n', ' '))
+        lines.append(' | '.join(cells))
+    return '\n'.join(lines)
+
+
+def legacy_extract_text_from_range(doc, elements, start, end):
+    parts = []
+    table_map = {id(t._element): t for t in doc.tables}
+    for idx in range(start, end):
+        elem = elements[idx]
+        if elem.tag == qn('w:p'):
+            text = es.get_para_text(elem).strip()
+            if text:
+                parts.append(text)
+        elif elem.tag == qn('w:tbl'):
+            t = table_map.get(id(elem))
+            if t:
+                parts.append(legacy_format_table(t))
+    return '\n'.join(parts)
+
+
+def legacy_texts(docx_path, positions):
+    doc = Document(docx_path)
+    elements = list(doc.element.body)
+    return [legacy_extract_text_from_range(doc, elements, s, e) for s, e, _ in positions]
+
+
+def new_texts(docx_path, positions):
+    with DocxReader(docx_path) as reader:
+        elements, _ = es.build_para_to_elem_map(reader)
+    text_index = es.build_text_index(elements)
+    return [es.extract_text_from_range(text_index, s, e) for s, e, _ in positions]
+
+
+# ── Runner ──────────────────────────────────────────────────────────────
+
+def timed(fn, repeat):
+    samples, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark extract_sections.py section resolution and text')
+    parser.add_argument('docx', nargs='?', help='bid response .docx (default: synthetic)')
+    parser.add_argument('--sections', type=int, default=1000, help='technical sections of the synthetic document')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.docx
+        if not path:
+            path = os.path.join(tmp, 'synthetic.docx')
+            make_bid_docx(path, sections=args.sections, scan_size=None)
+
+        toc_entries = extract_toc(path)
+        plan = [{'number': e['number'], 'title': e['title']} for e in toc_entries]
+        with DocxReader(path) as reader:
+            elements, para_to_elem = es.build_para_to_elem_map(reader)
+
+        print(f"{len(plan)} plan entries, {len(elements)} body elements")
+        print(f"{'phase':<10}{'before s':>10}{'after s':>10}{'speedup':>9}  identical")
+        before, old = timed(lambda: legacy_resolve_positions(plan, toc_entries, para_to_elem, len(elements)),
+                            args.repeat)
+        after, new = timed(lambda: es.resolve_positions(plan, toc_entries, para_to_elem, len(elements)),
+                           args.repeat)
+        ok = old == new
+        print(f"{'resolve':<10}{before:>10.3f}{after:>10.3f}{before / after:>8.1f}x  {ok}")
+
+        positions = new
+        before, old = timed(lambda: legacy_texts(path, positions), args.repeat)
+        after, new = timed(lambda: new_texts(path, positions), args.repeat)
+        same = old == new
+        ok = ok and same
+        print(f"{'text':<10}{before:>10.3f}{after:>10.3f}{before / after:>8.1f}x  {same}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Table extraction benchmark: python-docx proxies vs the one-pass table model.
+
+For each .docx (or a synthetic one from make_bid_docx.py when none is given)
+this times the four extract_text.py extractors two ways:
+
+- python-docx: every extractor pass re-reads ``doc.tables`` through
+  ``row.cells`` + ``dedup_row`` like extract_text.py did before the table
+  model (scan_kv_pairs, scan_header_rows and the experience-row scan each
+  walked the table again), plus the separate get_contexts body walk
+- model:       table_model.build_model() once, extractors read plain lists
+
+and checks that both produce identical company / personnel / performance /
+qualification output.
+
+Usage:
+    python benchmarks/bench_tables.py [file.docx ...] [--repeat 5] [--people 40]
+        [--projects 60] [--sections 200]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+from docx import Document  # noqa: E402
+from docx.oxml.ns import qn  # noqa: E402
+
+import extract_text  # noqa: E402
+from make_bid_docx import make_bid_docx  # noqa: E402
+from table_model import build_model  # noqa: E402
+
+
+def dedup_row(row):
+    """The pre-model row reader: python-docx cells, deduplicated on w:tc."""
+    seen = set()
+    cells = []
+    for cell in row.cells:
+        cid = id(cell._tc)
+        if cid not in seen:
+            seen.add(cid)
+            cells.append(cell.text.strip())
+    return cells
+
+
+class _DocxTable(dict):
+    """Table dict whose rows are re-read through python-docx on every access."""
+
+    def __init__(self, table, context):
+        super().__init__(context=context)
+        self._table = table
+
+    def __getitem__(self, key):
+        if key == 'rows':
+            return [dedup_row(row) for row in self._table.rows]
+        return super().__getitem__(key)
+
+
+def python_docx_model(doc):
+    contexts, recent, ti = {}, [], 0
+    for child in doc.element.body:
+        if child.tag == qn('w:p'):
+            t = ''.join(r.text for r in child.iter(qn('w:t')) if r.text).strip()
+            if t:
+                recent = (recent + [t])[-5:]
+        elif child.tag == qn('w:tbl'):
+            contexts[ti] = list(recent)
+            ti += 1
+    return {
+        'paragraphs': [p.text.strip() for p in doc.paragraphs if p.text.strip()],
+        'tables': [_DocxTable(t, contexts[i]) for i, t in enumerate(doc.tables)],
+    }
+
+
+def run_extractors(model):
+    return (
+        extract_text.extract_company(model),
+        extract_text.extract_personnel(model),
+        extract_text.extract_performance(model),
+        extract_text.extract_qualifications(model),
+    )
+
+
+def timed(fn, doc, repeat):
+    samples, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = run_extractors(fn(doc))
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), result
+
+
+def bench(path, repeat):
+    start = time.perf_counter()
+    doc = Document(path)
+    load = time.perf_counter() - start
+    legacy, legacy_out = timed(python_docx_model, doc, repeat)
+    model, model_out = timed(build_model, doc, repeat)
+    same = legacy_out == model_out
+    print(f"{os.path.basename(path)}: {len(doc.tables)} tables, {len(doc.paragraphs)} paragraphs, "
+          f"Document() {load * 1000:.0f} ms")
+    print(f"  python-docx {legacy * 1000:8.1f} ms")
+    print(f"  model       {model * 1000:8.1f} ms   {legacy / model:5.1f}x   output identical: {same}")
+    return same
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark extract_text.py table reading')
+    parser.add_argument('docx', nargs='*', help='bid response .docx files (default: synthetic)')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--people', type=int, default=40)
+    parser.add_argument('--projects', type=int, default=60)
+    parser.add_argument('--sections', type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = args.docx
+        if not paths:
+            paths = [os.path.join(tmp, 'synthetic.docx')]
+            make_bid_docx(paths[0], args.people, args.projects, args.sections)
+        ok = all([bench(path, args.repeat) for path in paths])
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
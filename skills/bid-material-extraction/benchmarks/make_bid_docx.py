@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Generate a synthetic bid response .docx for the extraction benchmarks.
+
+The layout follows real 响应文件: a commercial part with a 4-column supplier
+info table (horizontally merged cells), a team summary table, one person card
+per team member (vertically merged "主要业绩" column plus experience rows), a
+performance summary table and qualification paragraphs, then a technical part
+with numbered headings, body text and plain data tables. All names and numbers
+are made up and deterministic for a given seed.
+
+With --scan-size WxH (0 = no images) every person card and qualification gets
+its own noise "scan" JPEG, each of them is followed by the same company stamp
+image (one shared part), and every tenth technical section carries a tiny icon
+below the 5 KB extraction threshold. Large scan sizes give 100+ MB documents.
+
+Usage:
+    python benchmarks/make_bid_docx.py out.docx [--people 40] [--projects 60]
+        [--sections 200] [--scan-size 600x850] [--seed 0]
+"""
+import argparse
+import io
+import os
+import random
+
+from docx import Document
+from docx.shared import Cm
+from PIL import Image
+
+SURNAMES = '张王李赵刘陈杨黄周吴徐孙马朱胡郭何林罗高'
+GIVEN = '伟芳娜敏静丽强磊军洋勇艳杰涛明超秀霞平刚桂英华建国志红'
+ROLES = ['项目经理', '系统架构师', '需求分析师', '开发工程师', '测试工程师', '实施工程师', '运维工程师']
+EDUCATION = ['本科', '硕士', '博士', '大专']
+CERTS = ['信息系统项目管理师', '系统架构设计师', 'PMP', '软件设计师', '网络工程师', '—']
+CLIENTS = ['市交通运输局', '省教育厅', '区人民医院', '市数据资源局', '某某大学', '市公安局']
+SYSTEMS = ['智慧校园平台', '车载定位装置维护', '政务数据共享平台', '医院信息系统', '视频监控联网', '一网通办']
+QUALS = ['ISO9001 质量管理体系认证证书', 'ISO 27001 信息安全管理体系认证证书',
+         'ISO20000 信息技术服务管理体系认证证书', 'CMMI 3 级评估证书', '高新技术企业证书',
+         '软件著作权登记证书', 'ITSS 运维服务能力成熟度三级证书']
+FILLER = ('本项目采用分层架构设计，前端基于组件化框架，后端采用微服务架构，'
+          '通过统一身份认证、数据交换与共享、运维监控等公共支撑能力保障系统的稳定运行。')
+
+
+def _jpeg(rng, size, quality=80):
+    """Grey noise JPEG of the given size (noise keeps it from compressing away)."""
+    w, h = size
+    buf = io.BytesIO()
+    Image.frombytes('L', (w, h), rng.randbytes(w * h)).save(buf, 'JPEG', quality=quality)
+    return buf.getvalue()
+
+
+def _picture(doc, data, width_cm):
+    doc.add_picture(io.BytesIO(data), width=Cm(width_cm))
+
+
+def _name(rng):
+    return rng.choice(SURNAMES) + ''.join(rng.choice(GIVEN) for _ in range(rng.choice((1, 2))))
+
+
+def _add_supplier_table(doc, rng):
+    doc.add_paragraph('10 供应商基本情况表', style='Heading 2')
+    rows = [
+        ('供应商名称', '某某信息技术有限公司', None, None),
+        ('统一社会信用代码', '91110108MA01%05dX' % rng.randrange(100000), '法定代表人', _name(rng)),
+        ('注册地址', '北京市海淀区中关村大街%d号' % rng.randrange(1, 200), None, None),
+        ('注册资本', '5000万元', '成立日期', '2012年3月15日'),
+        ('企业性质', '有限责任公司', '总人数', '326'),
+        ('联系电话', '010-8%07d' % rng.randrange(10 ** 7), '传真', '010-6%07d' % rng.randrange(10 ** 7)),
+        ('电子邮箱', 'bid@example.com', '邮政编码', '100080'),
+        ('开户银行', '中国工商银行北京中关村支行', '账号', '0200%012d' % rng.randrange(10 ** 12)),
+        ('经营范围', '技术开发、技术咨询、技术服务；计算机系统服务；软件开发。', None, None),
+    ]
+    table = doc.add_table(rows=len(rows), cols=4)
+    for ri, (k1, v1, k2, v2) in enumerate(rows):
+        cells = table.rows[ri].cells
+        cells[0].text = k1
+        if k2 is None:
+            cells[1].merge(cells[3]).text = v1
+        else:
+            cells[1].text, cells[2].text, cells[3].text = v1, k2, v2
+
+
+def _add_person_card(doc, rng, number, person, images=None):
+    doc.add_paragraph(f'12.{number} {person["name"]}', style='Heading 3')
+    doc.add_paragraph(f'拟派{person["role"]}：{person["name"]}')
+    experience = [(f'{y}.{rng.randrange(1, 13)}-{y + 1}.{rng.randrange(1, 13)}',
+                   f'{rng.choice(CLIENTS)}{rng.choice(SYSTEMS)}项目，担任{person["role"]}')
+                  for y in sorted(rng.sample(range(2012, 2024), 3))]
+    table = doc.add_table(rows=4 + len(experience), cols=4)
+    fields = [('姓名', person['name'], '性别', rng.choice('男女')),
+              ('年龄', str(rng.randrange(26, 55)), '学历', person['education']),
+              ('职称', '高级工程师', '执业资格证书', person['certifications'])]
+    for ri, row in enumerate(fields):
+        for ci, text in enumerate(row):
+            table.rows[ri].cells[ci].text = text
+    header = table.rows[3].cells
+    header[0].text = '时间'
+    header[1].merge(header[3]).text = '主要业绩'
+    for ri, (when, what) in enumerate(experience, start=4):
+        cells = table.rows[ri].cells
+        cells[0].text = when
+        cells[1].merge(cells[2]).text = what
+        cells[3].text = ''
+    # Vertically merged remark column over the experience rows
+    table.cell(4, 3).merge(table.cell(3 + len(experience), 3)).text = '证明材料附后'
+    if images:
+        _picture(doc, _jpeg(rng, images['scan_size']), 14)
+        _picture(doc, images['stamp'], 4)
+
+
+def make_bid_docx(path, people=40, projects=60, sections=200, seed=0, scan_size=(600, 850)):
+    """Write the synthetic document to ``path`` and return its statistics.
+
+    scan_size: (width, height) of the per-section scan images, None for none.
+    """
+    rng = random.Random(seed)
+    images = None
+    if scan_size:
+        icon = io.BytesIO()
+        Image.new('RGB', (16, 16), (200, 30, 30)).save(icon, 'PNG')
+        images = {'scan_size': scan_size, 'stamp': _jpeg(rng, (300, 300)), 'icon': icon.getvalue()}
+    doc = Document()
+    doc.add_paragraph('某某单位智慧校园平台采购项目 响应文件', style='Title')
+    doc.add_paragraph('二、商务部分', style='Heading 1')
+    _add_supplier_table(doc, rng)
+
+    team = [{'name': _name(rng), 'role': rng.choice(ROLES), 'education': rng.choice(EDUCATION),
+             'certifications': rng.choice(CERTS)} for _ in range(people)]
+    doc.add_paragraph('12 团队成员汇总表', style='Heading 2')
+    table = doc.add_table(rows=people + 1, cols=6)
+    for ci, text in enumerate(('序号', '姓名', '岗位', '学历', '资质证书', '工作经验')):
+        table.rows[0].cells[ci].text = text
+    for i, person in enumerate(team, start=1):
+        values = (str(i), person['name'], person['role'], person['education'],
+                  person['certifications'], f'{rng.randrange(3, 20)}年')
+        for ci, text in enumerate(values):
+            table.rows[i].cells[ci].text = text
+    for i, person in enumerate(team, start=1):
+        _add_person_card(doc, rng, i, person, images)
+
+    doc.add_paragraph('13 业绩汇总表', style='Heading 2')
+    table = doc.add_table(rows=projects + 1, cols=5)
+    for ci, text in enumerate(('序号', '项目名称', '采购单位', '合同金额（万元）', '实施时间')):
+        table.rows[0].cells[ci].text = text
+    for i in range(1, projects + 1):
+        values = (str(i), f'{rng.choice(CLIENTS)}{rng.choice(SYSTEMS)}项目', rng.choice(CLIENTS),
+                  f'{rng.randrange(30, 900)}.{rng.randrange(10, 99)}', f'{rng.randrange(2015, 2025)}年')
+        for ci, text in enumerate(values):
+            table.rows[i].cells[ci].text = text
+
+    doc.add_paragraph('14 资质证书', style='Heading 2')
+    for i, qual in enumerate(QUALS, start=1):
+        doc.add_paragraph(f'14.{i} {qual}', style='Heading 3')
+        doc.add_paragraph(f'我公司已取得{qual}，证书在有效期内（复印件附后）。')
+        if images:
+            _picture(doc, _jpeg(rng, images['scan_size']), 14)
+            _picture(doc, images['stamp'], 4)
+
+    doc.add_paragraph('三、技术部分', style='Heading 1')
+    for s in range(1, sections + 1):
+        doc.add_paragraph(f'{s} {rng.choice(SYSTEMS)}建设方案（{s}）', style='Heading 2')
+        for _ in range(rng.randrange(2, 6)):
+            doc.add_paragraph(FILLER)
+        if images and s % 10 == 0:
+            _picture(doc, images['icon'], 0.5)
+        if s % 4 == 0:
+            table = doc.add_table(rows=6, cols=3)
+            for ri in range(6):
+                for ci in range(3):
+                    table.rows[ri].cells[ci].text = f'指标{ri}-{ci}'
+
+    doc.save(path)
+    return {'people': people, 'projects': projects, 'sections': sections,
+            'tables': len(doc.tables), 'paragraphs': len(doc.paragraphs)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic bid response .docx')
+    parser.add_argument('output')
+    parser.add_argument('--people', type=int, default=40)
+    parser.add_argument('--projects', type=int, default=60)
+    parser.add_argument('--sections', type=int, default=200)
+    parser.add_argument('--scan-size', default='600x850', help="WxH of the scan images, '0' for none")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    scan_size = None if args.scan_size == '0' else tuple(int(v) for v in args.scan_size.lower().split('x'))
+    stats = make_bid_docx(args.output, args.people, args.projects, args.sections, args.seed, scan_size)
+    print(f"{args.output}: {stats['tables']} tables, {stats['paragraphs']} paragraphs, "
+          f"{os.path.getsize(args.output) / 2 ** 20:.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
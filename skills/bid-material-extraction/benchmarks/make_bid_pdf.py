@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Generate a synthetic bid response PDF for the extract_images.py benchmarks.
+
+Mirrors the layout extract_images.py is written for: TOC pages (whose lines
+also look like section headers), a commercial part with numbered sections
+(10.x qualifications, 12.x.y team member documents, 13.x contracts spanning
+several pages), headers whose title is on the next line, "第N页共M页"
+footers, a "三、技术部分" scope change and a technical part with diagrams.
+
+Images: a unique noise "scan" per document (--scan-size), the same company
+logo (one shared xref) on every fourth page, a tiny icon (one shared xref)
+on every page and --small-per-page distinct small images per page (QR codes,
+signature snippets) that extract_images.py filters out by size.
+
+Usage:
+    python benchmarks/make_bid_pdf.py out.pdf [--people 20] [--contracts 15]
+        [--tech-sections 30] [--scan-size 800x1100] [--small-per-page 2] [--seed 0]
+"""
+import argparse
+import io
+import os
+import random
+
+import fitz
+from PIL import Image
+
+PAGE_W, PAGE_H = 595, 842
+TOP, BOTTOM, LEFT = 60, 780, 60
+FONT = 'china-s'
+
+SURNAMES = '张王李赵刘陈杨黄周吴徐孙马朱胡郭何林罗高'
+GIVEN = '伟芳娜敏静丽强磊军洋勇艳杰涛明超秀霞平刚桂英华建国志红'
+QUALS = ['营业执照', 'ISO9001 质量管理体系认证证书', 'ISO27001 信息安全管理体系认证证书',
+         'CMMI 3 级评估证书', '软件著作权登记证书', '信用中国查询截图']
+PERSON_DOCS = ['身份证', '学历证书', '资格证书', '社保缴纳证明']
+TECH = ['总体设计', '系统架构', '数据架构', '安全设计', '部署方案', '运维保障', '培训方案']
+FILLER = '本项目采用分层架构设计，通过统一身份认证、数据交换与共享等公共支撑能力保障系统的稳定运行。'
+
+
+def _jpeg(rng, size, quality=75):
+    w, h = size
+    buf = io.BytesIO()
+    Image.frombytes('L', (w, h), rng.randbytes(w * h)).save(buf, 'JPEG', quality=quality)
+    return buf.getvalue()
+
+
+def _png(size, color):
+    buf = io.BytesIO()
+    Image.new('RGB', size, color).save(buf, 'PNG')
+    return buf.getvalue()
+
+
+def _name(rng):
+    return rng.choice(SURNAMES) + ''.join(rng.choice(GIVEN) for _ in range(rng.choice((1, 2))))
+
+
+class _Writer:
+    """Flow layout: headers, text lines and images top to bottom, new page when full."""
+
+    def __init__(self, doc, rng, scan_size, small_per_page):
+        self.doc, self.rng, self.scan_size = doc, rng, scan_size
+        self.small_per_page = small_per_page
+        self.logo = _jpeg(rng, (400, 240))
+        self.icon = _png((32, 32), (200, 30, 30))
+        self.logo_xref = 0
+        self.page, self.y = None, BOTTOM
+
+    def new_page(self):
+        self.page = self.doc.new_page(width=PAGE_W, height=PAGE_H)
+        self.y = TOP
+        number = len(self.doc)
+        self.page.insert_image(fitz.Rect(PAGE_W - 40, 20, PAGE_W - 24, 36), stream=self.icon)
+        for k in range(self.small_per_page):
+            size = (120, 120) if k % 2 == 0 else (260, 80)  # QR code / signature snippet
+            x = PAGE_W - 80 - 70 * (k + 1)
+            self.page.insert_image(fitz.Rect(x, 790, x + 60, 830), stream=_jpeg(self.rng, size, 60))
+        if number % 4 == 0:
+            if self.logo_xref:
+                self.page.insert_image(fitz.Rect(LEFT, 16, LEFT + 60, 52), xref=self.logo_xref)
+            else:
+                self.logo_xref = self.page.insert_image(fitz.Rect(LEFT, 16, LEFT + 60, 52), stream=self.logo)
+
+    def _room(self, height):
+        if self.page is None or self.y + height > BOTTOM:
+            self.new_page()
+
+    def line(self, text, size=11):
+        self._room(size + 8)
+        self.y += size + 6
+        self.page.insert_text((LEFT, self.y), text, fontname=FONT, fontsize=size)
+
+    def header(self, number, title, split=False):
+        if split:  # number alone, title on the next line
+            self.line(f'{number}.', 13)
+            self.line(title, 13)
+        else:
+            self.line(f'{number}. {title}', 13)
+
+    def scan(self, height=None):
+        height = height or self.rng.choice((260, 420, 640))
+        self._room(height + 10)
+        rect = fitz.Rect(LEFT, self.y + 6, LEFT + height * 0.7, self.y + 6 + height)
+        self.page.insert_image(rect, stream=_jpeg(self.rng, self.scan_size))
+        self.y += height + 10
+
+
+def make_bid_pdf(path, people=20, contracts=15, tech_sections=30, seed=0, scan_size=(800, 1100),
+                 small_per_page=2):
+    """Write the synthetic PDF to ``path`` and return its statistics."""
+    rng = random.Random(seed)
+    doc = fitz.open()
+    w = _Writer(doc, rng, scan_size, small_per_page)
+
+    # TOC pages: their numbered lines are picked up as headers, like in real files
+    w.new_page()
+    w.line('目 录', 16)
+    for n, title in enumerate(['投标函', '法定代表人授权书', '报价一览表', '商务偏离表'] +
+                              ['其他'] * 5 + ['资质证明', '项目负责人', '团队成员', '类似业绩'], start=1):
+        w.line(f'{n}. {title} ........ {n + 3}')
+    w.line('三、技术部分 ........ 80')
+    w.new_page()
+    w.line('二、商务部分', 16)
+
+    w.header(1, '投标函')
+    for _ in range(12):
+        w.line(FILLER)
+    w.header(2, '法定代表人授权书')
+    w.scan(640)
+    for _ in range(7):  # a long run of pages: the carry limit of top-level sections stops it
+        w.new_page()
+        w.scan(640)
+    for n, title in [(3, '报价一览表'), (4, '商务偏离表')]:
+        w.new_page()
+        w.header(n, title)
+        w.line(FILLER)
+
+    w.new_page()
+    w.header(10, '资质证明')
+    for i, qual in enumerate(QUALS, start=1):
+        w.header(f'10.{i}', qual)
+        w.scan()
+
+    w.header(11, '项目负责人')
+    w.header('11.1', _name(rng) + ' 简历')
+    w.line(FILLER)
+    w.scan()
+
+    w.new_page()
+    w.header(12, '团队成员')
+    for i in range(1, people + 1):
+        w.header(f'12.{i}', _name(rng), split=(i % 5 == 0))
+        for j, kind in enumerate(PERSON_DOCS, start=1):
+            if rng.random() < 0.8:
+                w.header(f'12.{i}.{j}', kind)
+                w.scan(rng.choice((260, 420)))
+
+    w.new_page()
+    w.header(13, '类似业绩')
+    for i in range(1, contracts + 1):
+        w.new_page()
+        w.header(f'13.{i}', f'某某单位信息化项目合同（{i}）')
+        w.scan(640)
+        for _ in range(rng.randrange(0, 4)):  # contract pages without headers
+            w.new_page()
+            w.scan(640)
+
+    w.new_page()
+    w.line('三、技术部分', 16)
+    for i in range(1, tech_sections + 1):
+        top = (i - 1) // 5 + 1
+        w.header(f'{top}.{(i - 1) % 5 + 1}', rng.choice(TECH))
+        for _ in range(rng.randrange(2, 6)):
+            w.line(FILLER)
+        if i % 3 == 0:
+            w.scan(rng.choice((260, 420)))
+        if i % 7 == 0:
+            w.header(top + 5, '附表')  # single-level > 5 in the technical part: not a header
+
+    total = len(doc)
+    for n, page in enumerate(doc, start=1):
+        page.insert_text((PAGE_W / 2 - 40, PAGE_H - 30), f'第{n}页共{total}页', fontname=FONT, fontsize=9)
+    doc.save(path, garbage=1)
+    doc.close()
+    return {'pages': total}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic bid response PDF')
+    parser.add_argument('output')
+    parser.add_argument('--people', type=int, default=20)
+    parser.add_argument('--contracts', type=int, default=15)
+    parser.add_argument('--tech-sections', type=int, default=30)
+    parser.add_argument('--scan-size', default='800x1100', help='WxH of the scan images')
+    parser.add_argument('--small-per-page', type=int, default=2, help='distinct small images per page')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    scan_size = tuple(int(v) for v in args.scan_size.lower().split('x'))
+    stats = make_bid_pdf(args.output, args.people, args.contracts, args.tech_sections, args.seed, scan_size,
+                         args.small_per_page)
+    print(f"{args.output}: {stats['pages']} pages, {os.path.getsize(args.output) / 2 ** 20:.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
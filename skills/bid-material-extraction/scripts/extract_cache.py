@@ -0,0 +1,136 @@
+"""
+Content-hash cache shared by extract_text.py, extract_toc.py and extract_sections.py.
+
+Each output directory keeps ``.extract_cache.json``. For every (tool, source
+.docx) pair it records the file's size, mtime and SHA-256, the parameters that
+shape the output (index / toc digests, output name), the tool's OUTPUT_VERSION
+and the artifacts that were written. A re-run on an unchanged input is skipped
+without opening the document:
+
+  - size + mtime unchanged            → fresh, no hashing at all
+  - mtime changed, same content hash  → fresh (copied / touched file)
+  - otherwise, different parameters, a different OUTPUT_VERSION or a missing
+    artifact → stale
+
+Each tool defines OUTPUT_VERSION and bumps it whenever a code change alters
+what it writes (file layout, JSON shape, section boundaries), so outputs of
+older code are re-extracted instead of being reported as fresh.
+
+Writing an entry drops other entries that claimed the same artifacts, so a
+file overwritten by another run is never reported as fresh. ``--force``
+(add_force_argument) ignores the cache; the entry is still rewritten.
+
+    cache = load_cache(output_dir)
+    if not force and lookup(cache, 'extract_toc', docx_path, params, OUTPUT_VERSION):
+        return  # unchanged
+    ...
+    store(cache, 'extract_toc', docx_path, ['toc.json'], params, OUTPUT_VERSION)
+    save_cache(cache)
+"""
+import hashlib
+import json
+import os
+
+CACHE_FILE = '.extract_cache.json'
+CACHE_VERSION = 1
+
+_digests = {}  # (abspath, size, mtime_ns) → sha256, per process
+
+
+def file_digest(path):
+    """SHA-256 of a file's content (memoized on path, size and mtime)."""
+    st = os.stat(path)
+    memo = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    if memo not in _digests:
+        h = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                h.update(chunk)
+        _digests[memo] = h.hexdigest()
+    return _digests[memo]
+
+
+def optional_digest(path):
+    """file_digest(), or None when path is unset or missing."""
+    return file_digest(path) if path and os.path.exists(path) else None
+
+
+def load_cache(output_dir):
+    path = os.path.join(output_dir, CACHE_FILE)
+    cache = {'version': CACHE_VERSION, 'entries': {}}
+    if os.path.exists(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == CACHE_VERSION:
+                cache = data
+        except (OSError, ValueError):
+            pass  # unreadable cache = empty cache
+    cache['dir'] = output_dir
+    return cache
+
+
+def save_cache(cache):
+    data = {k: v for k, v in cache.items() if k != 'dir'}
+    os.makedirs(cache['dir'], exist_ok=True)
+    path = os.path.join(cache['dir'], CACHE_FILE)
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def _key(tool, source):
+    return f'{tool}:{os.path.abspath(source)}'
+
+
+def cached_entry(cache, tool, source):
+    """Entry for (tool, source) as last stored, fresh or not (None if never stored)."""
+    return cache['entries'].get(_key(tool, source))
+
+
+def lookup(cache, tool, source, params=None, version=None):
+    """Cached entry for (tool, source) if source, params, version and artifacts are unchanged, else None."""
+    entry = cached_entry(cache, tool, source)
+    if entry is None or entry.get('params') != params or entry.get('version') != version:
+        return None
+    try:
+        st = os.stat(source)
+    except OSError:
+        return None
+    if st.st_size != entry['size']:
+        return None
+    if st.st_mtime_ns != entry['mtime_ns']:
+        if file_digest(source) != entry['sha256']:
+            return None
+        entry['mtime_ns'] = st.st_mtime_ns
+    for name in entry['artifacts']:
+        if not os.path.exists(os.path.join(cache['dir'], name)):
+            return None
+    return entry
+
+
+def release(cache, artifacts, keep=None):
+    """Forget entries (other than key ``keep``) that claimed any of artifacts."""
+    claimed = set(artifacts)
+    entries = cache['entries']
+    for key in [k for k, e in entries.items() if k != keep and claimed & set(e['artifacts'])]:
+        del entries[key]
+
+
+def store(cache, tool, source, artifacts, params=None, version=None, **extra):
+    """Record that tool produced artifacts (names relative to the output dir) from source."""
+    st = os.stat(source)
+    key = _key(tool, source)
+    release(cache, artifacts, keep=key)
+    entries = cache['entries']
+    entries[key] = {
+        'sha256': file_digest(source), 'size': st.st_size, 'mtime_ns': st.st_mtime_ns,
+        'params': params, 'version': version, 'artifacts': list(artifacts), **extra,
+    }
+    return entries[key]
+
+
+def add_force_argument(parser):
+    parser.add_argument('--force', action='store_true',
+                        help='ignore the content-hash cache and re-extract everything')
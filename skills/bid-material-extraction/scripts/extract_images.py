@@ -2,109 +2,280 @@
 Extract embedded images from PDF grouped by section headers.
 
 Uses Y-coordinate positioning to correctly assign images to sections,
-even when multiple sections share the same page.
+even when multiple sections share the same page. Each page's text is read
+once (get_text("dict")); section headers are assigned to images by binary
+search over the page's y-sorted headers, and the section carried onto pages
+without headers is precomputed in one forward pass.
+
+Large PDFs are scanned in page-range shards by worker processes, each with
+its own fitz handle, returning header candidates and image metadata. The
+merge (scope, carry-forward, first-come xref dedup) runs in page order in the
+main process, and the assigned images are extracted and saved by a pool of
+writer processes. Each pool is capped by the amount of work (PAGES_PER_WORKER,
+IMAGES_PER_WORKER), so small documents never start one; --workers 1 does
+everything in-process.
+
+Small images (icons, bullets, QR codes) are rejected from the width/height
+in the page's get_images(full=True) entries, and image positions come from
+the page's image info matched by pixel size, so no image is decoded or
+copied during the scan; only the assigned images are extracted, in batches,
+and their size is checked once more against the decoded image.
 
 Usage:
-    python extract_images.py <pdf_path> [--output-dir pages] [--index index.json]
+    python extract_images.py <pdf_path> [--output-dir pages] [--index index.json] [--workers N]
 
 Adapt the scope detection, section regex, and category keywords to
 match the specific PDF's structure before running.
 """
 import argparse
+import bisect
 import json
 import os
 import re
+from concurrent.futures import ProcessPoolExecutor
 
 import fitz
 
 MIN_WIDTH = 300
 MIN_HEIGHT = 200
 
+# Least work worth a worker process: below this many pages (scan) or images
+# (writers) per process, forking it and reopening the PDF costs more than the
+# work it takes over, and small documents stay in-process.
+PAGES_PER_WORKER = 16
+IMAGES_PER_WORKER = 8
 
-def parse_sections_with_positions(doc):
+
+# ── Page scan (one fitz handle per worker process) ──────────────────────
+
+def scan_pages(pdf_path, start, end):
+    """
+    Scan pages [start, end) of the PDF with this process's own fitz handle.
+
+    Returns one dict per page:
+      "scope_marker": the page mentions both "三、" and "技术部分"
+      "headers": (y_pos, num_str, title, top, depth) for every numbered line,
+                 before the scope-dependent filter (parse_sections_with_positions)
+      "images": (xref, y_pos) for every image occurrence not known to be
+                smaller than MIN_WIDTH x MIN_HEIGHT, in get_images() order
     """
-    Parse section headers with their Y positions on each page.
+    doc = fitz.open(pdf_path)
+    try:
+        return [_scan_page(doc, i) for i in range(start, end)]
+    finally:
+        doc.close()
+
+
+def _scan_page(doc, i):
+    page = doc[i]
+    lines = _text_lines(page.get_text("dict"))
+    # Plain text as get_text() would give it, without a second extraction
+    full_text = "\n".join(text for _, text in lines)
+
+    # Walk through the text lines to find section headers with Y positions
+    headers = []
+    for li, (line, text) in enumerate(lines):
+        line_text = text.strip()
+        if not line_text or "页共" in line_text:
+            continue
+
+        m = re.match(r'^(\d+(?:\.\d+)*)\.\s*(.*)', line_text)
+        if not m:
+            continue
+
+        num_str = m.group(1)
+        title = m.group(2).strip()
+        parts = num_str.split('.')
+        top = int(parts[0])
+
+        if top >= 100:
+            continue
+
+        y_pos = line["bbox"][1]  # top Y of the text line
+
+        # If title is empty/punctuation, search subsequent lines
+        if not title or title in ('.', '。', ':', '：'):
+            title = _find_next_title(lines, li)
+
+        if not title or title in ('.', '。'):
+            title = f"(section {num_str})"
+
+        headers.append((y_pos, num_str, title, top, len(parts)))
+
+    images = []
+    img_tuples = page.get_images(full=True)
+    positions = _ImagePositions(page, img_tuples)
+    for img_tuple in img_tuples:
+        # (xref, smask, width, height, bpc, colorspace, ...): reject small images
+        # from the image dictionary; 0 = not given, checked after extraction
+        xref, width, height = img_tuple[0], img_tuple[2], img_tuple[3]
+        if 0 < width < MIN_WIDTH or 0 < height < MIN_HEIGHT:
+            continue
+
+        # Get image Y position on page
+        rects = positions.rects(xref, width, height)
+        if rects:
+            img_y = min(r.y0 for r in rects)
+        else:
+            img_y = 0
+        images.append((xref, img_y))
+
+    return {"scope_marker": "三、" in full_text and "技术部分" in full_text,
+            "headers": headers, "images": images}
+
+
+class _ImagePositions:
+    """
+    Placements of a page's images without decoding them.
+
+    page.get_image_rects(xref) finds an image's placements by the digest of
+    its decoded pixels, and decodes every image on the page to compare. The
+    page's image info without hashes has the same bounding boxes plus the
+    pixel size of each placed image, so an image whose width x height no
+    other image on the page shares is matched by size. Shared or unknown
+    sizes (duplicates, 0 in the dictionary) fall back to get_image_rects.
+    """
+
+    def __init__(self, page, img_tuples):
+        self.page = page
+        self.info = None
+        self.sizes = {}
+        for xref, _, width, height, *_ in img_tuples:
+            self.sizes.setdefault((width, height), set()).add(xref)
+        self.unknown = any(not (width and height) for width, height in self.sizes)
+
+    def rects(self, xref, width, height):
+        if not self.unknown and self.sizes[(width, height)] == {xref}:
+            if self.info is None:
+                self.info = self.page.get_image_info()  # no hashes: nothing decoded
+            rects = [fitz.Rect(im["bbox"]) for im in self.info
+                     if (im["width"], im["height"]) == (width, height)]
+            if rects:
+                return rects
+        return self.page.get_image_rects(xref)
+
+
+def _text_lines(text_dict):
+    """(line dict, text) for every line of the text blocks, in reading order."""
+    return [(line, "".join(span["text"] for span in line["spans"]))
+            for block in text_dict["blocks"] if block["type"] == 0
+            for line in block["lines"]]
+
+
+def _find_next_title(lines, current):
+    """Find the next meaningful text line after lines[current]."""
+    for _, text in lines[current + 1:]:
+        line_text = text.strip()
+        if line_text and not re.match(r'^[\d\.\s]+$', line_text) and "页共" not in line_text:
+            return line_text
+    return ""
+
+
+def _pool_size(workers, items, per_worker):
+    """Worker processes worth starting for items units of work; 1 means in-process."""
+    return max(1, min(workers, items // per_worker))
+
+
+def scan_document(pdf_path, total, workers):
+    """scan_pages() over all pages, sharded into page ranges across worker processes."""
+    workers = _pool_size(workers, total, PAGES_PER_WORKER)
+    if workers <= 1:
+        return scan_pages(pdf_path, 0, total)
+    # Several shards per worker so that image-heavy ranges don't leave workers idle
+    size = max(1, -(-total // (workers * 4)))
+    starts = list(range(0, total, size))
+    ends = [min(start + size, total) for start in starts]
+    with ProcessPoolExecutor(max_workers=min(workers, len(starts))) as pool:
+        shards = pool.map(scan_pages, [pdf_path] * len(starts), starts, ends)
+        return [page for shard in shards for page in shard]
+
+
+# ── Merge (sequential: scope, carry-forward and xref dedup) ─────────────
+
+def parse_sections_with_positions(pages):
+    """
+    Section headers with their Y positions, from scan_pages() results in page order.
     Returns list of (page_idx, y_pos, section_num, title, scope).
     """
     sections = []
     scope = "commercial"
 
-    for i in range(len(doc)):
-        page = doc[i]
-        text_dict = page.get_text("dict")
-        full_text = page.get_text()
-
+    for i, page in enumerate(pages):
         # Detect scope transition (skip TOC pages 1-3 which also mention "三、技术部分")
-        if i > 10 and "三、" in full_text and "技术部分" in full_text:
+        if i > 10 and page["scope_marker"]:
             scope = "technical"
 
-        # Walk through text blocks to find section headers with Y positions
-        for block in text_dict["blocks"]:
-            if block["type"] != 0:  # text block
+        for y_pos, num_str, title, top, depth in page["headers"]:
+            if scope == "technical" and top > 5 and depth == 1:
                 continue
-            for line in block["lines"]:
-                line_text = "".join(span["text"] for span in line["spans"]).strip()
-                if not line_text or "页共" in line_text:
-                    continue
+            sections.append((i, y_pos, num_str, title, scope))
 
-                m = re.match(r'^(\d+(?:\.\d+)*)\.\s*(.*)', line_text)
-                if not m:
-                    continue
+    return sections
 
-                num_str = m.group(1)
-                title = m.group(2).strip()
-                parts = num_str.split('.')
-                top = int(parts[0])
 
-                if top >= 100:
-                    continue
-                if scope == "technical" and top > 5 and len(parts) == 1:
-                    continue
+# ── Image writer pool ───────────────────────────────────────────────────
 
-                y_pos = line["bbox"][1]  # top Y of the text line
+_writer_doc = None  # fitz handle of a writer process
 
-                # If title is empty/punctuation, search subsequent blocks
-                if not title or title in ('.', '。', ':', '：'):
-                    title = _find_next_title(text_dict, block, line, y_pos)
 
-                if not title or title in ('.', '。'):
-                    title = f"(section {num_str})"
+def _open_writer(pdf_path):
+    global _writer_doc
+    _writer_doc = fitz.open(pdf_path)
 
-                sections.append((i, y_pos, num_str, title, scope))
 
-    return sections
+def _extract_batch(batch):
+    """
+    Extract and write a batch of (xref, path) jobs with this process's handle.
+    Returns (ext, bytes written) per job, or None for images that can't be
+    read or turn out smaller than MIN_WIDTH x MIN_HEIGHT.
+    """
+    results = []
+    for xref, path in batch:
+        try:
+            base_img = _writer_doc.extract_image(xref)
+        except Exception:
+            base_img = None
+        if not base_img or base_img["width"] < MIN_WIDTH or base_img["height"] < MIN_HEIGHT:
+            results.append(None)
+            continue
+        with open(path, "wb") as f:
+            f.write(base_img["image"])
+        results.append((base_img["ext"], len(base_img["image"])))
+    return results
 
 
-def _find_next_title(text_dict, current_block, current_line, current_y):
-    """Find the next meaningful text line after the current position."""
-    found_current = False
-    for block in text_dict["blocks"]:
-        if block["type"] != 0:
-            continue
-        for line in block["lines"]:
-            if not found_current:
-                if line is current_line:
-                    found_current = True
-                continue
-            # Found a subsequent line
-            line_text = "".join(span["text"] for span in line["spans"]).strip()
-            if line_text and not re.match(r'^[\d\.\s]+$', line_text) and "页共" not in line_text:
-                return line_text
-    return ""
+def save_images(pdf_path, jobs, workers):
+    """Run (xref, path) jobs in batches, on writer processes unless workers is 1."""
+    workers = _pool_size(workers, len(jobs), IMAGES_PER_WORKER)
+    if workers <= 1:
+        _open_writer(pdf_path)
+        try:
+            return _extract_batch(jobs)
+        finally:
+            _writer_doc.close()
+    size = max(1, -(-len(jobs) // (workers * 4)))
+    batches = [jobs[k:k + size] for k in range(0, len(jobs), size)]
+    with ProcessPoolExecutor(max_workers=min(workers, len(batches)), initializer=_open_writer,
+                             initargs=(pdf_path,)) as pool:
+        return [result for batch in pool.map(_extract_batch, batches) for result in batch]
+
 
+# ── Main ────────────────────────────────────────────────────────────────
 
-def extract_images(pdf_path, output_dir, index_path):
+def extract_images(pdf_path, output_dir, index_path, workers=None):
     os.makedirs(output_dir, exist_ok=True)
 
     # Clean old files
     for f in os.listdir(output_dir):
         os.remove(os.path.join(output_dir, f))
 
-    doc = fitz.open(pdf_path)
-    total = len(doc)
-    print(f"Scanning {total} pages...")
+    with fitz.open(pdf_path) as doc:
+        total = len(doc)
+    workers = workers or os.cpu_count() or 1
+    print(f"Scanning {total} pages ({_pool_size(workers, total, PAGES_PER_WORKER)} worker(s))...")
 
-    sections = parse_sections_with_positions(doc)
+    pages = scan_document(pdf_path, total, workers)
+    sections = parse_sections_with_positions(pages)
     print(f"Found {len(sections)} section headers with positions")
 
     # Build per-page section list sorted by Y position
@@ -116,83 +287,32 @@ def extract_images(pdf_path, output_dir, index_path):
     for k in page_sections:
         page_sections[k].sort(key=lambda x: x[0])
 
-    # For images on pages with no section header, find the last section from previous pages
-    last_section_by_page = {}  # page_idx -> (num_str, title, scope)
-    current_section = None
-    for i in range(total):
-        if i in page_sections:
-            # Use the last section on this page as the "current" going forward
-            _, num_str, title, scope = page_sections[i][-1]
-            current_section = (num_str, title, scope)
-        last_section_by_page[i] = current_section
-
-    # Also track the first section on each page for carry-forward
-    # We need: for a page without headers, what section are we in?
-    # That's the last section header seen on any previous page.
-    carry_section = {}
-    prev = None
-    for i in range(total):
-        if i in page_sections:
-            # The carry section for pages AFTER this one is the last section on this page
-            _, num_str, title, scope = page_sections[i][-1]
-
-            # For top-level commercial sections 1-9, don't carry forward beyond 5 pages
-            parts = num_str.split('.')
-            if scope == "commercial" and len(parts) == 1 and int(parts[0]) <= 9:
-                carry_section[i] = (num_str, title, scope, i + 5)  # max carry page
-            else:
-                carry_section[i] = (num_str, title, scope, None)  # no limit
-            prev = i
-        # else: no new section on this page
+    header_ys = {k: [h[0] for h in headers] for k, headers in page_sections.items()}
+    carry = _carry_sections(total, page_sections)
+    first_titles = {}  # section number -> title of its first header
+    for _, _, num_str, title, _ in sections:
+        first_titles.setdefault(num_str, title)
 
-    # Now extract images with position-aware section assignment
-    section_images = {}  # (num_str, title, scope) -> [(page_idx, xref, img_data)]
+    # Now assign images with position-aware section assignment, in page order
+    section_images = {}  # (num_str, title, scope) -> [(page_idx, xref)]
     extracted_xrefs = set()
 
-    for i in range(total):
-        page = doc[i]
-        images = page.get_images(full=True)
-        if not images:
-            continue
-
+    for i, page in enumerate(pages):
         # Get section headers on this page (if any)
         headers_on_page = page_sections.get(i, [])
 
-        for img_tuple in images:
-            xref = img_tuple[0]
+        for xref, img_y in page["images"]:
             if xref in extracted_xrefs:
                 continue
 
-            try:
-                base_img = doc.extract_image(xref)
-            except Exception:
-                continue
-
-            w, h = base_img["width"], base_img["height"]
-            if w < MIN_WIDTH or h < MIN_HEIGHT:
-                continue
-
-            # Get image Y position on page
-            rects = page.get_image_rects(xref)
-            if rects:
-                img_y = min(r.y0 for r in rects)
-            else:
-                img_y = 0
-
-            # Determine which section this image belongs to
-            assigned = None
-            if headers_on_page:
-                # Find the last header whose Y position is above (or near) the image
-                for y_pos, num_str, title, scope in reversed(headers_on_page):
-                    if y_pos <= img_y + 20:  # header is above image (with small tolerance)
-                        assigned = (num_str, title, scope)
-                        break
-                if not assigned:
-                    # Image is above all headers on this page - use carry from previous page
-                    assigned = _get_carry_section(i, carry_section, page_sections)
+            # Determine which section this image belongs to: the last header whose
+            # Y position is above (or near) the image, with a small tolerance
+            k = bisect.bisect_right(header_ys[i], img_y + 20) if headers_on_page else 0
+            if k:
+                assigned = headers_on_page[k - 1][1:]
             else:
-                # No headers on this page - use carry from previous page
-                assigned = _get_carry_section(i, carry_section, page_sections)
+                # No headers on this page, or image above all of them - use carry from previous page
+                assigned = carry[i]
 
             if not assigned:
                 continue
@@ -201,9 +321,20 @@ def extract_images(pdf_path, output_dir, index_path):
             key = assigned
             if key not in section_images:
                 section_images[key] = []
-            section_images[key].append((i, xref, base_img))
-
-    # Save images and build index
+            section_images[key].append((i, xref))
+
+    # Extract the assigned images to temporary files; names depend on the extension
+    # and on how many images of a section survive the exact size check
+    xrefs = [xref for img_list in section_images.values() for _, xref in img_list]
+    results = save_images(pdf_path, [(xref, os.path.join(output_dir, f".xref{xref}.tmp")) for xref in xrefs],
+                          workers)
+    extracted = dict(zip(xrefs, results))
+    for key in list(section_images):
+        section_images[key] = [(i, xref) for i, xref in section_images[key] if extracted[xref]]
+        if not section_images[key]:
+            del section_images[key]
+
+    # Name images and build index
     print(f"\nExtracting images for {len(section_images)} sections...")
     documents = []
 
@@ -227,22 +358,20 @@ def extract_images(pdf_path, output_dir, index_path):
             section_id = f"tech_{safe_sec}_{safe_title}"
 
         filenames = []
-        for idx, (page_idx, xref, base_img) in enumerate(img_list):
-            ext = base_img["ext"]
+        for idx, (page_idx, xref) in enumerate(img_list):
+            ext = extracted[xref][0]
             prefix = f"tech_{safe_sec}" if scope == "technical" else safe_sec
             if len(img_list) == 1:
                 fname = f"{prefix}_{safe_title}.{ext}"
             else:
                 fname = f"{prefix}_{safe_title}_{idx + 1:02d}.{ext}"
-            out_path = os.path.join(output_dir, fname)
-            with open(out_path, "wb") as f:
-                f.write(base_img["image"])
+            os.replace(os.path.join(output_dir, f".xref{xref}.tmp"), os.path.join(output_dir, fname))
             filenames.append(fname)
 
         category = _guess_category(num_str, title, scope)
 
         # Find parent section name for team members (12.x.y -> parent is 12.x)
-        parent_name = _find_parent_name(num_str, sections)
+        parent_name = _find_parent_name(num_str, first_titles)
 
         doc_entry = {
             "id": section_id,
@@ -262,40 +391,43 @@ def extract_images(pdf_path, output_dir, index_path):
         parent_tag = f" [{parent_name}]" if parent_name else ""
         print(f"  {num_str} {title}: {len(filenames)} image(s) ({page_info}){parent_tag}{scope_tag}")
 
-    doc.close()
-
     index = {"documents": documents}
     with open(index_path, "w", encoding="utf-8") as f:
         json.dump(index, f, ensure_ascii=False, indent=2)
 
     total_imgs = sum(len(d["files"]) for d in documents)
-    print(f"\nDone: {total_imgs} images in {len(documents)} sections")
+    written = sum(r[1] for r in results if r)
+    print(f"\nDone: {total_imgs} images ({written:,} bytes) in {len(documents)} sections")
     print(f"Images: {output_dir}")
     print(f"Index:  {index_path}")
 
 
-def _get_carry_section(page_idx, carry_section, page_sections):
-    """Find the active section for a page that has no header (or image is above all headers)."""
-    # Walk backwards to find the most recent page with a section header
-    for p in range(page_idx - 1, -1, -1):
-        if p in carry_section:
-            num_str, title, scope, max_page = carry_section[p]
-            if max_page is not None and page_idx >= max_page:
-                return None  # carry limit exceeded, don't fall through to older sections
-            return (num_str, title, scope)
-    return None
+def _carry_sections(total, page_sections):
+    """
+    Active section per page for images on pages with no header (or above all
+    headers): the last header on the most recent earlier page that has one.
+    Top-level commercial sections 1-9 are not carried 5 or more pages past
+    their header page (and do not fall through to older sections).
+    """
+    carry = [None] * total
+    last = None  # (num_str, title, scope, max_page) of the latest header page so far
+    for i in range(total):
+        if last is not None and (last[3] is None or i < last[3]):
+            carry[i] = last[:3]
+        if i in page_sections:
+            _, num_str, title, scope = page_sections[i][-1]
+            parts = num_str.split('.')
+            limited = scope == "commercial" and len(parts) == 1 and int(parts[0]) <= 9
+            last = (num_str, title, scope, i + 5 if limited else None)
+    return carry
 
 
-def _find_parent_name(num_str, sections):
+def _find_parent_name(num_str, first_titles):
     """For a sub-section like 12.3.4, find the name of parent 12.3."""
     parts = num_str.split('.')
     if len(parts) < 3:
         return ""
-    parent_num = '.'.join(parts[:2])
-    for _, _, sec_num, title, _ in sections:
-        if sec_num == parent_num:
-            return title
-    return ""
+    return first_titles.get('.'.join(parts[:2]), "")
 
 
 def _safe_filename(s: str) -> str:
@@ -379,5 +511,7 @@ if __name__ == "__main__":
     parser.add_argument("pdf_path", help="Path to the PDF file")
     parser.add_argument("--output-dir", default="pages", help="Output directory for images")
     parser.add_argument("--index", default="index.json", help="Output path for index JSON")
+    parser.add_argument("--workers", type=int,
+                        help="page-scan and writer processes (default: CPU count, fewer for small PDFs)")
     args = parser.parse_args()
-    extract_images(args.pdf_path, args.output_dir, args.index)
+    extract_images(args.pdf_path, args.output_dir, args.index, args.workers)
@@ -4,17 +4,37 @@ Step 3: Extract sections from a Word document based on an extraction plan.
 Uses toc.json (from Step 1) for precise section positioning, then extracts
 text and/or images from each planned section as individual files.
 
+Re-runs are incremental (content-hash cache, extract_cache.py): with the same
+document and toc.json only plan entries whose (number, title, output_name,
+extract_text, extract_images) changed are extracted again, files of entries
+dropped from the plan are removed, and the document is not opened at all when
+nothing changed. A different document or toc.json, or --force, re-extracts
+every entry.
+
+Images are exported by image_export.py: each unique image (by content hash)
+is written once, under the name of the most specific section containing it,
+and every section that contains it lists that file in manifest.json.
+--max-image-side / --jpeg-quality downscale and recompress oversized scans.
+
 Usage:
     python extract_sections.py <docx_path> --plan extraction_plan.json --toc toc.json [--output-dir data]
+        [--max-image-side 2000] [--jpeg-quality 85] [--workers N] [--force]
 """
 import argparse
 import json
 import os
 import re
 
-from docx import Document
-from docx.oxml.ns import qn
+from extract_cache import (add_force_argument, cached_entry, file_digest, load_cache, lookup, save_cache,
+                           store)
+from image_export import export_images, image_policy
+from ooxml_reader import A_BLIP, R_EMBED, W_T, DocxReader
+from table_model import read_table
+
 
+# Bump when section files or manifest.json change for the same document and plan
+# (cache key, see extract_cache.py)
+OUTPUT_VERSION = 1
 
 MIN_IMAGE_BYTES = 5000
 ALLOWED_EXTS = {'png', 'jpg', 'jpeg', 'gif', 'bmp', 'tiff', 'tif'}
@@ -25,25 +45,15 @@ ALLOWED_EXTS = {'png', 'jpg', 'jpeg', 'gif', 'bmp', 'tiff', 'tif'}
 def get_para_text(elem):
     """Get plain text from a w:p XML element."""
     texts = []
-    for r in elem.iter(qn('w:t')):
+    for r in elem.iter(W_T):
         if r.text:
             texts.append(r.text)
     return ''.join(texts)
 
 
 def format_table(table):
-    """Format a python-docx Table as pipe-separated text."""
-    lines = []
-    for row in table.rows:
-        seen = set()
-        cells = []
-        for cell in row.cells:
-            cid = id(cell._tc)
-            if cid not in seen:
-                seen.add(cid)
-                cells.append(cell.text.strip().replace('\n', ' '))
-        lines.append(' | '.join(cells))
-    return '\n'.join(lines)
+    """Format a table model (table_model.read_table) as pipe-separated text."""
+    return '\n'.join(' | '.join(c.replace('\n', ' ') for c in cells) for cells in table['rows'])
 
 
 def safe_filename(s):
@@ -57,16 +67,26 @@ def safe_filename(s):
 
 # ── Position mapping ────────────────────────────────────────────────────
 
-def build_para_to_elem_map(doc):
-    """Map paragraph index (doc.paragraphs[i]) → body element index."""
-    body = doc.element.body
-    elements = list(body)
+def build_para_to_elem_map(reader):
+    """
+    One streaming pass over the body.
+
+    Returns (elements, para_to_elem): per body element a (kind, text, image
+    rIds) tuple — paragraph text, formatted table text, '' otherwise — and
+    paragraph index (doc.paragraphs[i]) → body element index.
+    """
+    elements = []
     para_to_elem = {}
-    pi = 0
-    for ei, elem in enumerate(elements):
-        if elem.tag == qn('w:p'):
-            para_to_elem[pi] = ei
-            pi += 1
+    for kind, info, elem in reader.iter_body():
+        if kind == 'p':
+            para_to_elem[info['index']] = info['elem_index']
+            text = get_para_text(elem).strip()
+        elif kind == 'tbl':
+            text = format_table(read_table(elem))
+        else:
+            text = ''
+        rids = [blip.get(R_EMBED) for blip in elem.iter(A_BLIP)]
+        elements.append((kind, text, rids))
     return elements, para_to_elem
 
 
@@ -82,21 +102,45 @@ def _is_descendant(child_num, parent_num):
     return child_num.startswith(parent_num + '.')
 
 
+def section_ends(toc_entries):
+    """
+    Map (para_index, number) of every TOC entry → para_index where its section ends.
+
+    A section ends at the next TOC entry (higher para_index) that is not one of
+    its descendants, so "13.1" spans 13.1.1, 13.1.2, ... and stops at 13.2;
+    None = runs to the end of the document. One pass over the entries sorted by
+    position: the sections still open are the ancestors of the current entry
+    (plus entries at the same position), so each new entry closes every open
+    section it does not belong to.
+    """
+    toc_by_idx = sorted((te['para_index'], te['number']) for te in toc_entries
+                        if te.get('para_index') is not None)
+    ends = {}
+    open_sections = []
+    for pi, number in toc_by_idx:
+        still_open = []
+        for op, onum in open_sections:
+            if op < pi and not _is_descendant(number, onum):
+                ends[(op, onum)] = pi
+            else:
+                still_open.append((op, onum))
+        still_open.append((pi, number))
+        open_sections = still_open
+    for key in open_sections:
+        ends[key] = None
+    return ends
+
+
 def resolve_positions(plan_entries, toc_entries, para_to_elem, total_elements):
     """Map each plan entry to (start_elem_idx, end_elem_idx) using TOC data."""
     # Build lookup: (number, title) → para_index from toc
     toc_lookup = {}
-    # sorted list of (para_index, number) for all toc entries
-    toc_by_idx = []
     for te in toc_entries:
-        key = (te['number'], te['title'])
         pi = te.get('para_index')
         if pi is not None:
-            toc_lookup[key] = pi
-            toc_by_idx.append((pi, te['number']))
-    toc_by_idx.sort()
+            toc_lookup[(te['number'], te['title'])] = pi
+    ends = section_ends(toc_entries)
 
-    # For each plan entry, find its start position and the next section's start
     positions = []
     for entry in plan_entries:
         key = (entry['number'], entry['title'])
@@ -110,15 +154,7 @@ def resolve_positions(plan_entries, toc_entries, para_to_elem, total_elements):
             print(f"  ⚠ Section {entry['number']} para_index {pi} not mapped")
             continue
 
-        # End = next non-descendant toc entry's element index.
-        # This ensures requesting "13.1" captures all sub-sections (13.1.1, 13.1.2, ...)
-        # and stops at the next sibling or higher-level entry (13.2).
-        next_pi = None
-        for tp, tn in toc_by_idx:
-            if tp > pi and not _is_descendant(tn, entry['number']):
-                next_pi = tp
-                break
-
+        next_pi = ends[(pi, entry['number'])]
         if next_pi is not None and next_pi in para_to_elem:
             end_ei = para_to_elem[next_pi]
         else:
@@ -131,60 +167,65 @@ def resolve_positions(plan_entries, toc_entries, para_to_elem, total_elements):
 
 # ── Content extraction ──────────────────────────────────────────────────
 
-def extract_text_from_range(doc, elements, start, end):
-    """Extract readable text from body elements in [start, end)."""
-    parts = []
-    table_map = {id(t._element): t for t in doc.tables}
-
-    for idx in range(start, end):
-        elem = elements[idx]
-        if elem.tag == qn('w:p'):
-            text = get_para_text(elem).strip()
-            if text:
-                parts.append(text)
-        elif elem.tag == qn('w:tbl'):
-            t = table_map.get(id(elem))
-            if t:
-                parts.append(format_table(t))
+def build_text_index(elements):
+    """
+    Join the readable text of all body elements once.
 
-    return '\n'.join(parts)
+    Returns (body_text, offsets): non-empty paragraphs and every table, one
+    per line, and for each element index (plus one past the end) the offset
+    in body_text where that element's text would start.
+    """
+    parts = []
+    offsets = []
+    pos = 0
+    for kind, text, _ in elements:
+        offsets.append(pos)
+        if kind == 'tbl' or (kind == 'p' and text):
+            parts.append(text)
+            pos += len(text) + 1
+    offsets.append(pos)
+    return '\n'.join(parts), offsets
+
+
+def extract_text_from_range(text_index, start, end):
+    """Extract readable text from body elements in [start, end)."""
+    body_text, offsets = text_index
+    a, b = offsets[start], offsets[end]
+    return body_text[a:b - 1] if b > a else ''
 
 
-def extract_images_from_range(doc, elements, start, end):
-    """Extract images from body elements in [start, end)."""
-    images = []
+def image_parts_in_range(reader, elements, start, end):
+    """Image parts (zip member, extension, size) referenced by body elements in [start, end)."""
+    parts = []
     seen = set()
 
     for idx in range(start, end):
-        elem = elements[idx]
-        for blip in elem.iter(qn('a:blip')):
-            rId = blip.get(qn('r:embed'))
+        for rId in elements[idx][2]:
             if not rId or rId in seen:
                 continue
-            if rId not in doc.part.rels:
-                continue
             seen.add(rId)
+            part = reader.image_part(rId)
+            if part is None:
+                continue
+            _, ext, size = part
+            if ext not in ALLOWED_EXTS or size < MIN_IMAGE_BYTES:
+                continue
+            parts.append(part)
 
-            try:
-                part = doc.part.rels[rId].target_part
-                data = part.blob
-                ext = part.partname.split('.')[-1].lower()
-
-                if ext not in ALLOWED_EXTS:
-                    continue
-                if len(data) < MIN_IMAGE_BYTES:
-                    continue
+    return parts
 
-                images.append((data, ext))
-            except Exception:
-                pass
 
-    return images
+# ── Main ────────────────────────────────────────────────────────────────
 
+def entry_signature(entry):
+    """Cache key of a plan entry: everything that decides which files it writes."""
+    return json.dumps([
+        entry['number'], entry['title'], entry.get('output_name', entry['title']),
+        entry.get('extract_text', True), entry.get('extract_images', True),
+    ], ensure_ascii=False)
 
-# ── Main ────────────────────────────────────────────────────────────────
 
-def extract_by_plan(docx_path, plan_path, toc_path, output_dir):
+def extract_by_plan(docx_path, plan_path, toc_path, output_dir, force=False, policy=None, workers=None):
     os.makedirs(output_dir, exist_ok=True)
 
     with open(plan_path, 'r', encoding='utf-8') as f:
@@ -198,18 +239,41 @@ def extract_by_plan(docx_path, plan_path, toc_path, output_dir):
         print("Empty extraction plan.")
         return
 
-    print(f"Loading {docx_path}...")
-    doc = Document(docx_path)
-
-    print("Building position map...")
-    elements, para_to_elem = build_para_to_elem_map(doc)
-
-    print(f"Resolving {len(extractions)} sections...")
-    positions = resolve_positions(extractions, toc_entries, para_to_elem, len(elements))
-    print(f"  Resolved {len(positions)} of {len(extractions)} sections\n")
-
-    results = []
-
+    # Sections extracted by a previous run on the same document and toc.json
+    cache = load_cache(output_dir)
+    params = {'toc': file_digest(toc_path)}
+    if policy:
+        params['image_policy'] = policy
+    last = cached_entry(cache, 'extract_sections', docx_path)
+    previous = None if force else lookup(cache, 'extract_sections', docx_path, params, OUTPUT_VERSION)
+    done = previous['sections'] if previous else {}
+    todo = [e for e in extractions if entry_signature(e) not in done]
+    # Images of unchanged entries can be referenced by re-extracted ones
+    images = {}
+    if previous:
+        still_listed = {f for e in extractions for f in done.get(entry_signature(e)) or []}
+        images = {f: sha for f, sha in previous.get('images', {}).items() if f in still_listed}
+    print(f"{len(extractions) - len(todo)} of {len(extractions)} sections unchanged since the last run")
+
+    extracted = {}
+    reader = None
+    if todo:
+        print(f"Reading {docx_path}...")
+        reader = DocxReader(docx_path)
+
+        print("Building position map...")
+        elements, para_to_elem = build_para_to_elem_map(reader)
+        text_index = build_text_index(elements)
+
+        print(f"Resolving {len(todo)} sections...")
+        positions = resolve_positions(todo, toc_entries, para_to_elem, len(elements))
+        print(f"  Resolved {len(positions)} of {len(todo)} sections\n")
+        # Unresolved entries are cached too, so they are not retried on every run
+        extracted = {entry_signature(e): None for e in todo}
+    else:
+        positions = []
+
+    section_images = []
     for start_ei, end_ei, entry in positions:
         num = entry['number']
         title = entry['title']
@@ -222,7 +286,7 @@ def extract_by_plan(docx_path, plan_path, toc_path, output_dir):
         files = []
 
         if want_text:
-            text = extract_text_from_range(doc, elements, start_ei, end_ei)
+            text = extract_text_from_range(text_index, start_ei, end_ei)
             if text.strip():
                 fname = f"{prefix}.txt"
                 path = os.path.join(output_dir, fname)
@@ -231,36 +295,78 @@ def extract_by_plan(docx_path, plan_path, toc_path, output_dir):
                 files.append(fname)
                 print(f"    → {fname} ({len(text):,} chars)")
 
-        if want_images:
-            imgs = extract_images_from_range(doc, elements, start_ei, end_ei)
-            for ii, (data, ext) in enumerate(imgs):
-                if len(imgs) == 1:
-                    fname = f"{prefix}.{ext}"
-                else:
-                    fname = f"{prefix}-{ii + 1:02d}.{ext}"
-                path = os.path.join(output_dir, fname)
-                with open(path, 'wb') as f:
-                    f.write(data)
-                files.append(fname)
-                print(f"    → {fname} ({len(data):,} bytes)")
+        parts = image_parts_in_range(reader, elements, start_ei, end_ei) if want_images else []
+        if parts:
+            section_images.append({'key': entry_signature(entry), 'prefix': prefix,
+                                   'span': end_ei - start_ei, 'parts': parts})
+            print(f"    → {len(parts)} image(s)")
 
-        if not files:
+        if not files and not parts:
             print(f"    (no content)")
 
+        extracted[entry_signature(entry)] = files
+
+    if reader is not None:
+        reader.close()
+
+    if section_images:
+        print(f"\nExporting images of {len(section_images)} sections...")
+        known = {sha: f for f, sha in images.items()}
+        image_files, new_images, stats = export_images(docx_path, section_images, output_dir, known,
+                                                       policy, workers)
+        for key, names in image_files.items():
+            extracted[key].extend(names)
+        images.update(new_images)
+        for fname, size in stats['written']:
+            print(f"    → {fname} ({size:,} bytes)")
+        print(f"  {stats['references']} image references, {len(stats['written'])} files written "
+              f"({stats['bytes_written']:,} bytes), {stats['bytes_skipped']:,} bytes of duplicates skipped")
+
+    # Results in plan order, unchanged entries taken from the cache
+    sections = {}
+    results = []
+    for entry in extractions:
+        sig = entry_signature(entry)
+        files = extracted[sig] if sig in extracted else done[sig]
+        sections[sig] = files
+        if files is None:
+            continue
         results.append({
-            'number': num,
-            'title': title,
+            'number': entry['number'],
+            'title': entry['title'],
             'category': entry.get('category', ''),
             'files': files,
         })
 
-    # Manifest
-    manifest = {'source': docx_path, 'results': results}
+    # Files of the last run that no entry produces any more
+    keep = {f for files in sections.values() if files for f in files}
+    for fname in (last['artifacts'] if last else []):
+        path = os.path.join(output_dir, fname)
+        if fname not in keep and fname != 'manifest.json' and os.path.exists(path):
+            os.remove(path)
+
+    # Manifest: every unique image once, with the sections that contain it
+    images = {f: sha for f, sha in images.items() if f in keep}
+    listed_in = {}
+    for r in results:
+        for f in r['files']:
+            if f in images:
+                listed_in.setdefault(f, []).append(r['number'])
+    manifest = {
+        'source': docx_path,
+        'results': results,
+        'images': [{'file': f, 'source_sha256': images[f],
+                    'bytes': os.path.getsize(os.path.join(output_dir, f)), 'sections': numbers}
+                   for f, numbers in listed_in.items()],
+    }
     manifest_path = os.path.join(output_dir, 'manifest.json')
     with open(manifest_path, 'w', encoding='utf-8') as f:
         json.dump(manifest, f, ensure_ascii=False, indent=2)
+    store(cache, 'extract_sections', docx_path, sorted(keep) + ['manifest.json'], params, OUTPUT_VERSION,
+          sections=sections, images=images)
+    save_cache(cache)
 
-    total_files = sum(len(r['files']) for r in results)
+    total_files = len(keep)
     print(f"\nDone: {total_files} files from {len(results)} sections → {output_dir}/")
 
 
@@ -270,8 +376,13 @@ def main():
     parser.add_argument('--plan', required=True)
     parser.add_argument('--toc', required=True, help="toc.json from Step 1")
     parser.add_argument('--output-dir', '-o', default='data')
+    parser.add_argument('--max-image-side', type=int, help="downscale images whose longer side exceeds this (px)")
+    parser.add_argument('--jpeg-quality', type=int, help="re-encode JPEGs at this quality (1-95)")
+    parser.add_argument('--workers', type=int, help="image read/write threads (default: Python's default)")
+    add_force_argument(parser)
     args = parser.parse_args()
-    extract_by_plan(args.docx_path, args.plan, args.toc, args.output_dir)
+    policy = image_policy(args.max_image_side, args.jpeg_quality)
+    extract_by_plan(args.docx_path, args.plan, args.toc, args.output_dir, args.force, policy, args.workers)
 
 
 if __name__ == '__main__':
@@ -16,17 +16,37 @@ Does NOT extract project-specific content:
   - Project schedules, risk management
   - Pricing (project-specific)
 
+Batch mode extracts every .docx in a directory across a process pool and
+merges the records: companies by credit code (name when there is none),
+personnel by name, projects by (name, client), certifications by keyword.
+The first file (sorted by name) to provide a field wins; every merged record
+lists its ``source_files``. Outputs, the index cross-reference and the report
+(with per-file timings) are written once.
+
+Unchanged inputs are not parsed again (content-hash cache, extract_cache.py):
+a single file whose outputs and index are unchanged is skipped, and in batch
+mode the records of unchanged files are reused from the cache. --force
+re-extracts everything.
+
 Usage:
-    python extract_text.py <docx_path> [--output-dir data] [--index index.json]
+    python extract_text.py <docx_path> [--output-dir data] [--index index.json] [--force]
+    python extract_text.py --input-dir 历史标书/ [--output-dir data] [--index index.json] [--workers N] [--force]
 """
 import argparse
+import bisect
+import copy
 import json
 import os
 import re
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 
 from docx import Document
-from docx.oxml.ns import qn
+
+from extract_cache import (add_force_argument, load_cache, lookup, optional_digest, release,
+                           save_cache, store)
+from table_model import build_model
 
 
 # ── Keyword → field mapping ──────────────────────────────────────────────
@@ -97,6 +117,20 @@ PERSON_KEYS = {
     '资质证书': 'certifications',
 }
 
+# Qualification keyword → description, reported in this order within a text
+CERT_KEYWORDS = {
+    'ISO9001': '质量管理体系', 'ISO 9001': '质量管理体系',
+    'ISO14001': '环境管理体系', 'ISO 14001': '环境管理体系',
+    'ISO27001': '信息安全管理体系', 'ISO 27001': '信息安全管理体系',
+    'ISO20000': '信息技术服务管理体系', 'ISO 20000': '信息技术服务管理体系',
+    'ISO45001': '职业健康安全管理体系', 'ISO 45001': '职业健康安全管理体系',
+    'OHSAS18001': '职业健康安全管理体系',
+    'CMMI': '能力成熟度模型',
+    '高新技术企业': '高新技术企业认定',
+    '软件著作权': '软件著作权',
+    'ITSS': '信息技术服务标准',
+}
+
 # Header keywords that identify a team member list table
 TEAM_TABLE_HEADERS = {'人员姓名', '姓名', '学历', '资质证书', '工作经验', '岗位'}
 
@@ -108,6 +142,59 @@ PERF_TABLE_HEADERS = {'项目名称', '采购单位', '合同金额', '实施时
 PLACEHOLDER_RE = re.compile(r'【.*?】')
 
 
+class KeywordMatcher:
+    """
+    Compiled substring matcher for one ordered keyword → value mapping.
+
+    One alternation regex (longest keyword first) scans the text; after each
+    hit the scan resumes one character after its start, so overlapping
+    keywords are still seen. Keywords contained in a hit are implied by it.
+    Results follow the mapping's declared order, exactly like looping over
+    ``mapping.items()`` with ``kw in text``.
+    """
+
+    def __init__(self, mapping):
+        self.mapping = mapping
+        self.priority = {kw: i for i, kw in enumerate(mapping)}
+        self.pattern = re.compile('|'.join(
+            re.escape(kw) for kw in sorted(mapping, key=len, reverse=True)))
+        self.implied = {kw: [k for k in mapping if k in kw] for kw in mapping}
+
+    def positions(self, text):
+        """``{keyword: offset}`` for keywords in ``text``; the offset is at or
+        before the keyword's first occurrence, within the same hit."""
+        found = {}
+        m = self.pattern.search(text)
+        while m is not None:
+            start = m.start()
+            for kw in self.implied[m.group()]:
+                found.setdefault(kw, start)
+            m = self.pattern.search(text, start + 1)
+        return found
+
+    def first(self, text):
+        """``(keyword, value)`` of the first declared keyword in ``text``, or None."""
+        found = self.positions(text)
+        if not found:
+            return None
+        kw = min(found, key=self.priority.__getitem__)
+        return kw, self.mapping[kw]
+
+    def all(self, text):
+        """``[(keyword, value), ...]`` for every keyword in ``text``, declared order."""
+        found = self.positions(text)
+        if not found:
+            return []
+        return [(kw, v) for kw, v in self.mapping.items() if kw in found]
+
+
+COMPANY_MATCHER = KeywordMatcher(COMPANY_KEYS)
+BANK_MATCHER = KeywordMatcher(BANK_KEYS)
+LEGAL_REP_MATCHER = KeywordMatcher(LEGAL_REP_KEYS)
+PERSON_MATCHER = KeywordMatcher(PERSON_KEYS)
+CERT_MATCHER = KeywordMatcher(CERT_KEYWORDS)
+
+
 def clean(value: str):
     """Return cleaned value, or None if empty/placeholder/meaningless."""
     if not value:
@@ -159,40 +246,6 @@ def looks_like_person_name(val: str) -> bool:
     return False
 
 
-def dedup_row(row):
-    """Deduplicate cells from merged columns (python-docx repeats them)."""
-    seen = set()
-    cells = []
-    for cell in row.cells:
-        cid = id(cell._tc)
-        if cid not in seen:
-            seen.add(cid)
-            cells.append(cell.text.strip())
-    return cells
-
-
-def get_contexts(doc):
-    """Map table_index → last few paragraphs before that table."""
-    contexts = {}
-    ti = 0
-    recent = []
-    for child in doc.element.body:
-        if child.tag == qn('w:p'):
-            texts = []
-            for r in child.iter(qn('w:t')):
-                if r.text:
-                    texts.append(r.text)
-            t = ''.join(texts).strip()
-            if t:
-                recent.append(t)
-                if len(recent) > 5:
-                    recent = recent[-5:]
-        elif child.tag == qn('w:tbl'):
-            contexts[ti] = list(recent)
-            ti += 1
-    return contexts
-
-
 # ── KV pair scanner ───────────────────────────────────────────────────────
 
 def scan_kv_pairs(table):
@@ -205,8 +258,7 @@ def scan_kv_pairs(table):
     - N-col with merged cells
     - Person cards with interleaved k-v in a single row
     """
-    for row in table.rows:
-        cells = dedup_row(row)
+    for cells in table['rows']:
         if len(cells) < 2:
             continue
         # Try adjacent pairs: cells[0]→cells[1], cells[2]→cells[3], ...
@@ -231,9 +283,7 @@ def scan_header_rows(table):
     """
     If table has a recognizable header row, yield (header_list, data_rows).
     """
-    rows = []
-    for row in table.rows:
-        rows.append(dedup_row(row))
+    rows = table['rows']
     if not rows or len(rows) < 2:
         return None, None
     return rows[0], rows[1:]
@@ -241,7 +291,7 @@ def scan_header_rows(table):
 
 # ── Extraction functions ─────────────────────────────────────────────────
 
-def extract_company(doc, contexts):
+def extract_company(model):
     """Scan entire doc for company-level info."""
     company = {
         'name': None, 'credit_code': None, 'registered_address': None,
@@ -255,37 +305,31 @@ def extract_company(doc, contexts):
         },
     }
 
-    for ti, table in enumerate(doc.tables):
+    for table in model['tables']:
         for key, val in scan_kv_pairs(table):
             cv = clean(val)
             if not cv or is_noise_value(cv):
                 continue
 
             # Company fields
-            for kw, field in COMPANY_KEYS.items():
-                if kw in key:
-                    # For 'name' field, prefer exact '供应商名称' over '公司名称'
-                    # to avoid matching '母公司及控股公司名称' etc.
-                    if field == 'name':
-                        if key.startswith('母公司') or '控股' in key:
-                            break  # skip this match
-                    if company.get(field) is None:
-                        company[field] = cv
-                    break
+            match = COMPANY_MATCHER.first(key)
+            if match:
+                field = match[1]
+                # For 'name' field, prefer exact '供应商名称' over '公司名称'
+                # to avoid matching '母公司及控股公司名称' etc.
+                skip = field == 'name' and (key.startswith('母公司') or '控股' in key)
+                if not skip and company.get(field) is None:
+                    company[field] = cv
 
             # Bank fields
-            for kw, field in BANK_KEYS.items():
-                if kw in key:
-                    if company['bank'].get(field) is None:
-                        company['bank'][field] = cv
-                    break
+            match = BANK_MATCHER.first(key)
+            if match and company['bank'].get(match[1]) is None:
+                company['bank'][match[1]] = cv
 
             # Legal representative: must look like a name (short, no noise words)
-            for kw, field in LEGAL_REP_KEYS.items():
-                if kw in key and company['legal_representative'] is None:
-                    if looks_like_person_name(cv):
-                        company['legal_representative'] = cv
-                    break
+            if company['legal_representative'] is None and LEGAL_REP_MATCHER.first(key):
+                if looks_like_person_name(cv):
+                    company['legal_representative'] = cv
 
             # Phone: only capture if no phone yet
             if company['phone'] is None:
@@ -295,13 +339,13 @@ def extract_company(doc, contexts):
     return company
 
 
-def extract_personnel(doc, contexts):
+def extract_personnel(model):
     """Extract personnel from person-card tables and team summary tables."""
     personnel = []
     seen_names = set()
 
-    for ti, table in enumerate(doc.tables):
-        ctx_lines = contexts.get(ti, [])
+    for table in model['tables']:
+        ctx_lines = table['context']
         ctx_text = ' '.join(ctx_lines)
 
         # ── Try header+rows pattern (team summary table) ──
@@ -349,11 +393,9 @@ def extract_personnel(doc, contexts):
             cv = clean(val)
             if not cv:
                 continue
-            for kw, field in PERSON_KEYS.items():
-                if kw in key:
-                    if field not in person:
-                        person[field] = cv
-                    break
+            match = PERSON_MATCHER.first(key)
+            if match and match[1] not in person:
+                person[match[1]] = cv
 
         # Only keep if we found a name that looks like a real person name
         if person.get('name') and person['name'] not in seen_names and looks_like_person_name(person['name']):
@@ -365,8 +407,7 @@ def extract_personnel(doc, contexts):
 
             # Also check for project experience rows in the same table
             experience_items = []
-            for row in table.rows:
-                cells = dedup_row(row)
+            for cells in table['rows']:
                 # Look for rows with date-like first cell and project descriptions
                 if cells and re.match(r'\d{4}', cells[0].strip()):
                     proj_text = ' '.join(c for c in cells[1:] if clean(c))
@@ -396,11 +437,11 @@ def _guess_role(ctx_lines):
     return None
 
 
-def extract_performance(doc, contexts):
+def extract_performance(model):
     """Extract project track record / performance."""
     projects = []
 
-    for ti, table in enumerate(doc.tables):
+    for table in model['tables']:
         header, data_rows = scan_header_rows(table)
         if not header or not data_rows:
             continue
@@ -434,60 +475,60 @@ def extract_performance(doc, contexts):
     return projects
 
 
-def extract_qualifications(doc):
+def extract_qualifications(model):
     """Scan paragraphs and tables for qualification/certification mentions."""
     certs = []
-    found = set()
-
-    cert_keywords = {
-        'ISO9001': '质量管理体系', 'ISO 9001': '质量管理体系',
-        'ISO14001': '环境管理体系', 'ISO 14001': '环境管理体系',
-        'ISO27001': '信息安全管理体系', 'ISO 27001': '信息安全管理体系',
-        'ISO20000': '信息技术服务管理体系', 'ISO 20000': '信息技术服务管理体系',
-        'ISO45001': '职业健康安全管理体系', 'ISO 45001': '职业健康安全管理体系',
-        'OHSAS18001': '职业健康安全管理体系',
-        'CMMI': '能力成熟度模型',
-        '高新技术企业': '高新技术企业认定',
-        '软件著作权': '软件著作权',
-        'ITSS': '信息技术服务标准',
-    }
 
     # Scan all text (paragraphs + table cells)
-    all_text = []
-    for p in doc.paragraphs:
-        if p.text.strip():
-            all_text.append(p.text.strip())
-    for table in doc.tables:
-        for row in table.rows:
-            for cell in row.cells:
-                if cell.text.strip():
-                    all_text.append(cell.text.strip())
-
+    all_text = list(model['paragraphs'])
+    for table in model['tables']:
+        for cells in table['rows']:
+            all_text.extend(c for c in cells if c)
+
+    # One scan over all texts; keywords never contain '\n', so no hit spans
+    # two texts. Order = first text mentioning it, then declared order.
+    starts, offset = [], 0
     for text in all_text:
-        for kw, desc in cert_keywords.items():
-            if kw in text and kw not in found:
-                found.add(kw)
-                certs.append({'name': kw, 'description': desc})
+        starts.append(offset)
+        offset += len(text) + 1
+    hits = CERT_MATCHER.positions('\n'.join(all_text))
+    first_text = {kw: bisect.bisect_right(starts, pos) - 1 for kw, pos in hits.items()}
+    for kw in sorted(first_text, key=lambda k: (first_text[k], CERT_MATCHER.priority[k])):
+        certs.append({'name': kw, 'description': CERT_KEYWORDS[kw]})
 
     return certs
 
 
 # ── Main ──────────────────────────────────────────────────────────────────
 
-def extract_all(docx_path: str, output_dir: str, index_path: str = None):
+# Bump when the JSON files or the report change for the same input, e.g. the
+# batch company.json shape (cache key, see extract_cache.py)
+OUTPUT_VERSION = 1
+
+OUTPUT_FILES = ['company.json', 'personnel.json', 'performance.json',
+                'qualifications.json', 'extraction_report.md']
+
+
+def extract_all(docx_path: str, output_dir: str, index_path: str = None, force: bool = False):
     os.makedirs(output_dir, exist_ok=True)
 
+    cache = load_cache(output_dir)
+    params = {'index': optional_digest(index_path)}
+    if not force and lookup(cache, 'extract_text', docx_path, params, OUTPUT_VERSION):
+        print(f"{docx_path} unchanged, outputs in {output_dir}/ are up to date (--force to redo)")
+        return
+
     print(f"Loading {docx_path}...")
     doc = Document(docx_path)
-    print(f"  {len(doc.paragraphs)} paragraphs, {len(doc.tables)} tables")
+    model = build_model(doc)
+    print(f"  {len(model['paragraphs'])} paragraphs, {len(model['tables'])} tables")
 
-    contexts = get_contexts(doc)
     source = os.path.basename(docx_path)
     ts = datetime.now().isoformat()
 
     # ── Company ──
     print("\nExtracting company info...")
-    company = extract_company(doc, contexts)
+    company = extract_company(model)
     company['source_file'] = source
     company['extracted_at'] = ts
     _save(os.path.join(output_dir, 'company.json'), company)
@@ -499,7 +540,7 @@ def extract_all(docx_path: str, output_dir: str, index_path: str = None):
 
     # ── Personnel ──
     print("\nExtracting personnel...")
-    personnel = extract_personnel(doc, contexts)
+    personnel = extract_personnel(model)
     _save(os.path.join(output_dir, 'personnel.json'), {
         'personnel': personnel, 'source_file': source, 'extracted_at': ts,
     })
@@ -511,7 +552,7 @@ def extract_all(docx_path: str, output_dir: str, index_path: str = None):
 
     # ── Performance ──
     print("\nExtracting performance...")
-    projects = extract_performance(doc, contexts)
+    projects = extract_performance(model)
     _save(os.path.join(output_dir, 'performance.json'), {
         'projects': projects, 'source_file': source, 'extracted_at': ts,
     })
@@ -521,7 +562,7 @@ def extract_all(docx_path: str, output_dir: str, index_path: str = None):
 
     # ── Qualifications ──
     print("\nExtracting qualifications...")
-    quals = extract_qualifications(doc)
+    quals = extract_qualifications(model)
     _save(os.path.join(output_dir, 'qualifications.json'), {
         'certifications': quals, 'source_file': source, 'extracted_at': ts,
     })
@@ -535,7 +576,179 @@ def extract_all(docx_path: str, output_dir: str, index_path: str = None):
         _cross_ref(output_dir, index_path)
 
     # ── Report ──
-    _report(output_dir, company, personnel, projects, quals, source)
+    _report(output_dir, [company], personnel, projects, quals, [source])
+    store(cache, 'extract_text', docx_path, OUTPUT_FILES, params, OUTPUT_VERSION)
+    save_cache(cache)
+    print(f"\nDone. Output: {output_dir}/")
+
+
+# ── Batch mode ────────────────────────────────────────────────────────────
+
+def extract_file(docx_path: str):
+    """
+    Extract one .docx without writing anything (process pool worker).
+
+    Returns {"source", "company", "personnel", "projects", "quals",
+    "tables", "timing": {"load_ms", "model_ms", "extract_ms", "total_ms"}},
+    or {"source", "error", "timing"} when the file cannot be read.
+    """
+    source = os.path.basename(docx_path)
+    start = time.perf_counter()
+    try:
+        doc = Document(docx_path)
+        loaded = time.perf_counter()
+        model = build_model(doc)
+        modelled = time.perf_counter()
+        result = {
+            'source': source,
+            'company': extract_company(model),
+            'personnel': extract_personnel(model),
+            'projects': extract_performance(model),
+            'quals': extract_qualifications(model),
+            'tables': len(model['tables']),
+        }
+    except Exception as e:  # one broken file must not stop the batch
+        return {'source': source, 'error': f'{type(e).__name__}: {e}',
+                'timing': {'total_ms': round((time.perf_counter() - start) * 1000, 1)}}
+    end = time.perf_counter()
+    result['timing'] = {
+        'load_ms': round((loaded - start) * 1000, 1),
+        'model_ms': round((modelled - loaded) * 1000, 1),
+        'extract_ms': round((end - modelled) * 1000, 1),
+        'total_ms': round((end - start) * 1000, 1),
+    }
+    return result
+
+
+def _fill_missing(target, record):
+    """Copy fields of record that are empty in target (recursing into dicts,
+    appending new list items)."""
+    for k, v in record.items():
+        current = target.get(k)
+        if isinstance(current, dict) and isinstance(v, dict):
+            _fill_missing(current, v)
+        elif isinstance(current, list) and isinstance(v, list):
+            current.extend(item for item in v if item not in current)
+        elif current is None:
+            target[k] = copy.deepcopy(v)
+
+
+def merge_records(batches, key):
+    """
+    Merge records from several files, deduplicated by key(record).
+
+    batches: [(source_file, [record, ...]), ...] in file order. Records whose
+    key is None are dropped. Returns merged records in first-seen order, each
+    with a "source_files" list.
+    """
+    merged = {}
+    for source, records in batches:
+        for record in records:
+            k = key(record)
+            if k is None:
+                continue
+            target = merged.get(k)
+            if target is None:
+                target = merged[k] = copy.deepcopy(record)
+                target['source_files'] = []
+            else:
+                _fill_missing(target, record)
+            if source not in target['source_files']:
+                target['source_files'].append(source)
+    return list(merged.values())
+
+
+def _company_key(company):
+    code = company.get('credit_code')
+    if code:
+        return re.sub(r'\s+', '', code).upper()
+    return company.get('name')
+
+
+def extract_batch(input_dir: str, output_dir: str, index_path: str = None, workers: int = None,
+                  force: bool = False):
+    paths = sorted(
+        os.path.join(input_dir, name) for name in os.listdir(input_dir)
+        if name.lower().endswith('.docx') and not name.startswith('~$')  # skip Word lock files
+    )
+    if not paths:
+        print(f"No .docx files in {input_dir}")
+        return
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Records of unchanged files come from the cache; only the rest are parsed
+    cache = load_cache(output_dir)
+    results = {}
+    for path in paths:
+        entry = None if force else lookup(cache, 'extract_text:file', path, version=OUTPUT_VERSION)
+        if entry is not None:
+            results[path] = dict(entry['result'], cached=True)
+    todo = [p for p in paths if p not in results]
+
+    # At most one process per file to parse; a single file stays in-process
+    workers = max(1, min(workers or os.cpu_count() or 1, len(todo)))
+    print(f"Extracting {len(todo)} of {len(paths)} files from {input_dir} "
+          f"({len(paths) - len(todo)} unchanged, {workers} worker(s))...")
+    start = time.perf_counter()
+    if workers == 1:
+        fresh = [extract_file(p) for p in todo]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            fresh = list(pool.map(extract_file, todo))
+    wall = time.perf_counter() - start
+    for path, result in zip(todo, fresh):
+        results[path] = result
+        if 'error' not in result:
+            store(cache, 'extract_text:file', path, [], version=OUTPUT_VERSION, result=result)
+    results = [results[p] for p in paths]
+
+    ok = [r for r in results if 'error' not in r]
+    ts = datetime.now().isoformat()
+    sources = [r['source'] for r in ok]
+
+    companies = merge_records([(r['source'], [r['company']]) for r in ok], _company_key)
+    personnel = merge_records([(r['source'], r['personnel']) for r in ok], lambda p: p.get('name'))
+    projects = merge_records(
+        [(r['source'], r['projects']) for r in ok],
+        lambda p: (p['project_name'], p.get('client')) if p.get('project_name') else None)
+    quals = merge_records([(r['source'], r['quals']) for r in ok], lambda q: q['name'])
+
+    _save(os.path.join(output_dir, 'company.json'), {
+        'companies': companies, 'source_files': sources, 'extracted_at': ts,
+    })
+    _save(os.path.join(output_dir, 'personnel.json'), {
+        'personnel': personnel, 'source_files': sources, 'extracted_at': ts,
+    })
+    _save(os.path.join(output_dir, 'performance.json'), {
+        'projects': projects, 'source_files': sources, 'extracted_at': ts,
+    })
+    _save(os.path.join(output_dir, 'qualifications.json'), {
+        'certifications': quals, 'source_files': sources, 'extracted_at': ts,
+    })
+
+    # Header in ASCII: CJK file names go last so the columns stay aligned
+    print(f"\n  {'tables':>6}{'load':>8}{'model':>8}{'extract':>9}{'total ms':>10}{'people':>8}{'projects':>10}  file")
+    for r in results:
+        t = r['timing']
+        if 'error' in r:
+            print(f"  {'':>6}{'':>8}{'':>8}{'':>9}{t['total_ms']:>10.0f}{'':>8}{'':>10}  {r['source']}  FAILED {r['error']}")
+            continue
+        print(f"  {r['tables']:>6}{t['load_ms']:>8.0f}{t['model_ms']:>8.0f}{t['extract_ms']:>9.0f}"
+              f"{t['total_ms']:>10.0f}{len(r['personnel']):>8}{len(r['projects']):>10}  {r['source']}"
+              f"{'  (cached)' if r.get('cached') else ''}")
+    busy = sum(r['timing']['total_ms'] for r in results if not r.get('cached')) / 1000
+    print(f"  wall {wall:.2f} s, per-file total {busy:.2f} s, {len(results) - len(ok)} failed")
+    print(f"\nMerged: {len(companies)} companies, {len(personnel)} people, "
+          f"{len(projects)} projects, {len(quals)} certifications")
+
+    if index_path and os.path.exists(index_path):
+        print(f"\nCross-referencing with {index_path}...")
+        _cross_ref(output_dir, index_path)
+
+    _report(output_dir, companies, personnel, projects, quals, sources, results)
+    # The merged outputs replace whatever a single-file run left in output_dir
+    release(cache, OUTPUT_FILES)
+    save_cache(cache)
     print(f"\nDone. Output: {output_dir}/")
 
 
@@ -577,22 +790,29 @@ def _cross_ref(output_dir, index_path):
         _save(ppath, pdata)
 
 
-def _report(output_dir, company, personnel, projects, quals, source):
+def _report(output_dir, companies, personnel, projects, quals, sources, results=None):
+    """Write extraction_report.md; results (batch mode) adds per-file timings."""
     lines = [
         '# 资料提取报告', '',
-        f'- 来源: `{source}`',
+        f'- 来源: `{sources[0]}`' if len(sources) == 1 else f'- 来源: {len(sources)} 个文件',
         f'- 时间: {datetime.now().strftime("%Y-%m-%d %H:%M")}', '',
         '## 公司信息', '',
     ]
-    for k, v in company.items():
-        if k in ('source_file', 'extracted_at', 'bank'):
-            continue
-        if isinstance(v, str) and v:
-            lines.append(f'- {k}: {v}')
-    bank = company.get('bank', {})
-    if any(bank.values()):
-        lines.append(f'- 开户行: {bank.get("bank_name") or "—"}')
-        lines.append(f'- 账号: {bank.get("account_number") or "—"}')
+    for company in companies:
+        if len(companies) > 1:
+            title = ' / '.join(v for v in (company.get('name'), company.get('credit_code')) if v)
+            lines.extend([f'### {title}', ''])
+        for k, v in company.items():
+            if k in ('source_file', 'extracted_at', 'bank'):
+                continue
+            if isinstance(v, str) and v:
+                lines.append(f'- {k}: {v}')
+        bank = company.get('bank', {})
+        if any(bank.values()):
+            lines.append(f'- 开户行: {bank.get("bank_name") or "—"}')
+            lines.append(f'- 账号: {bank.get("account_number") or "—"}')
+        if len(companies) > 1:
+            lines.append('')
 
     if personnel:
         lines.extend(['', '## 人员信息', '',
@@ -617,14 +837,36 @@ def _report(output_dir, company, personnel, projects, quals, source):
         for q in quals:
             lines.append(f'- {q["name"]} ({q["description"]})')
 
+    if results:
+        lines.extend(['', '## 处理耗时', '',
+                      '| 文件 | 表格 | 加载 ms | 建模 ms | 提取 ms | 合计 ms | 状态 |',
+                      '|------|------|---------|---------|---------|---------|------|'])
+        for r in results:
+            t = r['timing']
+            if 'error' in r:
+                lines.append(f'| {r["source"]} | — | — | — | — | {t["total_ms"]:.0f} | 失败: {r["error"]} |')
+            else:
+                status = '未变化（缓存）' if r.get('cached') else '成功'
+                lines.append(f'| {r["source"]} | {r["tables"]} | {t["load_ms"]:.0f} | {t["model_ms"]:.0f} '
+                             f'| {t["extract_ms"]:.0f} | {t["total_ms"]:.0f} | {status} |')
+
     with open(os.path.join(output_dir, 'extraction_report.md'), 'w', encoding='utf-8') as f:
         f.write('\n'.join(lines))
 
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
-    parser.add_argument('docx_path')
+    parser.add_argument('docx_path', nargs='?')
+    parser.add_argument('--input-dir', default=None, help='extract every .docx in this directory')
     parser.add_argument('--output-dir', default='data')
     parser.add_argument('--index', default=None)
+    parser.add_argument('--workers', type=int, default=None,
+                        help='batch mode processes (default: CPU count, at most one per file to parse; 1 = no pool)')
+    add_force_argument(parser)
     args = parser.parse_args()
-    extract_all(args.docx_path, args.output_dir, args.index)
+    if bool(args.docx_path) == bool(args.input_dir):
+        parser.error('give either docx_path or --input-dir')
+    if args.input_dir:
+        extract_batch(args.input_dir, args.output_dir, args.index, args.workers, args.force)
+    else:
+        extract_all(args.docx_path, args.output_dir, args.index, args.force)
@@ -2,16 +2,26 @@
 Step 1: Extract table of contents from a Word (.docx) file.
 
 Builds a structured TOC by scanning Heading styles (primary) or text patterns (fallback).
-Generates sequential numbering matching the document hierarchy.
+Generates sequential numbering matching the document hierarchy. Paragraph text
+and style names come from the streaming reader (ooxml_reader.py), so the
+document's images and full object model are never loaded.
+
+An unchanged document (same content hash, see extract_cache.py) is skipped
+unless --force is given.
 
 Usage:
-    python extract_toc.py <docx_path> [--output toc.json]
+    python extract_toc.py <docx_path> [--output toc.json] [--force]
 """
 import argparse
 import json
+import os
 import re
 
-from docx import Document
+from extract_cache import add_force_argument, load_cache, lookup, save_cache, store
+from ooxml_reader import DocxReader
+
+# Bump when toc.json changes for the same document (cache key, see extract_cache.py)
+OUTPUT_VERSION = 1
 
 CHINESE_NUMS = {1: '一', 2: '二', 3: '三', 4: '四', 5: '五',
                 6: '六', 7: '七', 8: '八', 9: '九', 10: '十'}
@@ -19,34 +29,35 @@ CHINESE_NUMS = {1: '一', 2: '二', 3: '三', 4: '四', 5: '五',
 
 def extract_toc(docx_path):
     """Extract TOC from a Word document."""
-    doc = Document(docx_path)
+    with DocxReader(docx_path) as reader:
+        paragraphs = reader.paragraphs()
 
     # ── Strategy 1: Build TOC from Heading styles ──
-    entries = _from_heading_styles(doc)
+    entries = _from_heading_styles(paragraphs)
     if entries:
         return entries
 
     # ── Strategy 2: Parse explicit TOC section ──
-    entries = _from_toc_section(doc)
+    entries = _from_toc_section(paragraphs)
     if entries:
         return entries
 
     # ── Strategy 3: Scan body for numbered section headers ──
-    return _from_numbered_headers(doc)
+    return _from_numbered_headers(paragraphs)
 
 
-def _from_heading_styles(doc):
+def _from_heading_styles(paragraphs):
     """Build TOC from paragraphs with Heading 1-6 styles."""
     entries = []
     counters = [0, 0, 0, 0, 0, 0]  # h1..h6
     current_part = None
 
-    for pi, para in enumerate(doc.paragraphs):
-        style = para.style.name if para.style else ''
+    for para in paragraphs:
+        style = para['style'] or ''
         if not style.startswith('Heading '):
             continue
 
-        text = para.text.strip()
+        text = para['text'].strip()
         if not text:
             continue
 
@@ -80,21 +91,21 @@ def _from_heading_styles(doc):
             'page': None,
             'level': level,
             'part': current_part,
-            'para_index': pi,
+            'para_index': para['index'],
         })
 
     return entries
 
 
-def _from_toc_section(doc):
+def _from_toc_section(paragraphs):
     """Parse a formal TOC section (目录 heading followed by TOC entries)."""
     entries = []
     in_toc = False
     current_part = None
 
-    for para in doc.paragraphs:
-        text = para.text.strip()
-        style = para.style.name.lower() if para.style else ''
+    for para in paragraphs:
+        text = para['text'].strip()
+        style = (para['style'] or '').lower()
 
         # Detect TOC by style
         if 'toc' in style and text:
@@ -167,13 +178,14 @@ def _extract_page(rest):
     return rest.strip(), None
 
 
-def _from_numbered_headers(doc):
+def _from_numbered_headers(paragraphs):
     """Fallback: scan body paragraphs for numbered section headers."""
     entries = []
     current_part = None
 
-    for pi, para in enumerate(doc.paragraphs):
-        text = para.text.strip()
+    for para in paragraphs:
+        pi = para['index']
+        text = para['text'].strip()
         if not text or len(text) > 100:
             continue
 
@@ -207,8 +219,17 @@ def main():
     parser = argparse.ArgumentParser(description="Extract TOC from Word document")
     parser.add_argument('docx_path')
     parser.add_argument('--output', '-o', default='toc.json')
+    add_force_argument(parser)
     args = parser.parse_args()
 
+    output_dir = os.path.dirname(os.path.abspath(args.output))
+    artifact = os.path.basename(args.output)
+    params = {'output': artifact}
+    cache = load_cache(output_dir)
+    if not args.force and lookup(cache, 'extract_toc', args.docx_path, params, OUTPUT_VERSION):
+        print(f"{args.docx_path} unchanged, {args.output} is up to date (--force to redo)")
+        return
+
     print(f"Extracting TOC from {args.docx_path}...")
     entries = extract_toc(args.docx_path)
 
@@ -220,6 +241,8 @@ def main():
 
     with open(args.output, 'w', encoding='utf-8') as f:
         json.dump(output, f, ensure_ascii=False, indent=2)
+    store(cache, 'extract_toc', args.docx_path, [artifact], params, OUTPUT_VERSION)
+    save_cache(cache)
 
     print(f"Found {len(entries)} entries → {args.output}")
     for e in entries:
@@ -0,0 +1,184 @@
+"""
+Deduplicating, threaded image export for extract_sections.py.
+
+Plan sections share images: a parent section spans all of its children's
+scans, and the company stamp or logo recurs in every person card. Instead of
+writing every section's images one by one, export_images():
+
+  - hashes every referenced image part once (SHA-256, streamed from the zip)
+  - names each unique image after the most specific section containing it
+    (smallest element range, then plan order) and writes it once; the other
+    sections reference the same file
+  - reads and writes blobs on a thread pool, one zip handle per thread
+  - optionally downscales / recompresses oversized scans (image_policy,
+    needs Pillow)
+
+    files, images, stats = export_images(docx_path, sections, output_dir)
+"""
+import hashlib
+import io
+import os
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_JPEG_QUALITY = 85
+
+
+class _ZipHandles:
+    """One ZipFile per thread: a shared handle serialises every seek and read."""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._opened = []
+        self._lock = threading.Lock()
+
+    def get(self):
+        zf = getattr(self._local, 'zip', None)
+        if zf is None:
+            zf = self._local.zip = zipfile.ZipFile(self.path)
+            with self._lock:
+                self._opened.append(zf)
+        return zf
+
+    def close(self):
+        for zf in self._opened:
+            zf.close()
+
+
+# ── Resize / recompress policy ──────────────────────────────────────────
+
+def image_policy(max_side=None, quality=None):
+    """Policy for shrink(), or None when neither limit is set."""
+    if not max_side and not quality:
+        return None
+    return {'max_side': max_side, 'quality': quality}
+
+
+def shrink(data, policy):
+    """
+    Apply an image_policy to one blob, keeping its format.
+
+    Images whose longer side exceeds max_side are downscaled (aspect ratio
+    kept). JPEGs are re-encoded at quality (85 when only max_side is set);
+    other formats are only re-encoded when downscaled, GIFs never. Without
+    a resize the original is kept unless re-encoding made it smaller.
+    """
+    from PIL import Image  # only needed when a policy is given
+
+    img = Image.open(io.BytesIO(data))
+    fmt = img.format
+    if fmt == 'GIF':
+        return data
+    resized = False
+    max_side = policy.get('max_side')
+    if max_side and max(img.size) > max_side:
+        img.thumbnail((max_side, max_side), Image.LANCZOS)
+        resized = True
+    if not resized and fmt != 'JPEG':
+        return data
+
+    out = io.BytesIO()
+    if fmt == 'JPEG':
+        img.save(out, 'JPEG', quality=policy.get('quality') or DEFAULT_JPEG_QUALITY, optimize=True)
+    elif fmt == 'PNG':
+        img.save(out, 'PNG', optimize=True)
+    else:
+        img.save(out, fmt)
+    out = out.getvalue()
+    return out if resized or len(out) < len(data) else data
+
+
+# ── Export ──────────────────────────────────────────────────────────────
+
+def _slot_names(prefix, images):
+    """Legacy per-section names: prefix.ext for one image, prefix-NN.ext for several."""
+    if len(images) == 1:
+        return [f"{prefix}.{images[0][1]}"]
+    return [f"{prefix}-{i + 1:02d}.{ext}" for i, (_, ext, _) in enumerate(images)]
+
+
+def export_images(docx_path, sections, output_dir, known=None, policy=None, workers=None):
+    """
+    Write the images of the given sections, each unique image once.
+
+    sections: [{"key", "prefix", "span", "parts"}] in plan order. key
+    identifies the section, prefix is its file name prefix, span its number
+    of body elements and parts its image parts in document order as
+    (zip member, extension, size) tuples.
+    known: {sha256: file name} of images already written by earlier runs
+    that may be referenced instead of written again.
+
+    Returns ({key: [image file names]}, {file name: sha256} of every image
+    referenced, stats dict).
+    """
+    known = dict(known or {})
+    handles = _ZipHandles(docx_path)
+
+    def digest(member):
+        h = hashlib.sha256()
+        with handles.get().open(member) as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                h.update(chunk)
+        return h.hexdigest()
+
+    def write(job):
+        member, fname = job
+        data = handles.get().read(member)
+        if policy:
+            data = shrink(data, policy)
+        with open(os.path.join(output_dir, fname), 'wb') as f:
+            f.write(data)
+        return len(data)
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            members = list(dict.fromkeys(m for s in sections for m, _, _ in s['parts']))
+            digests = dict(zip(members, pool.map(digest, members)))
+
+            # Per section: unique images in document order, with their legacy slot names
+            owner = {}  # sha256 → (span, file name, member)
+            per_section = []
+            references = skipped_bytes = 0
+            for section in sections:
+                images, seen = [], set()
+                for member, ext, size in section['parts']:
+                    sha = digests[member]
+                    if sha not in seen:
+                        seen.add(sha)
+                        images.append((sha, ext, member))
+                        references += 1
+                        skipped_bytes += size
+                names = _slot_names(section['prefix'], images)
+                for (sha, _, member), name in zip(images, names):
+                    if sha not in known and (sha not in owner or section['span'] < owner[sha][0]):
+                        owner[sha] = (section['span'], name, member)
+                per_section.append((section['key'], images))
+
+            # Owned names that clash with a referenced file of other content get the hash appended
+            taken = set(known.values())
+            files = dict(known)
+            jobs = []
+            for sha, (_, name, member) in owner.items():
+                if name in taken:
+                    stem, ext = name.rsplit('.', 1)
+                    name = f"{stem}-{sha[:8]}.{ext}"
+                taken.add(name)
+                files[sha] = name
+                jobs.append((member, name))
+            written = list(pool.map(write, jobs))
+    finally:
+        handles.close()
+
+    section_files = {key: [files[sha] for sha, _, _ in images] for key, images in per_section}
+    image_map = {files[sha]: sha for _, images in per_section for sha, _, _ in images}
+    sizes = {m: size for s in sections for m, _, size in s['parts']}
+    written_source = sum(sizes[member] for member, _ in jobs)
+    stats = {
+        'references': references,
+        'written': [(name, n) for (_, name), n in zip(jobs, written)],
+        'bytes_written': sum(written),
+        'bytes_skipped': skipped_bytes - written_source,
+    }
+    return section_files, image_map, stats
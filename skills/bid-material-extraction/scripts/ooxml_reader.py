@@ -0,0 +1,268 @@
+"""
+Streaming reader for .docx body content (zipfile + lxml iterparse).
+
+``Document(docx_path)`` reads every part of the package into memory (embedded
+scans included), builds the full lxml tree of document.xml and resolves
+``para.style`` through the styles part on every access. For 100+ MB bids
+that costs seconds and a lot of RAM. DocxReader instead:
+
+  - opens the zip and reads only the relationships, styles.xml and
+    document.xml (streamed); image parts are read on demand
+  - resolves every paragraph style once from styles.xml: name (python-docx
+    UI name, e.g. "Heading 1"), type and outline level (inherited through
+    basedOn)
+  - walks the body with iterparse and frees each top-level element once
+    it has been yielded, so memory stays flat
+
+    with DocxReader('响应文件.docx') as reader:
+        for kind, info, elem in reader.iter_body():
+            ...  # kind: 'p' | 'tbl' | 'other'
+
+        paragraphs = reader.paragraphs()   # text + style of every body paragraph
+
+Paragraph indices count top-level ``w:p`` elements, like ``doc.paragraphs``;
+element indices count all body children, like ``list(doc.element.body)``.
+
+Usage:
+    python ooxml_reader.py <docx_path>      # print paragraphs with style / outline level
+"""
+import argparse
+import posixpath
+import zipfile
+
+from lxml import etree
+
+from table_model import paragraph_text
+
+W_NS = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+R_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+PKG_REL_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+
+RT_OFFICE_DOCUMENT = R_NS + '/officeDocument'
+RT_STYLES = R_NS + '/styles'
+
+
+def _w(tag):
+    return f'{{{W_NS}}}{tag}'
+
+
+_BODY = _w('body')
+_P = _w('p')
+_TBL = _w('tbl')
+_PPR = _w('pPr')
+_PSTYLE = _w('pStyle')
+_OUTLINE_LVL = _w('outlineLvl')
+_STYLE = _w('style')
+_NAME = _w('name')
+_BASED_ON = _w('basedOn')
+_VAL = _w('val')
+_TYPE = _w('type')
+_DEFAULT = _w('default')
+_STYLE_ID = _w('styleId')
+_REL = f'{{{PKG_REL_NS}}}Relationship'
+
+W_T = _w('t')
+A_BLIP = '{http://schemas.openxmlformats.org/drawingml/2006/main}blip'
+R_EMBED = f'{{{R_NS}}}embed'
+
+# Internal styles.xml names that python-docx reports under a UI name
+_UI_NAMES = {'caption': 'Caption', 'footer': 'Footer', 'header': 'Header',
+             **{f'heading {n}': f'Heading {n}' for n in range(1, 10)}}
+
+
+def _rels_name(partname):
+    folder, name = posixpath.split(partname)
+    return posixpath.join(folder, '_rels', name + '.rels')
+
+
+def _read_rels(zf, partname):
+    """rId → (zip member name or URL, is_external, type) for the relationships of partname."""
+    try:
+        root = etree.fromstring(zf.read(_rels_name(partname)))
+    except KeyError:
+        return {}
+    folder = posixpath.dirname(partname)
+    rels = {}
+    for rel in root.iter(_REL):
+        target = rel.get('Target', '')
+        external = rel.get('TargetMode') == 'External'
+        if not external:
+            target = target.lstrip('/') if target.startswith('/') else posixpath.normpath(
+                posixpath.join(folder, target))
+        rels[rel.get('Id')] = (target, external, rel.get('Type'))
+    return rels
+
+
+def _outline_val(ppr):
+    if ppr is None:
+        return None
+    lvl = ppr.find(_OUTLINE_LVL)
+    if lvl is None:
+        return None
+    try:
+        value = int(lvl.get(_VAL))
+    except (TypeError, ValueError):
+        return None
+    return value if 0 <= value <= 8 else None  # 9 = body text
+
+
+def _on(value):
+    return value in ('1', 'true', 'on')
+
+
+def load_styles(xml):
+    """
+    Parse styles.xml once.
+
+    Returns ({style_id: {"name", "type", "outline_level"}}, default paragraph
+    style id or None). outline_level is 0-based (0 = level 1 heading), taken
+    from the style or the nearest basedOn ancestor that sets it.
+    """
+    styles, based_on, own_level = {}, {}, {}
+    default_id = None
+    for s in etree.fromstring(xml).iter(_STYLE):
+        sid = s.get(_STYLE_ID)
+        if sid is None or sid in styles:  # python-docx returns the first match
+            continue
+        name = s.find(_NAME)
+        name = name.get(_VAL) if name is not None else None
+        stype = s.get(_TYPE, 'paragraph')
+        styles[sid] = {'name': _UI_NAMES.get(name, name), 'type': stype, 'outline_level': None}
+        parent = s.find(_BASED_ON)
+        based_on[sid] = parent.get(_VAL) if parent is not None else None
+        own_level[sid] = _outline_val(s.find(_PPR))
+        if stype == 'paragraph' and _on(s.get(_DEFAULT)):
+            default_id = sid  # the last default wins
+
+    for sid, style in styles.items():
+        seen, cur = set(), sid
+        while cur in styles and cur not in seen:
+            seen.add(cur)
+            if own_level[cur] is not None:
+                style['outline_level'] = own_level[cur]
+                break
+            cur = based_on[cur]
+    return styles, default_id
+
+
+class DocxReader:
+    """Read-only streaming access to a .docx body, its styles and image parts."""
+
+    def __init__(self, docx_path):
+        self.path = docx_path
+        self.zip = zipfile.ZipFile(docx_path)
+        package_rels = _read_rels(self.zip, '')
+        main = [t for t, ext, rt in package_rels.values() if rt == RT_OFFICE_DOCUMENT and not ext]
+        self.main_part = main[0] if main else 'word/document.xml'
+        self.rels = _read_rels(self.zip, self.main_part)
+
+        self.styles, self.default_style = {}, None
+        styles_part = [t for t, ext, rt in self.rels.values() if rt == RT_STYLES and not ext]
+        if styles_part:
+            try:
+                self.styles, self.default_style = load_styles(self.zip.read(styles_part[0]))
+            except KeyError:
+                pass
+
+    def close(self):
+        self.zip.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ── Styles ──
+
+    def paragraph_style(self, p):
+        """(style_id, style name, outline level) in effect for a w:p element."""
+        ppr = p.find(_PPR)
+        sid = None
+        if ppr is not None:
+            pstyle = ppr.find(_PSTYLE)
+            if pstyle is not None:
+                sid = pstyle.get(_VAL)
+        style = self.styles.get(sid) if sid else None
+        if style is None or style['type'] != 'paragraph':
+            sid = self.default_style
+            style = self.styles.get(sid)
+        level = _outline_val(ppr)
+        if level is None and style is not None:
+            level = style['outline_level']
+        return sid, (style['name'] if style else None), level
+
+    # ── Body ──
+
+    def iter_body(self):
+        """
+        Yield (kind, info, elem) for every body child in document order.
+
+        kind is 'p', 'tbl' or 'other'. info always has "elem_index"; paragraphs
+        add "index", "text" (python-docx Paragraph.text), "style_id", "style"
+        and "outline_level"; tables add "index". elem is the lxml element and
+        is only valid until the next item: it is cleared afterwards.
+        """
+        pi = ti = ei = 0
+        depth = 0
+        with self.zip.open(self.main_part) as f:
+            for event, elem in etree.iterparse(f, events=('start', 'end'), huge_tree=True):
+                if event == 'start':
+                    depth += 1
+                    continue
+                depth -= 1
+                if depth != 2 or elem.getparent() is None or elem.getparent().tag != _BODY:
+                    continue
+                if elem.tag == _P:
+                    sid, name, level = self.paragraph_style(elem)
+                    info = {'elem_index': ei, 'index': pi, 'text': paragraph_text(elem),
+                            'style_id': sid, 'style': name, 'outline_level': level}
+                    pi += 1
+                    yield 'p', info, elem
+                elif elem.tag == _TBL:
+                    yield 'tbl', {'elem_index': ei, 'index': ti}, elem
+                    ti += 1
+                else:
+                    yield 'other', {'elem_index': ei}, elem
+                ei += 1
+                # Free the finished element and everything before it
+                elem.clear()
+                parent = elem.getparent()
+                while elem.getprevious() is not None:
+                    del parent[0]
+
+    def paragraphs(self):
+        """Info dicts of all body paragraphs (see iter_body)."""
+        return [info for kind, info, _ in self.iter_body() if kind == 'p']
+
+    # ── Parts ──
+
+    def image_part(self, rid):
+        """(zip member name, extension, uncompressed size) of an image relationship, or None."""
+        rel = self.rels.get(rid)
+        if rel is None or rel[1]:
+            return None
+        target = rel[0]
+        try:
+            size = self.zip.getinfo(target).file_size
+        except KeyError:
+            return None
+        return target, target.rsplit('.', 1)[-1].lower(), size
+
+    def image(self, rid):
+        """(blob, extension) of the part an image relationship points to, or None."""
+        part = self.image_part(rid)
+        if part is None:
+            return None
+        return self.zip.read(part[0]), part[1]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('docx_path')
+    args = parser.parse_args()
+    with DocxReader(args.docx_path) as reader:
+        for p in reader.paragraphs():
+            if p['text'].strip():
+                level = '' if p['outline_level'] is None else f"L{p['outline_level'] + 1}"
+                print(f"{p['index']:6d} {level:>3} {p['style'] or '':<14} {p['text'][:60]}")
@@ -0,0 +1,172 @@
+"""
+One-pass table model shared by the extract_text.py extractors.
+
+python-docx builds a _Cell proxy for every layout-grid cell on each
+``row.cells`` access and resolves every vertically merged cell with an XPath
+query; each extractor then walked ``doc.tables`` again on its own. This module
+walks the document body once with lxml and materializes a compact model that
+all extractors consume:
+
+    {
+      "paragraphs": ["第一章 商务部分", ...],   # stripped, non-empty body paragraphs
+      "tables": [
+        {
+          "rows": [["供应商名称", "某某公司"], ...],  # deduplicated, stripped cell text
+          "merges": [[(0, 1, 0), (1, 3, 0)], ...],  # per cell: (grid_col, grid_span, origin_row)
+          "context": ["...", ...],                 # last 5 paragraphs before the table
+        },
+        ...
+      ],
+    }
+
+Row semantics match python-docx ``row.cells`` deduplicated on the underlying
+``w:tc``: a horizontally merged cell (gridSpan) appears once, and a vertically
+merged continuation cell (vMerge) repeats the text of the cell it continues,
+with ``origin_row`` pointing at the row that holds the content. Only top-level
+body tables are included, in the same order as ``doc.tables``.
+
+Usage:
+    python table_model.py <docx_path>      # dump the model as JSON
+"""
+import argparse
+import json
+
+from docx import Document
+from docx.oxml.ns import qn
+
+_P = qn('w:p')
+_R = qn('w:r')
+_T = qn('w:t')
+_TAB = qn('w:tab')
+_PTAB = qn('w:ptab')
+_BR = qn('w:br')
+_CR = qn('w:cr')
+_NO_BREAK_HYPHEN = qn('w:noBreakHyphen')
+_HYPERLINK = qn('w:hyperlink')
+_TBL = qn('w:tbl')
+_TR = qn('w:tr')
+_TR_PR = qn('w:trPr')
+_GRID_BEFORE = qn('w:gridBefore')
+_TC = qn('w:tc')
+_TC_PR = qn('w:tcPr')
+_GRID_SPAN = qn('w:gridSpan')
+_V_MERGE = qn('w:vMerge')
+_VAL = qn('w:val')
+_TYPE = qn('w:type')
+
+CONTEXT_LINES = 5
+
+
+# ── Text ──────────────────────────────────────────────────────────────────
+
+def _run_text(r):
+    parts = []
+    for e in r:
+        tag = e.tag
+        if tag == _T:
+            if e.text:
+                parts.append(e.text)
+        elif tag == _TAB or tag == _PTAB:
+            parts.append('\t')
+        elif tag == _CR:
+            parts.append('\n')
+        elif tag == _BR:
+            # Page and column breaks have no text equivalent
+            if e.get(_TYPE, 'textWrapping') == 'textWrapping':
+                parts.append('\n')
+        elif tag == _NO_BREAK_HYPHEN:
+            parts.append('-')
+    return ''.join(parts)
+
+
+def paragraph_text(p):
+    """Text of a ``w:p`` element, identical to python-docx ``Paragraph.text``."""
+    parts = []
+    for child in p:
+        if child.tag == _R:
+            parts.append(_run_text(child))
+        elif child.tag == _HYPERLINK:
+            for r in child:
+                if r.tag == _R:
+                    parts.append(_run_text(r))
+    return ''.join(parts)
+
+
+def _cell_text(tc):
+    return '\n'.join(paragraph_text(p) for p in tc if p.tag == _P).strip()
+
+
+# ── Tables ────────────────────────────────────────────────────────────────
+
+def _int_val(parent, tag, default):
+    if parent is None:
+        return default
+    e = parent.find(tag)
+    if e is None:
+        return default
+    try:
+        return int(e.get(_VAL))
+    except (TypeError, ValueError):
+        return default
+
+
+def read_table(tbl, context=None):
+    """Materialize one ``w:tbl`` element into a table model dict."""
+    rows, merges = [], []
+    above = {}  # grid offset → (text, origin_row) of each cell in the previous row
+    ri = 0
+    for tr in tbl:
+        if tr.tag != _TR:
+            continue
+        offset = _int_val(tr.find(_TR_PR), _GRID_BEFORE, 0)
+        current = {}
+        cells, spans = [], []
+        for tc in tr:
+            if tc.tag != _TC:
+                continue
+            tc_pr = tc.find(_TC_PR)
+            span = _int_val(tc_pr, _GRID_SPAN, 1)
+            v_merge = tc_pr.find(_V_MERGE) if tc_pr is not None else None
+            # <w:vMerge/> without w:val continues the cell above. python-docx
+            # raises when there is no aligned cell above; treat it as a cell.
+            if v_merge is not None and v_merge.get(_VAL, 'continue') == 'continue' and offset in above:
+                text, origin = above[offset]
+            else:
+                text, origin = _cell_text(tc), ri
+            current[offset] = (text, origin)
+            cells.append(text)
+            spans.append((offset, span, origin))
+            offset += span
+        rows.append(cells)
+        merges.append(spans)
+        above = current
+        ri += 1
+    return {'rows': rows, 'merges': merges, 'context': list(context or [])}
+
+
+def build_model(doc):
+    """Walk the document body once; return ``{"paragraphs", "tables"}``."""
+    paragraphs, tables, recent = [], [], []
+    for child in doc.element.body:
+        if child.tag == _P:
+            text = paragraph_text(child).strip()
+            if text:
+                paragraphs.append(text)
+            # Table context keeps the plain w:t text, runs nested in
+            # hyperlinks / revisions / fields included
+            t = ''.join(r.text for r in child.iter(_T) if r.text).strip()
+            if t:
+                recent.append(t)
+                if len(recent) > CONTEXT_LINES:
+                    recent = recent[-CONTEXT_LINES:]
+        elif child.tag == _TBL:
+            tables.append(read_table(child, recent))
+    return {'paragraphs': paragraphs, 'tables': tables}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('docx_path')
+    args = parser.parse_args()
+    model = build_model(Document(args.docx_path))
+    print(json.dumps(model, ensure_ascii=False, indent=2))
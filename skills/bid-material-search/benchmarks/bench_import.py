@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+启动耗时基准（python -X importtime）
+
+在全新的解释器子进程里分别导入本包和各入口模块，解析 -X importtime 的输出，
+报告每个目标的累计导入耗时（取多次运行的中位数）以及它连带导入的重依赖
+（httpx / PIL / NumPy / python-dotenv）。test_skill.py 的启动耗时测试复用
+measure() 与 heavy_modules()。
+
+Usage:
+    python benchmarks/bench_import.py [--repeat 5] [--show-top 10]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+SKILL_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SCRIPTS_DIR = os.path.join(SKILL_DIR, "scripts")
+
+# 导入目标 → 要执行的语句；"scripts" 以包的形式导入（__init__.py 的按需加载），
+# 其余为 CLI / Agent 直接导入的扁平模块
+TARGETS = {
+    "scripts": "import scripts",
+    "config": "import config",
+    "search": "import search",
+    "extract": "import extract",
+    "replace": "import replace",
+    "watermark": "import watermark",
+}
+
+HEAVY = ("httpx", "PIL", "numpy", "dotenv")
+
+
+def _run(statement: str, *flags: str) -> subprocess.CompletedProcess:
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([SKILL_DIR, SCRIPTS_DIR]))
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    return subprocess.run(
+        [sys.executable, *flags, "-c", statement],
+        cwd=SKILL_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+
+
+def parse_importtime(stderr: str) -> dict:
+    """解析 -X importtime 输出为 {模块名: 累计耗时（微秒）}"""
+    result = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        result[name.strip()] = int(cumulative)
+    return result
+
+
+def measure(statement: str, module: str, repeat: int = 5) -> float:
+    """在新进程中执行 statement，返回 module 累计导入耗时的中位数（毫秒）"""
+    _run(statement)  # 预热：生成 .pyc，避免首轮把编译时间算进去
+    samples = [
+        parse_importtime(_run(statement, "-X", "importtime").stderr).get(module, 0) / 1000
+        for _ in range(repeat)
+    ]
+    return statistics.median(samples)
+
+
+def heavy_modules(statement: str) -> list:
+    """执行 statement 后已被导入的重依赖"""
+    probe = f"{statement}\nimport sys, json\nprint(json.dumps(sorted(sys.modules)))"
+    loaded = set(json.loads(_run(probe).stdout.splitlines()[-1]))
+    return [m for m in HEAVY if m in loaded]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark import time of the skill modules")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--show-top", type=int, default=0,
+                        help="额外列出 replace 导入链中累计耗时最高的 N 个模块")
+    args = parser.parse_args()
+
+    print(f"{'target':<10} {'median ms':>10}  heavy deps loaded")
+    for module, statement in TARGETS.items():
+        ms = measure(statement, module, args.repeat)
+        print(f"{module:<10} {ms:10.1f}  {', '.join(heavy_modules(statement)) or '-'}")
+
+    if args.show_top:
+        times = parse_importtime(_run(TARGETS["replace"], "-X", "importtime").stderr)
+        print(f"\nTop {args.show_top} cumulative imports under `import replace`:")
+        for name, us in sorted(times.items(), key=lambda kv: -kv[1])[:args.show_top]:
+            print(f"  {us / 1000:8.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+查询词归一化微基准
+
+对比旧版「每次调用重建词表 + 循环 str.replace + 字符串模式 re.search」与
+QueryNormalizer（构造时编译交替正则、一次扫描完成替换）在标注集全部占位符上的耗时，
+并逐条核对两者输出一致。
+
+Usage:
+    python benchmarks/bench_normalize.py [--repeat 2000]
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+from normalizer import QueryNormalizer  # noqa: E402
+
+DATA = os.path.join(os.path.dirname(__file__), "data", "placeholder_pairs.json")
+
+
+# ---- 旧版实现（原样保留，用于对照） -------------------------------------------
+
+def legacy_remove_common_suffixes(text):
+    descriptive_phrases = [
+        '正反面', '扫描件', '复印件', '副本', '原件', '电子件',
+        '（如需要）', '(如需要)', '近三个月内', '有效期内',
+    ]
+    result = text
+    for phrase in descriptive_phrases:
+        result = result.replace(phrase, '')
+    suffixes = ['认证证书', '证书', '认证', '证明', '文件', '材料', '附件']
+    for suffix in suffixes:
+        if result.endswith(suffix):
+            result = result[:-len(suffix)]
+    return result.strip()
+
+
+def legacy_extract_keywords(query):
+    keywords = []
+    iso_match = re.search(r'ISO[/\s]?(?:IEC)?[\s]?(\d+)', query, re.IGNORECASE)
+    if iso_match:
+        keywords.append(iso_match.group(1))
+        keywords.append(f'ISO {iso_match.group(1)}')
+    cmmi_match = re.search(r'CMMI[\s]?(\d+)', query, re.IGNORECASE)
+    if cmmi_match:
+        keywords.append(f'CMMI{cmmi_match.group(1)}')
+        keywords.append(f'CMMI {cmmi_match.group(1)}')
+    clean = re.sub(r'[（）()【】\[\]0-9一二三四五六七八九十]+', '', query)
+    if clean.strip():
+        keywords.append(clean.strip())
+    return keywords
+
+
+def legacy_expand_abbreviation(query):
+    abbreviations = {
+        '财审': '财务审计报告', '营执': '营业执照', '等保': '信息系统安全等级保护',
+        '软著': '软件著作权', '社保': '社会保险', '高企': '高新技术企业',
+    }
+    for abbr, full in abbreviations.items():
+        if abbr in query:
+            query = query.replace(abbr, full)
+    return query
+
+
+def legacy_apply_synonyms(query):
+    result = [query]
+    synonyms = {
+        '委托代理人': ['委托人', '代理人'],
+        '法定代表人': ['法人', '法人代表', '法定代表'],
+        '项目经理': ['项目负责人', '经理'],
+        '团队成员': ['成员', '人员'],
+    }
+    for key, syn_list in synonyms.items():
+        if key in query:
+            for syn in syn_list:
+                result.append(query.replace(key, syn))
+    return result
+
+
+def legacy_normalize(query):
+    expanded = legacy_expand_abbreviation(query.strip())
+    normalized = legacy_remove_common_suffixes(expanded)
+    return (normalized or expanded).lower()
+
+
+def legacy_pipeline(query):
+    """_smart_search_uncached 生成回退查询词时的完整调用序列"""
+    expanded = legacy_expand_abbreviation(query)
+    return (legacy_normalize(query), legacy_apply_synonyms(expanded),
+            legacy_remove_common_suffixes(expanded), legacy_extract_keywords(expanded))
+
+
+def current_pipeline(normalizer):
+    def run(query):
+        expanded = normalizer.expand_abbreviation(query)
+        return (normalizer.normalize(query), normalizer.apply_synonyms(expanded),
+                normalizer.remove_common_suffixes(expanded), normalizer.extract_keywords(expanded))
+    return run
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark query normalisation")
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    with open(DATA, "r", encoding="utf-8") as f:
+        queries = [p["query"] for p in json.load(f)["pairs"]]
+    # 补充覆盖同义词、ISO/CMMI 关键词与描述性短语的查询
+    queries += ["法定代表人授权委托书扫描件", "项目经理资格证书（如需要）", "团队成员社保证明",
+                "ISO/IEC 20000认证证书复印件", "CMMI 5级证书", "委托代理人身份证正反面"]
+
+    normalizer = QueryNormalizer()
+    current = current_pipeline(normalizer)
+    mismatches = [q for q in queries if legacy_pipeline(q) != current(q)]
+    print(f"{len(queries)} queries, outputs identical: {not mismatches}")
+    for q in mismatches:
+        print(f"  mismatch {q!r}: {legacy_pipeline(q)} != {current(q)}")
+
+    n = len(queries) * args.repeat
+    for name, fn in (("legacy", legacy_pipeline), ("compiled", current)):
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            for q in queries:
+                fn(q)
+        elapsed = time.perf_counter() - start
+        print(f"  {name:<9} {elapsed * 1e6 / n:6.2f} us/query")
+
+    batch = queries * 20
+    start = time.perf_counter()
+    for _ in range(args.repeat // 20 or 1):
+        [legacy_normalize(q) for q in batch]
+    loop = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(args.repeat // 20 or 1):
+        normalizer.normalize_many(batch)
+    many = time.perf_counter() - start
+    print(f"  normalize_many on {len(batch)} placeholders (20x repeats): "
+          f"{loop * 1000 / (args.repeat // 20 or 1):.2f} ms -> {many * 1000 / (args.repeat // 20 or 1):.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+占位符匹配基准测试
+
+用标注集（benchmarks/data/placeholder_pairs.json：材料目录 + 历史占位符 → 正确材料，
+expected 为空表示目录中没有该材料、应当不返回结果）对比两种匹配方式的召回率、
+歧义率（返回多个候选）、拒识率与单次查询延迟：
+
+- fallback: smart_search 的回退链（展开简称 → 同义词 → 去后缀 → 关键词），在本地镜像上做子串检索
+- ranking:  RankingIndex 字符 n-gram BM25 一次打分取 top-k
+
+--catalogue-size 会用随机生成的干扰材料把目录扩充到指定规模，用于观察大目录下的延迟。
+全程离线，不依赖 MaterialHub。
+
+Usage:
+    python benchmarks/bench_ranking.py [--catalogue-size 5000] [--repeat 5]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+from mirror import MaterialMirror  # noqa: E402
+from ranking import RankingIndex  # noqa: E402
+import replace  # noqa: E402
+
+DATA = os.path.join(os.path.dirname(__file__), "data", "placeholder_pairs.json")
+
+FILLER = ["智慧", "校园", "平台", "运维", "服务", "数据", "治理", "资产", "管理", "系统",
+          "采购", "合同", "报告", "方案", "说明", "附件", "医院", "政务", "云", "安全"]
+
+
+def distractors(start_id: int, count: int, seed: int = 0) -> list:
+    """生成与标注材料不重名的干扰材料"""
+    rng = random.Random(seed)
+    return [
+        {
+            "id": start_id + i,
+            "title": "".join(rng.sample(FILLER, 4)) + f"-{i}",
+            "doc_type": {"name": rng.choice(["业绩合同", "技术方案", "其他"])},
+            "folder": {"name": "归档"},
+            "entity_names": [],
+        }
+        for i in range(count)
+    ]
+
+
+def evaluate(name: str, match, pairs: list, repeat: int) -> dict:
+    """expected 非空的样本计召回，expected 为空的样本（目录中没有的材料）计拒识"""
+    top1 = top5 = ambiguous = rejected = 0
+    latencies = []
+    for pair in pairs:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            results = match(pair["query"])
+            latencies.append(time.perf_counter() - start)
+        ids = [r["id"] for r in results]
+        if not pair["expected"]:
+            rejected += not ids
+            continue
+        top1 += bool(ids) and ids[0] in pair["expected"]
+        top5 += any(i in pair["expected"] for i in ids[:5])
+        ambiguous += len(ids) > 1
+    latencies.sort()
+    positives = sum(1 for p in pairs if p["expected"])
+    negatives = len(pairs) - positives
+    return {
+        "method": name,
+        "recall@1": top1 / positives,
+        "recall@5": top5 / positives,
+        "ambiguous": ambiguous / positives,
+        "rejection": rejected / negatives if negatives else 1.0,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95)] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark placeholder-to-material matching")
+    parser.add_argument("--catalogue-size", type=int, default=0,
+                        help="用干扰材料把目录扩充到该规模（默认只用标注目录）")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--show-misses", action="store_true")
+    args = parser.parse_args()
+
+    with open(DATA, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    catalogue, pairs = data["catalogue"], data["pairs"]
+    extra = max(0, args.catalogue_size - len(catalogue))
+    catalogue = catalogue + distractors(max(d["id"] for d in catalogue) + 1, extra)
+
+    with tempfile.TemporaryDirectory() as tmp, MaterialMirror(os.path.join(tmp, "mirror.db")) as mirror:
+        for doc in catalogue:
+            mirror._upsert_document(doc)
+        mirror.conn.commit()
+
+        start = time.perf_counter()
+        index = RankingIndex(catalogue)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        def fallback(query):
+            with contextlib.redirect_stdout(io.StringIO()):
+                return asyncio.run(replace._smart_search_uncached(query, 5, mirror))
+
+        def ranking(query):
+            return replace.rank_query(index, query, limit=5)
+
+        print(f"Catalogue {len(catalogue)} materials, {len(pairs)} labelled placeholders, "
+              f"index built in {build_ms:.1f} ms ({len(index.vocab)} n-grams)")
+        for method, match in (("fallback", fallback), ("ranking", ranking)):
+            r = evaluate(method, match, pairs, args.repeat)
+            print(f"  {r['method']:<9} recall@1 {r['recall@1']:6.1%}  recall@5 {r['recall@5']:6.1%}  "
+                  f"ambiguous {r['ambiguous']:6.1%}  rejection {r['rejection']:6.1%}  "
+                  f"p50 {r['p50_ms']:7.2f} ms  p95 {r['p95_ms']:7.2f} ms")
+            if args.show_misses:
+                for pair in pairs:
+                    ids = [x["id"] for x in match(pair["query"])]
+                    if (ids[:1] or [None])[0] not in (pair["expected"] or [None]):
+                        print(f"      miss {pair['query']!r}: got {ids[:5]}, expected {pair['expected']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+批量占位符替换负载基准
+
+启动离线桩服务（stub_server.py），用标注集中的占位符生成一批响应文件
+（每个文件随机抽取若干占位符，常见材料在文件间重复出现，与真实标书一致），
+连续跑 --runs 轮 replace_all_placeholders：第 1 轮是冷启动（空图片存储、无搜索缓存），
+之后各轮还原占位符后在同一目录重跑（复用图片存储与持久化搜索缓存）。
+
+每轮报告：墙钟耗时、替换成功/失败数、单个占位符耗时 p50/p95、
+桩服务收到的请求数（按接口）、注入的错误数与响应字节数。
+
+Usage:
+    python benchmarks/bench_replace.py [--files 8] [--per-file 12] [--catalogue-size 500]
+        [--latency-ms 20] [--jitter-ms 5] [--error-rate 0] [--runs 2]
+        [--mode fallback|mirror|ranking]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+import config  # noqa: E402
+import replace  # noqa: E402
+from mirror import sync_mirror_sync  # noqa: E402
+from runner import MaterialHubSession  # noqa: E402
+from stub_server import StubCatalogue, StubMaterialHub  # noqa: E402
+
+DATA = os.path.join(os.path.dirname(__file__), "data", "placeholder_pairs.json")
+
+
+def write_workload(directory: str, files: int, per_file: int, seed: int = 0) -> int:
+    """生成响应文件，返回占位符总数
+
+    按标注集抽样，高频材料（营业执照、ISO 证书等）加权，保证文件间有重复引用。
+    """
+    with open(DATA, "r", encoding="utf-8") as f:
+        pairs = json.load(f)["pairs"]
+    rng = random.Random(seed)
+    weights = [3 if p["expected"] and p["expected"][0] <= 8 else 1 for p in pairs]
+    os.makedirs(directory, exist_ok=True)
+    for i in range(files):
+        chosen = rng.choices(pairs, weights=weights, k=per_file)
+        body = "\n\n".join(f"## {n + 1}. 材料\n\n{p['placeholder']}" for n, p in enumerate(chosen))
+        with open(os.path.join(directory, f"{i + 1:02d}_章节.md"), "w", encoding="utf-8") as f:
+            f.write(f"# 第 {i + 1} 章\n\n{body}\n")
+    return files * per_file
+
+
+def percentile(values: list, q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))] if values else 0.0
+
+
+def run_once(directory: str, mode: str, latencies: list) -> dict:
+    """跑一轮 replace_all_placeholders，latencies 收集每个占位符的耗时"""
+    original = replace.replace_placeholder
+
+    async def timed(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await original(*args, **kwargs)
+        finally:
+            latencies.append(time.perf_counter() - start)
+
+    replace.replace_placeholder = timed
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            return replace.replace_all_placeholders_sync(
+                directory,
+                project_name="某某单位智慧校园平台采购项目",
+                use_mirror=mode == "mirror",
+                use_ranking=mode == "ranking",
+            )
+    finally:
+        replace.replace_placeholder = original
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load benchmark for replace_all_placeholders")
+    parser.add_argument("--files", type=int, default=8)
+    parser.add_argument("--per-file", type=int, default=12)
+    parser.add_argument("--catalogue-size", type=int, default=500)
+    parser.add_argument("--image-size", default="1240x1754")
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--jitter-ms", type=float, default=5.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--runs", type=int, default=2)
+    parser.add_argument("--mode", choices=["fallback", "mirror", "ranking"], default="fallback")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    width, height = (int(v) for v in args.image_size.lower().split("x"))
+    catalogue = StubCatalogue(args.catalogue_size, (width, height), args.seed)
+
+    with tempfile.TemporaryDirectory() as tmp, \
+            StubMaterialHub(catalogue, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                            error_rate=args.error_rate, seed=args.seed) as hub:
+        config.API_BASE = hub.url
+        config.API_TOKEN = ""
+        config.MATERIAL_CACHE_DIR = os.path.join(tmp, "cache")
+        template = os.path.join(tmp, "template")
+        workdir = os.path.join(tmp, "响应文件")
+        total = write_workload(template, args.files, args.per_file, args.seed)
+
+        print(f"Stub {hub.url}: {len(catalogue.documents)} documents, latency {args.latency_ms}±{args.jitter_ms} ms, "
+              f"error rate {args.error_rate:.1%}; workload {args.files} files x {args.per_file} = {total} placeholders, "
+              f"mode {args.mode}")
+
+        with MaterialHubSession():
+            if args.mode != "fallback":
+                start = time.perf_counter()
+                sync_mirror_sync(full=True)
+                sync = hub.stats()
+                print(f"  mirror sync  {time.perf_counter() - start:6.2f} s  "
+                      f"{sync['requests']} requests  {sync['bytes'] / 1024:.0f} KB")
+
+            for run in range(1, args.runs + 1):
+                # 还原占位符，保留搜索缓存与图片存储（都在 MATERIALHUB_CACHE_DIR 下）
+                os.makedirs(workdir, exist_ok=True)
+                for name in os.listdir(template):
+                    shutil.copy(os.path.join(template, name), os.path.join(workdir, name))
+                hub.reset_stats()
+                latencies: list = []
+                start = time.perf_counter()
+                result = run_once(workdir, args.mode, latencies)
+                wall = time.perf_counter() - start
+                stats = hub.stats()
+
+                label = "cold" if run == 1 else "warm"
+                print(f"\n  run {run} ({label}): {wall:6.2f} s  replaced {result['replaced_count']}  "
+                      f"failed {result['failed_count']}  "
+                      f"per placeholder p50 {percentile(latencies, 0.5) * 1000:7.1f} ms  "
+                      f"p95 {percentile(latencies, 0.95) * 1000:7.1f} ms")
+                print(f"    requests {stats['requests']}  errors {stats['errors']}  "
+                      f"bytes {stats['bytes'] / 1024:.0f} KB  image store {result['image_store']}")
+                for endpoint, s in sorted(stats["endpoints"].items(), key=lambda kv: -kv[1]["requests"]):
+                    print(f"      {endpoint:<10} {s['requests']:5d} req  {s['errors']:3d} err  "
+                          f"{s['bytes'] / 1024:9.0f} KB")
+
+
+if __name__ == "__main__":
+    main()
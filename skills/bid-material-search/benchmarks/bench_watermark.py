@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+平铺水印基准测试
+
+对比旧版「全尺寸图层上逐个粘贴印章」的嵌套循环与当前「单图块 + 条带合成」的平铺引擎，
+在大尺寸扫描件（默认 6000×8000）上的耗时与峰值内存。每种实现在独立子进程
+中运行，峰值内存取子进程的 ru_maxrss。
+
+Usage:
+    python benchmarks/bench_watermark.py [--width 6000] [--height 8000] [--repeat 3]
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+from PIL import Image  # noqa: E402
+
+import watermark  # noqa: E402
+
+TEXT = "清华房屋土地数智化平台 2026-BID-001"
+
+
+def legacy_tile(img: Image.Image, font_size: int, rotation: int) -> Image.Image:
+    """旧版平铺：全尺寸图层上逐个粘贴印章，再整体合成出一张新图"""
+    stamp, total_width, max_height, _ = watermark._text_stamp(
+        TEXT, font_size, (128, 128, 128), 128, rotation
+    )
+    layer = Image.new('RGBA', img.size, (255, 255, 255, 0))
+    text_w, text_h = stamp.size
+    spacing_x = int(total_width * 1.5)
+    spacing_y = int(max_height * 2)
+    for y in range(-text_h, img.size[1] + text_h, spacing_y):
+        for x in range(-text_w, img.size[0] + text_w, spacing_x):
+            layer.paste(stamp, (x, y), stamp)
+    return Image.alpha_composite(img, layer)
+
+
+def current_tile(img: Image.Image, font_size: int, rotation: int) -> Image.Image:
+    """当前平铺引擎：单图块 + 条带复制 + 按条带原地合成"""
+    stamp, total_width, max_height, _ = watermark._text_stamp(
+        TEXT, font_size, (128, 128, 128), 128, rotation
+    )
+    watermark._composite_tiled(img, stamp, int(total_width * 1.5), int(max_height * 2))
+    return img
+
+
+ENGINES = {"legacy": legacy_tile, "current": current_tile}
+
+
+def run_engine(name: str, width: int, height: int, repeat: int, font_size: int, rotation: int) -> dict:
+    timings = []
+    for _ in range(repeat):
+        img = Image.new('RGBA', (width, height), (250, 250, 245, 255))
+        start = time.perf_counter()
+        out = ENGINES[name](img, font_size, rotation)
+        timings.append(time.perf_counter() - start)
+        # 释放本轮图像，避免下一轮分配时叠加到峰值里
+        del img, out
+    # Linux 下 ru_maxrss 单位为 KB
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {"engine": name, "best_s": min(timings), "peak_rss_mb": peak_kb / 1024}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark tiled watermark engines")
+    parser.add_argument("--width", type=int, default=6000)
+    parser.add_argument("--height", type=int, default=8000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--font-size", type=int, default=36)
+    parser.add_argument("--rotation", type=int, default=-45)
+    parser.add_argument("--engine", choices=list(ENGINES), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.engine:
+        result = run_engine(args.engine, args.width, args.height, args.repeat,
+                            args.font_size, args.rotation)
+        print(json.dumps(result))
+        return
+
+    print(f"Tiled watermark on {args.width}x{args.height}, "
+          f"font_size={args.font_size}, rotation={args.rotation}")
+    results = []
+    for name in ENGINES:
+        out = subprocess.run(
+            [sys.executable, __file__, "--engine", name,
+             "--width", str(args.width), "--height", str(args.height),
+             "--repeat", str(args.repeat), "--font-size", str(args.font_size),
+             "--rotation", str(args.rotation)],
+            capture_output=True, text=True, check=True,
+        )
+        results.append(json.loads(out.stdout.strip().splitlines()[-1]))
+
+    for r in results:
+        print(f"  {r['engine']:<8} best {r['best_s'] * 1000:8.1f} ms   peak RSS {r['peak_rss_mb']:7.1f} MB")
+    legacy, current = results
+    print(f"  speedup x{legacy['best_s'] / current['best_s']:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,452 @@
+#!/usr/bin/env python3
+"""
+MaterialHub 离线桩服务
+
+基于标准库 http.server，实现 search / extract / replace / simple_replace / mirror
+用到的全部 MaterialHub 接口，用于在没有真实服务的环境下测试和压测：
+
+- 目录：benchmarks/data/placeholder_pairs.json 的标注材料，按 --catalogue-size
+  用随机干扰材料扩充；每 5 份材料有 1 份是 PDF（附带提取页图片）
+- 图片：按文件 id 生成确定性的合成扫描件（JPEG），支持 ETag / If-None-Match
+- 注入：每个请求的延迟（均值 + 抖动）与 503 错误率，/health 不受影响
+- 统计：按接口累计请求数、错误数与响应字节数
+
+作为库使用（bench_replace.py、test_skill.py）：
+
+    with StubMaterialHub(StubCatalogue(size=500), latency_ms=20) as hub:
+        config.API_BASE = hub.url
+        ...
+        print(hub.stats())
+
+独立运行后把 MATERIALHUB_API_URL 指向它即可：
+
+Usage:
+    python benchmarks/stub_server.py [--port 8201] [--catalogue-size 500]
+        [--latency-ms 20] [--jitter-ms 5] [--error-rate 0.01]
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Tuple
+from urllib.parse import parse_qs, urlparse
+
+DATA = os.path.join(os.path.dirname(__file__), "data", "placeholder_pairs.json")
+
+FILLER = ["智慧", "校园", "平台", "运维", "服务", "数据", "治理", "资产", "管理", "系统",
+          "采购", "合同", "报告", "方案", "说明", "附件", "医院", "政务", "云", "安全"]
+
+# 标注目录中的人员（其余实体按机构处理）
+PERSONS = {"张伟", "李明", "王芳", "周杨"}
+
+UPDATED_AT = "2026-03-01T00:00:00"
+
+
+class StubCatalogue:
+    """桩服务的材料目录、实体与合成图片
+
+    Args:
+        size: 目录规模，超出标注目录的部分用随机干扰材料补足（0 表示只用标注目录）
+        image_size: 合成扫描件的像素尺寸 (宽, 高)
+        seed: 干扰材料与图片内容的随机种子
+    """
+
+    def __init__(self, size: int = 0, image_size: Tuple[int, int] = (1240, 1754), seed: int = 0):
+        with open(DATA, "r", encoding="utf-8") as f:
+            labelled = json.load(f)["catalogue"]
+        self.image_size = image_size
+        self.seed = seed
+
+        rng = random.Random(seed)
+        docs = [dict(d) for d in labelled]
+        next_id = max(d["id"] for d in docs) + 1
+        for i in range(max(0, size - len(docs))):
+            docs.append({
+                "id": next_id + i,
+                "title": "".join(rng.sample(FILLER, 4)) + f"-{i}",
+                "doc_type": {"name": rng.choice(["业绩合同", "技术方案", "其他"])},
+                "folder": {"name": "归档"},
+                "entity_names": [],
+                "status": "active",
+            })
+
+        self.doc_types: Dict[str, dict] = {}
+        self.folders: Dict[str, dict] = {}
+        self.entities: Dict[str, dict] = {}
+        for doc in docs:
+            self._complete(doc)
+        self.documents: Dict[int, dict] = {d["id"]: d for d in docs}
+        self._images: Dict[int, bytes] = {}
+        self._lock = threading.Lock()
+
+    def _complete(self, doc: dict) -> None:
+        """补全文档类型 / 文件夹 id、实体、有效期与附件"""
+        type_name = doc["doc_type"]["name"]
+        if type_name not in self.doc_types:
+            tid = len(self.doc_types) + 1
+            code = "cert" if ("证书" in type_name or "认证" in type_name) else "doc"
+            self.doc_types[type_name] = {"id": tid, "code": f"{code}_{tid}", "name": type_name}
+        doc["doc_type"] = dict(self.doc_types[type_name])
+
+        folder_name = doc["folder"]["name"]
+        if folder_name not in self.folders:
+            self.folders[folder_name] = {
+                "id": len(self.folders) + 1, "name": folder_name, "path": f"/{folder_name}", "children": [],
+            }
+        doc["folder"] = {k: v for k, v in self.folders[folder_name].items() if k != "children"}
+
+        for name in doc.get("entity_names") or []:
+            if name not in self.entities:
+                self.entities[name] = {
+                    "id": len(self.entities) + 1,
+                    "name": name,
+                    "entity_type": "person" if name in PERSONS else "org",
+                    "attributes": {},
+                    "document_ids": [],
+                }
+            self.entities[name]["document_ids"].append(doc["id"])
+
+        doc_id = doc["id"]
+        doc.setdefault("status", "active")
+        doc["updated_at"] = UPDATED_AT
+        doc["expiry_date"] = "2028-12-31"
+        doc["is_expired"] = False
+        if doc_id % 5 == 0:
+            # 扫描为 PDF 的材料：原件是 PDF，服务端另存了逐页提取的图片
+            files = [{"id": doc_id * 10, "filename": f"{doc_id}.pdf", "file_type": "original",
+                      "mime_type": "application/pdf", "url": f"/api/v2/files/{doc_id * 10}/download"}]
+            files += [{"id": doc_id * 10 + p, "filename": f"{doc_id}_p{p}.jpg", "file_type": "extracted_page",
+                       "mime_type": "image/jpeg", "url": f"/api/v2/files/{doc_id * 10 + p}/download"}
+                      for p in (1, 2)]
+        else:
+            files = [{"id": doc_id * 10, "filename": f"{doc_id}.jpg", "file_type": "original",
+                      "mime_type": "image/jpeg", "url": f"/api/v2/files/{doc_id * 10}/download"}]
+        doc["current_revision"] = {"id": doc_id * 100, "revision_number": 1, "files": files}
+
+    def summary(self, doc: dict) -> dict:
+        """列表 / 搜索接口返回的文档摘要（不含附件）"""
+        return {k: v for k, v in doc.items() if k != "current_revision"}
+
+    def image(self, file_id: int) -> bytes:
+        """文件 id 对应的合成扫描件（JPEG，按 id 确定，首次请求时生成）"""
+        with self._lock:
+            if file_id not in self._images:
+                self._images[file_id] = self._render(file_id)
+            return self._images[file_id]
+
+    def _render(self, file_id: int) -> bytes:
+        from PIL import Image, ImageDraw
+
+        w, h = self.image_size
+        rng = random.Random(self.seed * 1_000_003 + file_id)
+        # 低分辨率噪声放大成纸面纹理，再画若干「文字行」，压缩率接近真实扫描件
+        noise = Image.frombytes("L", (w // 8, h // 8), rng.randbytes((w // 8) * (h // 8)))
+        img = noise.resize((w, h), Image.BILINEAR).point(lambda v: 215 + v // 7).convert("RGB")
+        draw = ImageDraw.Draw(img)
+        for y in range(h // 10, h - h // 10, max(1, h // 40)):
+            x0 = w // 10 + rng.randrange(w // 20)
+            draw.rectangle([x0, y, x0 + rng.randrange(w // 3, w * 3 // 4), y + h // 120], fill=(60, 60, 60))
+        buf = io.BytesIO()
+        img.save(buf, "JPEG", quality=85)
+        return buf.getvalue()
+
+
+def _matches(doc: dict, terms: List[str]) -> bool:
+    haystack = " ".join([doc["title"], doc["doc_type"]["name"], *(doc.get("entity_names") or [])]).lower()
+    return all(t in haystack for t in terms)
+
+
+def _page(items: list, query: dict) -> dict:
+    limit = int(query.get("limit", 50))
+    offset = int(query.get("offset", 0))
+    return {"results": items[offset:offset + limit], "total": len(items)}
+
+
+class StubMaterialHub:
+    """在后台线程运行的 MaterialHub 桩服务
+
+    Args:
+        catalogue: 材料目录（默认只含标注目录）
+        host, port: 监听地址，port=0 时随机分配
+        latency_ms: 每个请求注入的平均延迟（毫秒）
+        jitter_ms: 延迟的标准差（毫秒）
+        error_rate: 返回 503 的概率（0~1）
+        seed: 延迟与错误注入的随机种子
+        honour_updated_since: 文档列表是否按 updated_since 过滤；False 模拟不支持该参数的服务端
+    """
+
+    def __init__(
+        self,
+        catalogue: StubCatalogue | None = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        seed: int = 0,
+        honour_updated_since: bool = True,
+    ):
+        self.catalogue = catalogue or StubCatalogue()
+        self.honour_updated_since = honour_updated_since
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.reset_stats()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubMaterialHub":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="materialhub-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "StubMaterialHub":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._stats: Dict[str, Dict[str, int]] = {}
+
+    def stats(self) -> dict:
+        """{"requests", "errors", "bytes", "endpoints": {接口: {"requests", "errors", "bytes"}}}"""
+        with self._lock:
+            endpoints = {k: dict(v) for k, v in self._stats.items()}
+        return {
+            "requests": sum(v["requests"] for v in endpoints.values()),
+            "errors": sum(v["errors"] for v in endpoints.values()),
+            "bytes": sum(v["bytes"] for v in endpoints.values()),
+            "endpoints": endpoints,
+        }
+
+    def _record(self, endpoint: str, status: int, size: int) -> None:
+        with self._lock:
+            s = self._stats.setdefault(endpoint, {"requests": 0, "errors": 0, "bytes": 0})
+            s["requests"] += 1
+            s["errors"] += status >= 500
+            s["bytes"] += size
+
+    def _inject(self) -> Tuple[float, bool]:
+        """本次请求的注入延迟（秒）与是否返回错误"""
+        with self._lock:
+            delay = max(0.0, self._rng.gauss(self.latency_ms, self.jitter_ms)) if self.latency_ms else 0.0
+            fail = self._rng.random() < self.error_rate
+        return delay / 1000, fail
+
+    # ---- 路由 ------------------------------------------------------------------
+
+    def _routes(self):
+        return [
+            ("health", re.compile(r"^/health$"), self._health),
+            ("search", re.compile(r"^/api/v2/search/?$"), self._search),
+            ("documents", re.compile(r"^/api/v2/documents/?$"), self._documents),
+            ("document", re.compile(r"^/api/v2/documents/(\d+)/?$"), self._document),
+            ("download", re.compile(r"^/api/v2/files/(\d+)/download/?$"), self._download),
+            ("entities", re.compile(r"^/api/v2/entities/?$"), self._entities),
+            ("company", re.compile(r"^/api/v2/companies/(\d+)/complete/?$"), self._company),
+            ("person", re.compile(r"^/api/v2/persons/(\d+)/complete/?$"), self._person),
+            ("doc-types", re.compile(r"^/api/v2/doc-types/?$"), self._doc_types),
+            ("folders", re.compile(r"^/api/v2/folders/tree/?$"), self._folders),
+        ]
+
+    def _health(self, query, headers):
+        return 200, {"status": "ok", "stub": True}
+
+    def _search(self, query, headers):
+        terms = (query.get("q") or "").lower().split()
+        docs = self.catalogue.documents.values()
+        results = [
+            self.catalogue.summary(d) for d in docs
+            if _matches(d, terms)
+            and (not query.get("status") or d["status"] == query["status"])
+            and (not query.get("doc_type_id") or d["doc_type"]["id"] == int(query["doc_type_id"]))
+            and (not query.get("folder_id") or d["folder"]["id"] == int(query["folder_id"]))
+            and (not query.get("entity_id") or any(
+                self.catalogue.entities[n]["id"] == int(query["entity_id"]) for n in d.get("entity_names") or []))
+        ]
+        return 200, _page(results, query)
+
+    def _documents(self, query, headers):
+        since = (query.get("updated_since") or "") if self.honour_updated_since else ""
+        docs = [self.catalogue.summary(d) for d in self.catalogue.documents.values() if d["updated_at"] > since]
+        return 200, _page(docs, query)
+
+    def _document(self, query, headers, doc_id):
+        doc = self.catalogue.documents.get(int(doc_id))
+        if doc is None:
+            return 404, {"detail": "Document not found"}
+        return 200, doc
+
+    def _download(self, query, headers, file_id):
+        if int(file_id) // 10 not in self.catalogue.documents:
+            return 404, {"detail": "File not found"}
+        body = self.catalogue.image(int(file_id))
+        etag = '"%s"' % hashlib.sha1(body).hexdigest()[:16]
+        if headers.get("If-None-Match") == etag:
+            return 304, b"", {"ETag": etag}
+        return 200, body, {"ETag": etag, "Content-Type": "image/jpeg"}
+
+    def _entity_dict(self, entity: dict) -> dict:
+        return {**{k: v for k, v in entity.items() if k != "document_ids"},
+                "document_count": len(entity["document_ids"])}
+
+    def _entities(self, query, headers):
+        q = (query.get("q") or "").lower()
+        etype = query.get("entity_type")
+        results = [
+            self._entity_dict(e) for e in self.catalogue.entities.values()
+            if q in e["name"].lower() and (not etype or e["entity_type"] == etype)
+        ]
+        return 200, _page(results, query)
+
+    def _entity_by_id(self, entity_id: str, entity_type: str) -> dict | None:
+        for e in self.catalogue.entities.values():
+            if e["id"] == int(entity_id) and e["entity_type"] == entity_type:
+                return e
+        return None
+
+    def _company(self, query, headers, entity_id):
+        entity = self._entity_by_id(entity_id, "org")
+        if entity is None:
+            return 404, {"detail": "Company not found"}
+        materials = [self.catalogue.summary(self.catalogue.documents[i]) for i in entity["document_ids"]]
+        employees = [self._entity_dict(e) for e in self.catalogue.entities.values() if e["entity_type"] == "person"]
+        return 200, {
+            "company": self._entity_dict(entity),
+            "license": {"credit_code": f"91110000{entity['id']:010d}", "legal_person": "王春红"},
+            "employees": employees,
+            "materials": materials,
+            "aggregated_info": {},
+            "statistics": {"total_materials": len(materials), "total_employees": len(employees),
+                           "expired_materials": 0},
+        }
+
+    def _person(self, query, headers, entity_id):
+        entity = self._entity_by_id(entity_id, "person")
+        if entity is None:
+            return 404, {"detail": "Person not found"}
+        materials = [self.catalogue.summary(self.catalogue.documents[i]) for i in entity["document_ids"]]
+        return 200, {
+            "person": self._entity_dict(entity),
+            "company": None,
+            "certificates": [m for m in materials if m["doc_type"]["code"].startswith("cert")],
+            "materials": materials,
+            "aggregated_info": {},
+        }
+
+    def _doc_types(self, query, headers):
+        return 200, {"doc_types": {"全部": list(self.catalogue.doc_types.values())}}
+
+    def _folders(self, query, headers):
+        return 200, {"tree": list(self.catalogue.folders.values())}
+
+    def _handler_class(self):
+        hub = self
+        routes = self._routes()
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # 关闭 Nagle，否则小响应会被延迟确认拖慢约 40ms
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                query = {k: v[-1] for k, v in parse_qs(parsed.query).items()}
+                for endpoint, pattern, handler in routes:
+                    m = pattern.match(parsed.path)
+                    if m:
+                        break
+                else:
+                    endpoint, m, handler = "unknown", None, None
+
+                if endpoint != "health":
+                    delay, fail = hub._inject()
+                    if delay:
+                        time.sleep(delay)
+                else:
+                    fail = False
+
+                extra = {}
+                if fail:
+                    status, body = 503, {"detail": "injected failure"}
+                elif handler is None:
+                    status, body = 404, {"detail": "Not Found"}
+                else:
+                    status, body, *rest = handler(query, self.headers, *m.groups())
+                    extra = rest[0] if rest else {}
+
+                if isinstance(body, (bytes, bytearray)):
+                    payload = bytes(body)
+                else:
+                    payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+                    extra.setdefault("Content-Type", "application/json")
+                self.send_response(status)
+                for k, v in extra.items():
+                    self.send_header(k, v)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                if status != 304:
+                    self.wfile.write(payload)
+                hub._record(endpoint, status, len(payload))
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline MaterialHub stub server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8201)
+    parser.add_argument("--catalogue-size", type=int, default=0)
+    parser.add_argument("--image-size", default="1240x1754", help="合成扫描件尺寸，宽x高")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    width, height = (int(v) for v in args.image_size.lower().split("x"))
+    catalogue = StubCatalogue(args.catalogue_size, (width, height), args.seed)
+    hub = StubMaterialHub(catalogue, args.host, args.port, args.latency_ms, args.jitter_ms,
+                          args.error_rate, args.seed)
+    print(f"MaterialHub stub on {hub.url} ({len(catalogue.documents)} documents, "
+          f"{len(catalogue.entities)} entities); export MATERIALHUB_API_URL={hub.url}")
+    hub.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stats = hub.stats()
+        hub.stop()
+        print(f"\n{stats['requests']} requests, {stats['errors']} errors, {stats['bytes']} bytes")
+
+
+if __name__ == "__main__":
+    main()
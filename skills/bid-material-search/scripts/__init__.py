@@ -1,22 +1,40 @@
 """bid-material-search skill - MCP-based implementation
 
 搜索和查询投标材料，直接使用 MaterialHub MCP tools。
+
+公开接口按需加载（PEP 562 模块 __getattr__）：import 本包不会导入 httpx / PIL /
+NumPy，也不会读取 .env，首次访问某个函数时才导入它所在的子模块。
 """
 
+import importlib
+
 __version__ = "3.0.0"  # MCP-based version
 
-from .search import search_materials
-from .extract import extract_company_data, extract_person_data
-from .replace import replace_placeholder, replace_placeholder_by_id, replace_all_placeholders
-from .watermark import add_watermark, get_project_name_from_analysis
-
-__all__ = [
-    "search_materials",
-    "extract_company_data",
-    "extract_person_data",
-    "replace_placeholder",
-    "replace_placeholder_by_id",
-    "replace_all_placeholders",
-    "add_watermark",
-    "get_project_name_from_analysis",
-]
+# 公开名称 → 所在子模块
+_LAZY = {
+    "search_materials": "search",
+    "extract_company_data": "extract",
+    "extract_person_data": "extract",
+    "extract_bulk": "extract",
+    "replace_placeholder": "replace",
+    "replace_placeholder_by_id": "replace",
+    "replace_all_placeholders": "replace",
+    "add_watermark": "watermark",
+    "get_project_name_from_analysis": "watermark",
+    "MaterialHubSession": "runner",
+}
+
+__all__ = list(_LAZY)
+
+
+def __getattr__(name: str):
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{_LAZY[name]}", __name__), name)
+    # 缓存到模块全局，之后的访问不再经过 __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,90 @@
+"""搜索结果缓存
+
+同一次投标任务里，~20 个响应文件反复请求同一批材料（营业执照、ISO 9001、
+法人身份证……），每个占位符都完整跑一遍 smart_search 回退链是纯粹的浪费。
+本模块提供按归一化查询词缓存搜索结果的 SearchCache：
+
+- 运行期缓存：一次 replace_all_placeholders 内重复的占位符直接命中内存
+- 持久化缓存：可选写入 JSON 文件，S9 → S11 重跑时在 TTL 内复用
+"""
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import config
+
+
+class SearchCache:
+    """按归一化查询词缓存 smart_search 结果
+
+    Args:
+        path: 持久化文件路径；为 None 时只做运行期缓存
+        ttl: 持久化条目的有效期（秒），过期条目在加载时丢弃；默认 config.SEARCH_CACHE_TTL
+    """
+
+    def __init__(self, path: str | Path | None = None, ttl: int | None = None):
+        self.path = Path(path) if path else None
+        self.ttl = config.SEARCH_CACHE_TTL if ttl is None else ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._dirty = False
+        if self.path:
+            self._load()
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"读取搜索缓存失败，忽略: {e}")
+            return
+        now = time.time()
+        for key, entry in data.get("entries", {}).items():
+            if now - entry.get("ts", 0) < self.ttl:
+                self._entries[key] = entry
+
+    def get(self, key: str) -> List[Dict] | None:
+        """命中返回缓存的结果列表，未命中返回 None"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry["results"]
+
+    def set(self, key: str, results: List[Dict]) -> None:
+        self._entries[key] = {"ts": time.time(), "results": results}
+        # 零命中只在本次运行内缓存，不落盘——两次运行之间用户可能刚补传了材料
+        if results:
+            self._dirty = True
+
+    def save(self) -> None:
+        """把非空结果写回持久化文件（无持久化路径或无变更时跳过）"""
+        if not self.path or not self._dirty:
+            return
+        entries = {k: v for k, v in self._entries.items() if v["results"]}
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"entries": entries}, f, ensure_ascii=False)
+            os.replace(tmp, self.path)
+            self._dirty = False
+        except OSError as e:
+            print(f"写入搜索缓存失败: {e}")
+
+    def stats(self) -> dict:
+        """命中统计，供批量替换汇总使用"""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "persisted": bool(self.path),
+        }
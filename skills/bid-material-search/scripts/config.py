@@ -8,11 +8,12 @@
 """
 
 import os
-from dotenv import load_dotenv
 
 
 def load_config():
     """Load configuration from multiple possible locations"""
+    from dotenv import load_dotenv
+
     # Try current working directory first (highest priority)
     if os.path.exists(".env"):
         load_dotenv(".env", override=True)
@@ -37,15 +38,55 @@ def load_config():
     return "env_vars"
 
 
-# Load on import
-_config_source = load_config()
+# 配置项在首次访问时才解析（PEP 562 模块 __getattr__）：import config 本身不读 .env，
+# 只需水印等本地功能的调用方不必为加载配置付费。`from config import API_BASE`
+# 同样会触发解析，所以各模块在调用时读取 config.XXX，而不是在 import 时绑定。
+_LAZY_SETTINGS = (
+    "_config_source",
+    "API_BASE",
+    "API_TOKEN",
+    "SEARCH_CACHE_TTL",
+    "EXTRACT_CONCURRENCY",
+    "MATERIAL_CACHE_DIR",
+    "HTTP_RETRIES",
+    "MIRROR_FULL_SYNC_DAYS",
+)
+
+
+def _resolve() -> None:
+    """加载 .env 并把配置项写入模块全局（之后的访问不再经过 __getattr__）"""
+    config_source = load_config()
+    settings = {
+        "_config_source": config_source,
+        "API_BASE": os.getenv("MATERIALHUB_API_URL", "http://localhost:8201"),
+        "API_TOKEN": os.getenv("MATERIALHUB_API_KEY", ""),
+        # 搜索结果持久化缓存的有效期（秒）：足够覆盖 S9 → S11 的重跑间隔，
+        # 又不至于让新上传的材料长时间查不到
+        "SEARCH_CACHE_TTL": int(os.getenv("MATERIALHUB_SEARCH_CACHE_TTL", "1800")),
+        # 批量提取（extract_bulk）时同时在途的请求数上限
+        "EXTRACT_CONCURRENCY": int(os.getenv("MATERIALHUB_CONCURRENCY", "8")),
+        # 本地缓存根目录（图片内容寻址存储等），跨项目、跨运行共享
+        "MATERIAL_CACHE_DIR": os.getenv("MATERIALHUB_CACHE_DIR") or os.path.join(
+            os.path.expanduser("~"), ".cache", "bid-material-search"
+        ),
+        # GET 请求遇到连接错误或 502/503/504 时的重试次数（见 tracing.traced_stream）
+        "HTTP_RETRIES": int(os.getenv("MATERIALHUB_RETRIES", "2")),
+        # 本地镜像距上次全量同步超过该天数时，下一次 sync 自动全量同步（见 mirror.py）
+        "MIRROR_FULL_SYNC_DAYS": float(os.getenv("MATERIALHUB_MIRROR_FULL_SYNC_DAYS", "7")),
+    }
+    # 已被显式赋值（如测试中 config.API_BASE = ...）的配置项保持不变
+    for name, value in settings.items():
+        globals().setdefault(name, value)
+
+    # Debug info (can be disabled in production)
+    if os.getenv("DEBUG"):
+        print(f"[bid-material-search] Config loaded from: {config_source}")
+        print(f"[bid-material-search] API_BASE: {API_BASE}")
+        print(f"[bid-material-search] API_TOKEN: {API_TOKEN[:20]}..." if API_TOKEN else "[bid-material-search] API_TOKEN: <not set>")
 
-# Configuration
-API_BASE = os.getenv("MATERIALHUB_API_URL", "http://localhost:8201")
-API_TOKEN = os.getenv("MATERIALHUB_API_KEY", "")
 
-# Debug info (can be disabled in production)
-if os.getenv("DEBUG"):
-    print(f"[bid-material-search] Config loaded from: {_config_source}")
-    print(f"[bid-material-search] API_BASE: {API_BASE}")
-    print(f"[bid-material-search] API_TOKEN: {API_TOKEN[:20]}..." if API_TOKEN else "[bid-material-search] API_TOKEN: <not set>")
+def __getattr__(name: str):
+    if name in _LAZY_SETTINGS:
+        _resolve()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
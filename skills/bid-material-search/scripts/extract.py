@@ -3,12 +3,15 @@
 使用 MaterialHub 聚合 API 提取公司和人员的完整信息。
 """
 
+import asyncio
 import re
 import httpx
-from typing import Any
+from typing import Any, Dict, Iterable
 
 # Load configuration
-from config import API_BASE, API_TOKEN
+import config
+from runner import pooled_client, run_sync
+from tracing import traced_get
 
 
 def _norm_name(s: str) -> str:
@@ -23,29 +26,48 @@ def _pick_exact(entities: list, name: str) -> list:
     return exact if len(exact) == 1 else entities
 
 
+# 错误结果的 "error_kind"：
+#   not_found / ambiguous  确定结果（未找到 / 多个匹配），批量提取时照常缓存
+#   request                请求失败（网络异常、服务端错误），不缓存，下次重试
+#   unexpected             处理响应时的意外异常（如数据格式异常），不缓存
+_CACHEABLE_ERROR_KINDS = ("not_found", "ambiguous")
+
+
+def _error(kind: str, message: str, **extra) -> dict:
+    return {"error": message, "error_kind": kind, **extra}
+
+
 def _headers() -> dict:
     """构建请求头"""
     h = {"Content-Type": "application/json"}
-    if API_TOKEN:
-        h["Authorization"] = f"Bearer {API_TOKEN}"
+    if config.API_TOKEN:
+        h["Authorization"] = f"Bearer {config.API_TOKEN}"
     return h
 
 
-async def _get(path: str, params: dict | None = None) -> Any:
-    """发送 GET 请求到 MaterialHub API"""
-    async with httpx.AsyncClient(base_url=API_BASE, timeout=30) as client:
-        resp = await client.get(path, params=params, headers=_headers())
+async def _get(path: str, params: dict | None = None, client: httpx.AsyncClient | None = None) -> Any:
+    """发送 GET 请求到 MaterialHub API
+
+    传入 client 时直接使用，否则取 pooled_client()（后台事件循环内复用共享连接池）。
+    """
+    if client is not None:
+        resp = await traced_get(client, path, params, _headers())
+        resp.raise_for_status()
+        return resp.json()
+    async with pooled_client() as client:
+        resp = await traced_get(client, path, params, _headers())
         resp.raise_for_status()
         return resp.json()
 
 
-async def extract_company_data(company_name: str) -> dict:
+async def extract_company_data(company_name: str, client: httpx.AsyncClient | None = None) -> dict:
     """提取公司完整数据
 
     使用聚合 API 一次性获取公司的所有信息，适用于投标文件编写。
 
     Args:
         company_name: 公司名称
+        client: 可选的共享 httpx.AsyncClient（base_url 为 API_BASE），批量提取时复用连接
 
     Returns:
         {
@@ -62,57 +84,59 @@ async def extract_company_data(company_name: str) -> dict:
     """
     # 1. 查找公司实体
     try:
-        ent_data = await _get("/api/v2/entities/", {"q": company_name, "entity_type": "org", "limit": 5})
+        ent_data = await _get("/api/v2/entities/", {"q": company_name, "entity_type": "org", "limit": 5}, client=client)
         entities = ent_data.get("results", [])
 
         # 全角/半角括号不一致会导致 ilike 子串匹配落空（库内多为半角），用归一化名称重试一次
         if not entities and _norm_name(company_name) != company_name:
-            ent_data = await _get("/api/v2/entities/", {"q": _norm_name(company_name), "entity_type": "org", "limit": 5})
+            ent_data = await _get("/api/v2/entities/", {"q": _norm_name(company_name), "entity_type": "org", "limit": 5}, client=client)
             entities = ent_data.get("results", [])
 
         if not entities:
-            return {"error": f"未找到公司: {company_name}"}
+            return _error("not_found", f"未找到公司: {company_name}")
 
         entities = _pick_exact(entities, company_name)
 
         if len(entities) > 1:
             # 返回多个匹配，让调用方选择
-            return {
-                "error": "找到多个匹配的公司",
-                "matches": [
+            return _error(
+                "ambiguous",
+                "找到多个匹配的公司",
+                matches=[
                     {"id": e["id"], "name": e["name"], "document_count": e.get("document_count", 0)}
                     for e in entities
-                ]
-            }
+                ],
+            )
 
         company_id = entities[0]["id"]
     except Exception as e:
-        return {"error": f"查询公司失败: {e}"}
+        return _error("request", f"查询公司失败: {e}")
 
     # 2. 获取公司完整信息（聚合 API）
     try:
-        data = await _get(f"/api/v2/companies/{company_id}/complete")
+        data = await _get(f"/api/v2/companies/{company_id}/complete", client=client)
     except httpx.HTTPStatusError as e:
-        return {"error": f"获取公司信息失败: {e.response.status_code} {e.response.text}"}
+        return _error("request", f"获取公司信息失败: {e.response.status_code} {e.response.text}")
     except Exception as e:
-        return {"error": f"获取公司信息失败: {e}"}
+        return _error("request", f"获取公司信息失败: {e}")
 
     # 3. 提取和格式化数据
-    company = data.get("company", {})
-    license_info = data.get("license", {})
-    employees = data.get("employees", [])
-    materials = data.get("materials", [])
-    aggregated = data.get("aggregated_info", {})
-    stats = data.get("statistics", {})
+    # 字段可能为 null，统一按空值处理
+    company = data.get("company") or {}
+    license_info = data.get("license") or {}
+    employees = data.get("employees") or []
+    materials = data.get("materials") or []
+    aggregated = data.get("aggregated_info") or {}
+    stats = data.get("statistics") or {}
 
     # 提取证书（从材料中筛选）——字段契约见 SKILL.md「字段契约」小节：
     # cert_number/issuing_authority/issue_date/valid_until/scope 缺一不可。
     certificates = []
     performance_contracts = []
     for mat in materials:
-        doc_type = mat.get("doc_type", {})
-        doc_type_code = doc_type.get("code", "")
-        extracted = mat.get("metadata", {}).get("extracted_data", {}) or {}
+        doc_type = mat.get("doc_type") or {}
+        doc_type_code = doc_type.get("code") or ""
+        extracted = (mat.get("metadata") or {}).get("extracted_data") or {}
 
         # 识别为证书类型的材料
         if "cert" in doc_type_code or "qualification" in doc_type_code:
@@ -165,7 +189,7 @@ async def extract_company_data(company_name: str) -> dict:
     # 提取人员信息
     persons = []
     for emp in employees:
-        emp_attrs = emp.get("attributes", {})
+        emp_attrs = emp.get("attributes") or {}
         persons.append({
             "id": emp.get("id"),
             "name": emp.get("name", ""),
@@ -184,7 +208,7 @@ async def extract_company_data(company_name: str) -> dict:
             "id": company.get("id"),
             "name": company.get("name", ""),
             "type": company.get("entity_type", "org"),
-            **company.get("attributes", {}),
+            **(company.get("attributes") or {}),
         },
         "license": license_info,
         "certificates": certificates,
@@ -197,13 +221,14 @@ async def extract_company_data(company_name: str) -> dict:
     return result
 
 
-async def extract_person_data(person_name: str) -> dict:
+async def extract_person_data(person_name: str, client: httpx.AsyncClient | None = None) -> dict:
     """提取人员完整数据
 
     使用聚合 API 一次性获取人员的所有信息。
 
     Args:
         person_name: 人员姓名
+        client: 可选的共享 httpx.AsyncClient（base_url 为 API_BASE），批量提取时复用连接
 
     Returns:
         {
@@ -215,50 +240,52 @@ async def extract_person_data(person_name: str) -> dict:
     """
     # 1. 查找人员实体
     try:
-        ent_data = await _get("/api/v2/entities/", {"q": person_name, "entity_type": "person", "limit": 5})
+        ent_data = await _get("/api/v2/entities/", {"q": person_name, "entity_type": "person", "limit": 5}, client=client)
         entities = ent_data.get("results", [])
 
         if not entities:
-            return {"error": f"未找到人员: {person_name}"}
+            return _error("not_found", f"未找到人员: {person_name}")
 
         if len(entities) > 1:
             # 返回多个匹配，让调用方选择
-            return {
-                "error": "找到多个匹配的人员",
-                "matches": [
+            return _error(
+                "ambiguous",
+                "找到多个匹配的人员",
+                matches=[
                     {
                         "id": e["id"],
                         "name": e["name"],
-                        "company": e.get("attributes", {}).get("company", ""),
+                        "company": (e.get("attributes") or {}).get("company", ""),
                     }
                     for e in entities
-                ]
-            }
+                ],
+            )
 
         person_id = entities[0]["id"]
     except Exception as e:
-        return {"error": f"查询人员失败: {e}"}
+        return _error("request", f"查询人员失败: {e}")
 
     # 2. 获取人员完整信息（聚合 API）
     try:
-        data = await _get(f"/api/v2/persons/{person_id}/complete")
+        data = await _get(f"/api/v2/persons/{person_id}/complete", client=client)
     except httpx.HTTPStatusError as e:
-        return {"error": f"获取人员信息失败: {e.response.status_code} {e.response.text}"}
+        return _error("request", f"获取人员信息失败: {e.response.status_code} {e.response.text}")
     except Exception as e:
-        return {"error": f"获取人员信息失败: {e}"}
+        return _error("request", f"获取人员信息失败: {e}")
 
     # 3. 提取和格式化数据
-    person = data.get("person", {})
+    # 字段可能为 null，统一按空值处理
+    person = data.get("person") or {}
     company = data.get("company")
-    certificates = data.get("certificates", [])
-    materials = data.get("materials", [])
-    aggregated = data.get("aggregated_info", {})
+    certificates = data.get("certificates") or []
+    materials = data.get("materials") or []
+    aggregated = data.get("aggregated_info") or {}
 
     result = {
         "person": {
             "id": person.get("id"),
             "name": person.get("name", ""),
-            **person.get("attributes", {}),
+            **(person.get("attributes") or {}),
         },
         "company": company if company else None,
         "certificates": certificates,
@@ -269,14 +296,92 @@ async def extract_person_data(person_name: str) -> dict:
     return result
 
 
+async def extract_bulk(
+    company_names: Iterable[str] = (),
+    person_names: Iterable[str] = (),
+    concurrency: int | None = None,
+    cache: Dict[tuple, dict] | None = None,
+) -> dict:
+    """批量提取公司和人员数据
+
+    商务标需要一家公司加整支项目团队的数据，逐个调用 extract_company_data /
+    extract_person_data 时每人都要串行走「实体搜索 → complete 聚合」两次往返。
+    这里对所有名称并发执行（信号量限制同时在途的提取数），共享一个连接池，
+    同名只查询一次。
+
+    Args:
+        company_names: 公司名称列表
+        person_names: 人员姓名列表
+        concurrency: 同时在途的提取数上限，默认 config.EXTRACT_CONCURRENCY
+        cache: 运行期缓存（dict），键为 ("company"|"person", 归一化名称)。
+            同一次任务内多次调用时传入同一个 dict，重复的名称直接复用结果
+
+    Returns:
+        {
+            "companies": {"<输入的公司名称>": <extract_company_data 的返回>, ...},
+            "persons": {"<输入的人员姓名>": <extract_person_data 的返回>, ...}
+        }
+        单个名称查询失败只影响其自身条目（带 "error" / "error_kind" 键），不影响其他名称；
+        处理单个名称时的意外异常同样转为该名称的 error_kind="unexpected" 条目。
+        取消（asyncio.CancelledError）不算单个名称的失败，会向调用方传播。
+    """
+    company_names, person_names = list(company_names), list(person_names)
+    cache = {} if cache is None else cache
+    if concurrency is None:
+        concurrency = config.EXTRACT_CONCURRENCY
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    jobs = [("company", name) for name in company_names] + [("person", name) for name in person_names]
+
+    async with pooled_client() as client:
+
+        async def _fetch(kind: str, name: str) -> dict:
+            async with semaphore:
+                if kind == "company":
+                    return await extract_company_data(name, client=client)
+                return await extract_person_data(name, client=client)
+
+        # 同一 (类型, 归一化名称) 只发起一次提取，已缓存的直接跳过
+        pending: Dict[tuple, asyncio.Task] = {}
+        for kind, name in jobs:
+            key = (kind, _norm_name(name))
+            if key not in cache and key not in pending:
+                pending[key] = asyncio.ensure_future(_fetch(kind, name))
+        if pending:
+            # return_exceptions：单个名称的异常不中断整批，也不会留下未等待的兄弟任务
+            results = await asyncio.gather(*pending.values(), return_exceptions=True)
+            for key, result in zip(pending, results):
+                if isinstance(result, Exception):
+                    result = _error("unexpected", f"提取失败: {type(result).__name__}: {result}")
+                elif isinstance(result, BaseException):
+                    # 任务被取消（CancelledError）等不属于单个名称的失败，照常向上传播
+                    raise result
+                # 只缓存成功结果和「未找到 / 多个匹配」这类确定结果；
+                # 请求失败和意外异常不写入缓存，下次调用会重试
+                if "error" not in result or result.get("error_kind") in _CACHEABLE_ERROR_KINDS:
+                    cache[key] = result
+                pending[key] = result
+
+    def _result(kind: str, name: str) -> dict:
+        key = (kind, _norm_name(name))
+        return cache[key] if key in cache else pending[key]
+
+    return {
+        "companies": {name: _result("company", name) for name in company_names},
+        "persons": {name: _result("person", name) for name in person_names},
+    }
+
+
 # Sync wrappers for easier use
 def extract_company_data_sync(company_name: str) -> dict:
     """同步版本的 extract_company_data"""
-    import asyncio
-    return asyncio.run(extract_company_data(company_name))
+    return run_sync(extract_company_data(company_name))
 
 
 def extract_person_data_sync(person_name: str) -> dict:
     """同步版本的 extract_person_data"""
-    import asyncio
-    return asyncio.run(extract_person_data(person_name))
+    return run_sync(extract_person_data(person_name))
+
+
+def extract_bulk_sync(*args, **kwargs) -> dict:
+    """同步版本的 extract_bulk"""
+    return run_sync(extract_bulk(*args, **kwargs))
@@ -0,0 +1,232 @@
+"""材料图片的内容寻址本地存储
+
+同一张证书被五个响应文件引用时，旧实现会下载五次；不同材料的附件同名时
+（如 PDF 提取页都叫 page_1.png）还会互相覆盖。ImageStore 把下载结果按
+(文档 id, 版本 id, 文件 id) 登记，字节按 SHA-256 存成唯一对象：
+
+- 下载以分块流式写盘，不在内存中持有整张扫描件
+- 再次请求时带 If-None-Match / If-Modified-Since，服务端返回 304 即复用本地对象
+- 同一进程内已校验过的条目直接复用，不再发请求
+- 输出文件从存储中复制生成（交付文件会被原地加水印/编辑，不能与存储对象共用 inode）
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Dict
+
+import httpx
+
+import config
+from runner import pooled_client
+from tracing import traced_stream
+
+CHUNK_SIZE = 64 * 1024
+DOWNLOAD_TIMEOUT = 60
+
+
+def store_key(doc_id: int, revision: dict, file: dict) -> str:
+    """构造存储键：文档 id + 版本 id + 文件 id"""
+    rev_id = revision.get("id") or revision.get("revision_number") or ""
+    file_id = file.get("id") or file.get("filename") or ""
+    return f"{doc_id}:{rev_id}:{file_id}"
+
+
+def _auth_headers() -> dict:
+    h = {}
+    if config.API_TOKEN:
+        h["Authorization"] = f"Bearer {config.API_TOKEN}"
+    return h
+
+
+def _absolute_url(url: str) -> str:
+    if url.startswith("/"):
+        return f"{config.API_BASE}{url}"
+    return url
+
+
+async def stream_download(url: str, dest: str | Path, headers: dict | None = None) -> dict:
+    """把 url 分块流式下载到 dest，返回 {"sha256", "size", "etag", "last_modified"}
+
+    先写入同目录临时文件再原子替换，下载中断不会留下半截的 dest。
+    """
+    dest = Path(dest)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    hasher = hashlib.sha256()
+    size = 0
+
+    async with pooled_client() as client:
+        async with traced_stream(client, _absolute_url(url), headers=headers or _auth_headers(),
+                                 timeout=DOWNLOAD_TIMEOUT) as resp:
+            resp.raise_for_status()
+            fd, tmp = tempfile.mkstemp(dir=dest.parent, prefix=".dl-")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    async for chunk in resp.aiter_bytes(CHUNK_SIZE):
+                        f.write(chunk)
+                        hasher.update(chunk)
+                        size += len(chunk)
+                os.replace(tmp, dest)
+            except BaseException:
+                if os.path.exists(tmp):
+                    os.unlink(tmp)
+                raise
+            return {
+                "sha256": hasher.hexdigest(),
+                "size": size,
+                "etag": resp.headers.get("etag"),
+                "last_modified": resp.headers.get("last-modified"),
+            }
+
+
+class ImageStore:
+    """内容寻址的图片存储
+
+    目录结构::
+
+        <root>/images/index.json            存储键 → 对象元数据
+        <root>/images/objects/ab/abcd….png  按 SHA-256 命名的唯一对象
+        <root>/watermarked/                 由对象派生的水印图（见 watermark.add_watermark_cached）
+
+    Args:
+        root: 存储根目录，默认 MATERIALHUB_CACHE_DIR（~/.cache/bid-material-search）
+    """
+
+    def __init__(self, root: str | Path | None = None):
+        self.root = Path(root or config.MATERIAL_CACHE_DIR) / "images"
+        self.objects_dir = self.root / "objects"
+        self.index_path = self.root / "index.json"
+        self.watermark_dir = self.root.parent / "watermarked"
+        self._index: Dict[str, dict] = self._load_index()
+        # 本进程内已与服务端校验过的存储键，重复引用直接复用
+        self._validated: set[str] = set()
+        self.downloads = 0
+        self.reused = 0
+
+    def _load_index(self) -> Dict[str, dict]:
+        if not self.index_path.exists():
+            return {}
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"读取图片存储索引失败，重建: {e}")
+            return {}
+
+    def _save_index(self) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.index_path.with_suffix(".json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._index, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.index_path)
+
+    def object_path(self, sha256: str, ext: str) -> Path:
+        return self.objects_dir / sha256[:2] / f"{sha256}{ext}"
+
+    def lookup(self, key: str) -> Path | None:
+        """返回存储键对应的本地对象路径（不存在时返回 None）"""
+        entry = self._index.get(key)
+        if not entry:
+            return None
+        path = self.object_path(entry["sha256"], entry["ext"])
+        return path if path.exists() else None
+
+    async def fetch(self, url: str, key: str, filename: str = "") -> Path:
+        """确保存储键对应的图片在本地存储中，返回对象路径
+
+        已有对象时发条件请求，304 直接复用；同一进程内已校验过的键不再请求。
+
+        Raises:
+            httpx.HTTPError: 下载失败
+        """
+        cached = self.lookup(key)
+        if cached and key in self._validated:
+            self.reused += 1
+            return cached
+
+        headers = _auth_headers()
+        entry = self._index.get(key) if cached else None
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        hasher = hashlib.sha256()
+        size = 0
+        async with pooled_client() as client:
+            async with traced_stream(client, _absolute_url(url), headers=headers,
+                                     timeout=DOWNLOAD_TIMEOUT) as resp:
+                if resp.status_code == 304 and cached:
+                    self._validated.add(key)
+                    self.reused += 1
+                    return cached
+                resp.raise_for_status()
+
+                fd, tmp = tempfile.mkstemp(dir=self.objects_dir, prefix=".dl-")
+                try:
+                    with os.fdopen(fd, "wb") as f:
+                        async for chunk in resp.aiter_bytes(CHUNK_SIZE):
+                            f.write(chunk)
+                            hasher.update(chunk)
+                            size += len(chunk)
+                except BaseException:
+                    os.unlink(tmp)
+                    raise
+                etag = resp.headers.get("etag")
+                last_modified = resp.headers.get("last-modified")
+
+        sha256 = hasher.hexdigest()
+        ext = Path(filename).suffix.lower() or ".png"
+        obj = self.object_path(sha256, ext)
+        if obj.exists():
+            # 内容相同的对象已存在（别的材料引用了同一份文件）
+            os.unlink(tmp)
+        else:
+            obj.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(tmp, obj)
+
+        self._index[key] = {
+            "sha256": sha256,
+            "ext": ext,
+            "size": size,
+            "filename": filename,
+            "etag": etag,
+            "last_modified": last_modified,
+        }
+        self._save_index()
+        self._validated.add(key)
+        self.downloads += 1
+        return obj
+
+    @staticmethod
+    def materialize(src: str | Path, dest: str | Path, link: bool = False) -> Path:
+        """从存储对象生成输出文件
+
+        默认复制（shutil.copy2）：交付文件之后可能被原地修改（watermark.py 不带 -o、
+        add_watermark_batch(output_dir=None) 等），复制出的文件与存储对象互不影响。
+        link=True 时优先硬链接（同一文件系统上零拷贝），失败退化为复制；
+        只适用于不会修改输出的只读使用方，否则会经由硬链接改写存储对象本身。
+        """
+        src, dest = Path(src), Path(dest)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        if dest.exists() or dest.is_symlink():
+            if link and os.path.samefile(src, dest):
+                return dest
+            # 旧版本硬链接出的文件也在这里断开，不再与存储对象共用 inode
+            dest.unlink()
+        if link:
+            try:
+                os.link(src, dest)
+                return dest
+            except OSError:
+                pass
+        shutil.copy2(src, dest)
+        return dest
+
+    def stats(self) -> dict:
+        return {"downloads": self.downloads, "reused": self.reused}
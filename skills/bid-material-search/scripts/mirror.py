@@ -0,0 +1,429 @@
+"""MaterialHub 材料目录的本地镜像
+
+`simple_replace.get_all_materials` 旧实现只拉一页（limit=100），大目录会被静默截断；
+Claude 每次判断匹配都要重新拉全量列表。MaterialMirror 把文档、文档类型、文件夹和
+实体同步到本地 SQLite：
+
+- 增量同步：按 offset 分页，带 updated_since（上次同步见到的最大 updated_at），
+  只拉变更过的文档。该参数不在 MATERIALHUB_API.md 中，按返回结果探测：
+  返回了早于 updated_since 的文档即视为服务端不支持，记入 sync_state，
+  之后每次同步都是全量分页（顺带清理已删除的文档）
+- 删除对账：增量同步看不到删除，同步完成后用一次 limit=1 的列表请求取服务端
+  total，本地文档数更多时分页拉取全部 id 清理已删除的文档；距上次全量同步超过
+  MATERIALHUB_MIRROR_FULL_SYNC_DAYS（默认 7 天）时自动全量同步。已删除的材料
+  最多在下一次 sync 之前仍可被检索到；--full 立即全量拉取并清理
+- 本地全文检索：标题与关联实体名建 FTS5 trigram 索引，中文子串查询无需分词
+- 占位符匹配（replace.smart_search 传入 mirror）可完全离线运行
+
+Usage:
+    python scripts/mirror.py sync [--full]
+    python scripts/mirror.py search 营业执照 [--limit 20]
+"""
+
+import argparse
+import json
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List
+
+import httpx
+
+import config
+from runner import pooled_client, run_sync
+from tracing import traced_get
+
+PAGE_SIZE = 100
+# 同步请求的超时（秒）：大页的列表响应比普通查询慢，单独加长
+SYNC_TIMEOUT = 60
+
+MODE_LABELS = {"full": "全量同步", "incremental": "增量同步", "reconciled": "增量同步 + 删除对账"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL DEFAULT '',
+    doc_type_code TEXT,
+    folder_path TEXT,
+    status TEXT,
+    expiry_date TEXT,
+    entity_names TEXT NOT NULL DEFAULT '',
+    updated_at TEXT,
+    data TEXT NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+    title, entity_names, content='documents', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS documents_ai AFTER INSERT ON documents BEGIN
+    INSERT INTO documents_fts(rowid, title, entity_names) VALUES (new.id, new.title, new.entity_names);
+END;
+CREATE TRIGGER IF NOT EXISTS documents_ad AFTER DELETE ON documents BEGIN
+    INSERT INTO documents_fts(documents_fts, rowid, title, entity_names)
+    VALUES ('delete', old.id, old.title, old.entity_names);
+END;
+CREATE TRIGGER IF NOT EXISTS documents_au AFTER UPDATE ON documents BEGIN
+    INSERT INTO documents_fts(documents_fts, rowid, title, entity_names)
+    VALUES ('delete', old.id, old.title, old.entity_names);
+    INSERT INTO documents_fts(rowid, title, entity_names) VALUES (new.id, new.title, new.entity_names);
+END;
+CREATE TABLE IF NOT EXISTS doc_types (
+    id INTEGER PRIMARY KEY,
+    code TEXT,
+    name TEXT,
+    category TEXT
+);
+CREATE TABLE IF NOT EXISTS folders (
+    id INTEGER PRIMARY KEY,
+    name TEXT,
+    path TEXT,
+    parent_id INTEGER
+);
+CREATE TABLE IF NOT EXISTS entities (
+    id INTEGER PRIMARY KEY,
+    name TEXT,
+    entity_type TEXT,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def _headers() -> dict:
+    """构建请求头"""
+    h = {"Content-Type": "application/json"}
+    if config.API_TOKEN:
+        h["Authorization"] = f"Bearer {config.API_TOKEN}"
+    return h
+
+
+async def iter_pages(
+    client: httpx.AsyncClient,
+    path: str,
+    params: dict | None = None,
+    page_size: int = PAGE_SIZE,
+    timeout: float | None = None,
+) -> AsyncIterator[List[Dict]]:
+    """按 offset 逐页拉取列表接口（{"results": [...], "total": N}），直到取完
+
+    服务端不返回 total 时以「本页不足 page_size」判断结束；timeout 为每个请求的超时
+    （None 沿用客户端的超时）。
+    """
+    offset = 0
+    while True:
+        resp = await traced_get(
+            client, path, {**(params or {}), "limit": page_size, "offset": offset}, _headers(), timeout=timeout
+        )
+        resp.raise_for_status()
+        data = resp.json()
+        results = data.get("results", [])
+        if results:
+            yield results
+        offset += len(results)
+        total = data.get("total", data.get("count"))
+        if len(results) < page_size or (total is not None and offset >= total):
+            return
+
+
+class MaterialMirror:
+    """MaterialHub 材料目录的本地 SQLite 镜像
+
+    Args:
+        path: 数据库文件路径，默认 MATERIALHUB_CACHE_DIR/mirror.db
+    """
+
+    def __init__(self, path: str | Path | None = None):
+        self.path = Path(path or Path(config.MATERIAL_CACHE_DIR) / "mirror.db")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # *_sync 包装器在后台事件循环线程里执行 sync()，连接可能跨线程使用；
+        # 同一时刻只有一个协程访问，不存在并发写
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "MaterialMirror":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # ------------------------------------------------------------------
+    # 同步
+    # ------------------------------------------------------------------
+
+    def _state(self, key: str) -> str | None:
+        row = self.conn.execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else None
+
+    def _set_state(self, key: str, value: str) -> None:
+        self.conn.execute(
+            "INSERT INTO sync_state(key, value) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, value),
+        )
+
+    def _upsert_document(self, doc: dict) -> str:
+        """写入一条文档，返回 "added" / "updated" / "unchanged" """
+        data = json.dumps(doc, ensure_ascii=False, sort_keys=True)
+        row = self.conn.execute("SELECT data FROM documents WHERE id = ?", (doc["id"],)).fetchone()
+        if row and row["data"] == data:
+            return "unchanged"
+        values = (
+            doc.get("title", ""),
+            (doc.get("doc_type") or {}).get("code"),
+            (doc.get("folder") or {}).get("path"),
+            doc.get("status"),
+            doc.get("expiry_date"),
+            " ".join(doc.get("entity_names") or []),
+            doc.get("updated_at"),
+            data,
+        )
+        if row:
+            self.conn.execute(
+                "UPDATE documents SET title = ?, doc_type_code = ?, folder_path = ?, status = ?, "
+                "expiry_date = ?, entity_names = ?, updated_at = ?, data = ? WHERE id = ?",
+                (*values, doc["id"]),
+            )
+            return "updated"
+        self.conn.execute(
+            "INSERT INTO documents(title, doc_type_code, folder_path, status, expiry_date, "
+            "entity_names, updated_at, data, id) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (*values, doc["id"]),
+        )
+        return "added"
+
+    async def _page_documents(
+        self, client: httpx.AsyncClient, since: str | None, counts: Dict[str, int]
+    ) -> tuple:
+        """分页拉取文档并写入，返回 (见到的 id 集合, 最大 updated_at, 服务端是否忽略了 since)"""
+        params = {"updated_since": since} if since else {}
+        seen = set()
+        latest = since or ""
+        ignored = False
+        async for page in iter_pages(client, "/api/v2/documents/", params, timeout=SYNC_TIMEOUT):
+            for doc in page:
+                updated = doc.get("updated_at") or ""
+                if since and updated and updated < since:
+                    ignored = True
+                seen.add(doc["id"])
+                counts[self._upsert_document(doc)] += 1
+                latest = max(latest, updated)
+            self.conn.commit()
+        return seen, latest, ignored
+
+    def _remove_unseen(self, seen: set) -> int:
+        """全量分页之后：删除 seen 之外的文档，记下全量对账时间，返回删除数"""
+        stale = [r["id"] for r in self.conn.execute("SELECT id FROM documents") if r["id"] not in seen]
+        self.conn.executemany("DELETE FROM documents WHERE id = ?", [(i,) for i in stale])
+        self._set_state("last_full_sync", str(time.time()))
+        return len(stale)
+
+    async def _server_total(self, client: httpx.AsyncClient) -> int | None:
+        """服务端文档总数（一次 limit=1 的列表请求）；不返回 total 时为 None"""
+        resp = await traced_get(client, "/api/v2/documents/", {"limit": 1, "offset": 0}, _headers(),
+                                timeout=SYNC_TIMEOUT)
+        resp.raise_for_status()
+        data = resp.json()
+        return data.get("total", data.get("count"))
+
+    def _full_sync_due(self) -> bool:
+        last = self._state("last_full_sync")
+        return last is None or time.time() - float(last) >= config.MIRROR_FULL_SYNC_DAYS * 86400
+
+    async def _sync_documents(self, client: httpx.AsyncClient, full: bool) -> tuple:
+        """同步文档，返回 (变更统计, 同步方式 "full" / "incremental" / "reconciled")"""
+        counts = {"added": 0, "updated": 0, "unchanged": 0, "removed": 0}
+        since = self._state("documents_updated_since")
+        if full or not since or self._state("updated_since_ignored") == "1" or self._full_sync_due():
+            since = None
+
+        seen, latest, ignored = await self._page_documents(client, since, counts)
+        if ignored:
+            # 服务端忽略了 updated_since，本次拉到的就是全量：以后不再发送该参数
+            self._set_state("updated_since_ignored", "1")
+        if latest:
+            self._set_state("documents_updated_since", latest)
+
+        if not since or ignored:
+            # 分页覆盖了全部文档，才能确定哪些已在服务端删除
+            counts["removed"] = self._remove_unseen(seen)
+            return counts, "full"
+
+        # 增量同步后新增/修改都已到位，本地比服务端多出的文档只可能已被删除
+        total = await self._server_total(client)
+        if total is None or self.count() <= total:
+            return counts, "incremental"
+        scratch = dict.fromkeys(counts, 0)
+        seen, _, _ = await self._page_documents(client, None, scratch)
+        counts["added"] += scratch["added"]
+        counts["updated"] += scratch["updated"]
+        counts["removed"] = self._remove_unseen(seen)
+        return counts, "reconciled"
+
+    async def _sync_doc_types(self, client: httpx.AsyncClient) -> int:
+        resp = await traced_get(client, "/api/v2/doc-types/", headers=_headers(), timeout=SYNC_TIMEOUT)
+        resp.raise_for_status()
+        rows = [
+            (dt["id"], dt.get("code"), dt.get("name"), category)
+            for category, types in resp.json().get("doc_types", {}).items()
+            for dt in types
+        ]
+        self.conn.execute("DELETE FROM doc_types")
+        self.conn.executemany("INSERT INTO doc_types VALUES (?, ?, ?, ?)", rows)
+        return len(rows)
+
+    async def _sync_folders(self, client: httpx.AsyncClient) -> int:
+        resp = await traced_get(client, "/api/v2/folders/tree", headers=_headers(), timeout=SYNC_TIMEOUT)
+        resp.raise_for_status()
+        tree_data = resp.json()
+        tree = tree_data.get("tree", []) if isinstance(tree_data, dict) else tree_data
+
+        rows = []
+
+        def _walk(nodes: list, parent_id: int | None) -> None:
+            for n in nodes:
+                rows.append((n["id"], n.get("name"), n.get("path"), parent_id))
+                _walk(n.get("children") or [], n["id"])
+
+        _walk(tree, None)
+        self.conn.execute("DELETE FROM folders")
+        self.conn.executemany("INSERT INTO folders VALUES (?, ?, ?, ?)", rows)
+        return len(rows)
+
+    async def _sync_entities(self, client: httpx.AsyncClient) -> int:
+        rows = []
+        async for page in iter_pages(client, "/api/v2/entities/", timeout=SYNC_TIMEOUT):
+            rows.extend(
+                (e["id"], e.get("name"), e.get("entity_type"), json.dumps(e, ensure_ascii=False))
+                for e in page
+            )
+        self.conn.execute("DELETE FROM entities")
+        self.conn.executemany("INSERT INTO entities VALUES (?, ?, ?, ?)", rows)
+        return len(rows)
+
+    async def sync(self, full: bool = False) -> dict:
+        """从 MaterialHub 同步到本地镜像
+
+        文档增量同步（删除对账与定期全量同步见模块说明）；文档类型、文件夹、
+        实体数据量小，每次整表刷新。
+
+        Args:
+            full: 忽略上次同步位置，全量拉取并删除服务端已不存在的文档
+
+        Returns:
+            {
+                "documents": {"added": 3, "updated": 1, "unchanged": 0, "removed": 0},
+                "mode": "incremental",  # full / incremental / reconciled（增量后发现删除并对账）
+                "doc_types": 42, "folders": 18, "entities": 57,
+                "total_documents": 812
+            }
+        """
+        async with pooled_client() as client:
+            documents, mode = await self._sync_documents(client, full)
+            doc_types = await self._sync_doc_types(client)
+            folders = await self._sync_folders(client)
+            entities = await self._sync_entities(client)
+        self.conn.commit()
+        return {
+            "documents": documents,
+            "mode": mode,
+            "doc_types": doc_types,
+            "folders": folders,
+            "entities": entities,
+            "total_documents": self.count(),
+        }
+
+    # ------------------------------------------------------------------
+    # 查询
+    # ------------------------------------------------------------------
+
+    def count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def all_documents(self, limit: int | None = None) -> List[Dict]:
+        """返回镜像中的全部文档（结构同 /api/v2/documents/ 的 results）"""
+        sql = "SELECT data FROM documents ORDER BY id"
+        rows = self.conn.execute(sql + " LIMIT ?", (limit,)) if limit else self.conn.execute(sql)
+        return [json.loads(r["data"]) for r in rows]
+
+    def search(self, query: str, limit: int = 20, status: str = "") -> List[Dict]:
+        """在标题和关联实体名中检索文档，结构同 search.search_materials 的返回
+
+        三个字及以上走 FTS5 trigram 索引按 bm25 排序；更短的查询（如「资质」）
+        trigram 无法命中，退化为 LIKE 子串匹配。
+        """
+        query = query.strip()
+        if not query:
+            return self.all_documents(limit)
+
+        where, args = "", []
+        if status:
+            where, args = " AND d.status = ?", [status]
+
+        if len(query) >= 3:
+            phrase = '"' + query.replace('"', '""') + '"'
+            rows = self.conn.execute(
+                "SELECT d.data FROM documents_fts f JOIN documents d ON d.id = f.rowid "
+                f"WHERE documents_fts MATCH ?{where} ORDER BY bm25(documents_fts) LIMIT ?",
+                (phrase, *args, limit),
+            )
+        else:
+            like = f"%{query}%"
+            rows = self.conn.execute(
+                "SELECT d.data FROM documents d WHERE (d.title LIKE ? OR d.entity_names LIKE ?)"
+                f"{where} ORDER BY length(d.title), d.id LIMIT ?",
+                (like, like, *args, limit),
+            )
+        return [json.loads(r["data"]) for r in rows]
+
+    def find_entities(self, name: str, entity_type: str = "", limit: int = 5) -> List[Dict]:
+        """按名称子串查找实体"""
+        sql = "SELECT data FROM entities WHERE name LIKE ?"
+        args: List[Any] = [f"%{name.strip()}%"]
+        if entity_type:
+            sql += " AND entity_type = ?"
+            args.append(entity_type)
+        rows = self.conn.execute(sql + " ORDER BY length(name) LIMIT ?", (*args, limit))
+        return [json.loads(r["data"]) for r in rows]
+
+
+def sync_mirror_sync(full: bool = False, path: str | Path | None = None) -> dict:
+    """同步版本的 MaterialMirror(path).sync(full)"""
+    with MaterialMirror(path) as mirror:
+        return run_sync(mirror.sync(full=full))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MaterialHub 本地镜像")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_sync = sub.add_parser("sync", help="同步材料目录到本地")
+    p_sync.add_argument("--full", action="store_true", help="全量同步并清理已删除的文档")
+
+    p_search = sub.add_parser("search", help="在本地镜像中检索")
+    p_search.add_argument("query")
+    p_search.add_argument("--limit", type=int, default=20)
+
+    parser.add_argument("--db", help="数据库路径（默认 MATERIALHUB_CACHE_DIR/mirror.db）")
+    args = parser.parse_args()
+
+    with MaterialMirror(args.db) as mirror:
+        if args.command == "sync":
+            stats = run_sync(mirror.sync(full=args.full))
+            docs = stats["documents"]
+            print(f"文档: 新增 {docs['added']}，更新 {docs['updated']}，未变 {docs['unchanged']}，"
+                  f"删除 {docs['removed']}（共 {stats['total_documents']}，{MODE_LABELS[stats['mode']]}）")
+            print(f"文档类型 {stats['doc_types']}，文件夹 {stats['folders']}，实体 {stats['entities']}")
+        else:
+            for doc in mirror.search(args.query, args.limit):
+                entities = ", ".join(doc.get("entity_names") or [])
+                print(f"[{doc['id']}] {doc.get('title', '')}  {entities}")
+
+
+if __name__ == "__main__":
+    main()
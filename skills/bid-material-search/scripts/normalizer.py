@@ -0,0 +1,139 @@
+"""查询词归一化
+
+replace.py 的 remove_common_suffixes / extract_keywords / expand_abbreviation /
+apply_synonyms 原先每次调用都重建短语表和字典、用字符串模式 re.search，并在
+Python 循环里逐个 str.replace。QueryNormalizer 在构造时一次性准备好：
+
+- 短语、简称、同义词表各编译成一条交替正则（长词在前），一次扫描完成全部替换/删除
+- 后缀表存成元组，先用 str.endswith(元组) 一次判断，绝大多数查询不再逐个比较；
+  命中时仍按表顺序逐个剥离，结果与原先一致（锚定末尾的交替正则要回溯，实测反而更慢）
+- 标准号、CMMI、去数字/括号的正则在构造时编译
+
+replace.py 中的同名函数委托给模块级的 DEFAULT_NORMALIZER，行为保持不变；
+批量规划（replace_all_placeholders）用 normalize_many 一次归一化全部占位符。
+"""
+
+import re
+from typing import Dict, Iterable, List
+
+# 占位符里描述材料形态而非材料本身的短语
+DESCRIPTIVE_PHRASES = [
+    '正反面', '扫描件', '复印件', '副本', '原件', '电子件',
+    '（如需要）', '(如需要)', '近三个月内', '有效期内',
+]
+
+# 常见后缀，按顺序逐个剥离（先剥「认证证书」，再剥「证书」……）
+COMMON_SUFFIXES = ['认证证书', '证书', '认证', '证明', '文件', '材料', '附件']
+
+ABBREVIATIONS = {
+    '财审': '财务审计报告',
+    '营执': '营业执照',
+    '等保': '信息系统安全等级保护',
+    '软著': '软件著作权',
+    '社保': '社会保险',
+    '高企': '高新技术企业',
+}
+
+SYNONYMS = {
+    '委托代理人': ['委托人', '代理人'],
+    '法定代表人': ['法人', '法人代表', '法定代表'],
+    '项目经理': ['项目负责人', '经理'],
+    '团队成员': ['成员', '人员'],
+}
+
+
+
+def _alternation(words: Iterable[str]) -> re.Pattern:
+    """把词表编译成一条交替正则，长词在前保证最长匹配"""
+    return re.compile('|'.join(re.escape(w) for w in sorted(words, key=len, reverse=True)))
+
+
+class QueryNormalizer:
+    """查询词归一化器，构造时编译全部词表
+
+    Args:
+        phrases: 描述性短语（直接删除）
+        suffixes: 常见后缀（按顺序从末尾剥离）
+        abbreviations: 简称 → 全称
+        synonyms: 词 → 同义词列表
+    """
+
+    def __init__(
+        self,
+        phrases: List[str] = DESCRIPTIVE_PHRASES,
+        suffixes: List[str] = COMMON_SUFFIXES,
+        abbreviations: Dict[str, str] = ABBREVIATIONS,
+        synonyms: Dict[str, List[str]] = SYNONYMS,
+    ):
+        self.abbreviations = dict(abbreviations)
+        self.synonyms = {k: list(v) for k, v in synonyms.items()}
+
+        self.suffixes = tuple(suffixes)
+
+        self._phrase_re = _alternation(phrases)
+        self._abbr_re = _alternation(self.abbreviations)
+        self._synonym_re = _alternation(self.synonyms)
+        self._iso_re = re.compile(r'ISO[/\s]?(?:IEC)?[\s]?(\d+)', re.IGNORECASE)
+        self._cmmi_re = re.compile(r'CMMI[\s]?(\d+)', re.IGNORECASE)
+        self._keyword_strip_re = re.compile(r'[（）()【】\[\]0-9一二三四五六七八九十]+')
+
+    def strip_descriptive_phrases(self, text: str) -> str:
+        """去除描述性短语（扫描件、复印件、正反面等）"""
+        return self._phrase_re.sub('', text).strip()
+
+    def remove_common_suffixes(self, text: str) -> str:
+        """去除描述性短语和常见后缀"""
+        result = self._phrase_re.sub('', text)
+        if result.endswith(self.suffixes):
+            for suffix in self.suffixes:
+                if result.endswith(suffix):
+                    result = result[:-len(suffix)]
+        return result.strip()
+
+    def expand_abbreviation(self, query: str) -> str:
+        """展开简称"""
+        return self._abbr_re.sub(lambda m: self.abbreviations[m.group(0)], query)
+
+    def apply_synonyms(self, query: str) -> List[str]:
+        """返回原词和同义词变体（按同义词表顺序）"""
+        found = set(self._synonym_re.findall(query))
+        result = [query]
+        for key, syn_list in self.synonyms.items():
+            if key in found:
+                result.extend(query.replace(key, syn) for syn in syn_list)
+        return result
+
+    def extract_keywords(self, query: str) -> List[str]:
+        """提取标准号、CMMI 等级和去掉数字/括号后的主要名词"""
+        keywords = []
+        iso_match = self._iso_re.search(query)
+        if iso_match:
+            keywords.append(iso_match.group(1))
+            keywords.append(f'ISO {iso_match.group(1)}')
+        cmmi_match = self._cmmi_re.search(query)
+        if cmmi_match:
+            keywords.append(f'CMMI{cmmi_match.group(1)}')
+            keywords.append(f'CMMI {cmmi_match.group(1)}')
+        clean = self._keyword_strip_re.sub('', query).strip()
+        if clean:
+            keywords.append(clean)
+        return keywords
+
+    def normalize(self, query: str) -> str:
+        """展开简称、去除描述词/后缀并转小写，作为搜索缓存的键"""
+        expanded = self.expand_abbreviation(query.strip())
+        normalized = self.remove_common_suffixes(expanded)
+        return (normalized or expanded).lower()
+
+    def normalize_many(self, queries: Iterable[str]) -> List[str]:
+        """批量归一化，重复的查询词只计算一次"""
+        memo: Dict[str, str] = {}
+        result = []
+        for q in queries:
+            if q not in memo:
+                memo[q] = self.normalize(q)
+            result.append(memo[q])
+        return result
+
+
+DEFAULT_NORMALIZER = QueryNormalizer()
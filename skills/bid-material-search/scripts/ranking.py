@@ -0,0 +1,170 @@
+"""占位符 → 材料的本地排序索引
+
+smart_search 的回退链依赖服务端子串搜索和手写的简称/同义词表，没命中时要把
+所有回退查询词逐个请求一遍。RankingIndex 在本地镜像（mirror.py）的材料目录上
+一次性建立字符 n-gram 倒排索引，用 BM25 打分：
+
+- 标题、文档类型、文件夹名、关联实体名切成 1~3 字的 n-gram，中文无需分词，
+  「ISO9001认证」与「ISO 9001 质量管理体系认证证书」天然有大量公共 n-gram
+- 倒排表按词项存成 CSC 风格的 NumPy 数组（ptr / doc / weight），BM25 权重建索引时预先算好；
+  查询时把所有查询词项的倒排段拼起来，一次 np.bincount 得到全部文档得分
+- 一次查询直接返回带分数的 top-k，不再逐个尝试回退查询词
+
+需要 NumPy（pip install numpy）；未安装时构造 RankingIndex 会报错，
+replace 的其余功能不受影响。NumPy 在首次建索引时才导入，import replace 不为它付费。
+"""
+
+import importlib.util
+import re
+import unicodedata
+from collections import Counter
+from typing import Dict, Iterable, List
+
+HAS_NUMPY = importlib.util.find_spec("numpy") is not None
+
+NGRAM_SIZES = (1, 2, 3)
+
+# 字段权重：标题最能代表材料，计两次词频
+FIELD_WEIGHTS = {"title": 2, "doc_type": 1, "folder": 1, "entities": 1}
+
+# 相对得分（得分 / 查询自身的理想得分）低于该值视为不相关；
+# 按 benchmarks/data/placeholder_pairs.json 的正负样本标定
+MIN_SCORE = 0.2
+
+_STRIP_RE = re.compile(r"[\W_]+")
+
+
+def normalize_text(text: str) -> str:
+    """全角转半角、小写、去掉空白和标点"""
+    return _STRIP_RE.sub("", unicodedata.normalize("NFKC", text or "").lower())
+
+
+def char_ngrams(text: str, sizes: Iterable[int] | None = None) -> List[str]:
+    """字符 n-gram（text 需已归一化），默认 NGRAM_SIZES"""
+    grams = []
+    for n in sizes or NGRAM_SIZES:
+        grams.extend(text[i:i + n] for i in range(len(text) - n + 1))
+    return grams
+
+
+def _doc_fields(doc: dict) -> Dict[str, str]:
+    return {
+        "title": doc.get("title", ""),
+        "doc_type": (doc.get("doc_type") or {}).get("name", ""),
+        "folder": (doc.get("folder") or {}).get("name", ""),
+        "entities": " ".join(doc.get("entity_names") or []),
+    }
+
+
+class RankingIndex:
+    """材料目录上的字符 n-gram BM25 索引
+
+    Args:
+        documents: 材料列表（结构同 search_materials / MaterialMirror.all_documents 的返回）
+        k1, b: BM25 参数
+    """
+
+    def __init__(self, documents: List[Dict], k1: float = 1.2, b: float = 0.75):
+        if not HAS_NUMPY:
+            raise RuntimeError("RankingIndex 需要 NumPy: pip install numpy")
+        import numpy as np
+        self.documents = list(documents)
+        self.k1 = k1
+        self.b = b
+        self.vocab: Dict[str, int] = {}
+
+        term_ids, doc_ids, tfs = [], [], []
+        lengths = np.zeros(len(self.documents), dtype=np.float64)
+        for d, doc in enumerate(self.documents):
+            counts: Counter = Counter()
+            for field, text in _doc_fields(doc).items():
+                for gram in char_ngrams(normalize_text(text)):
+                    counts[gram] += FIELD_WEIGHTS[field]
+            lengths[d] = sum(counts.values())
+            for gram, tf in counts.items():
+                term_ids.append(self.vocab.setdefault(gram, len(self.vocab)))
+                doc_ids.append(d)
+                tfs.append(tf)
+
+        n_docs, n_terms = len(self.documents), len(self.vocab)
+        term_ids = np.asarray(term_ids, dtype=np.int64)
+        doc_ids = np.asarray(doc_ids, dtype=np.int64)
+        tfs = np.asarray(tfs, dtype=np.float64)
+
+        # 按词项排序成 CSC：词项 t 的倒排段为 [ptr[t], ptr[t+1])
+        order = np.argsort(term_ids, kind="stable")
+        df = np.bincount(term_ids, minlength=n_terms)
+        self.ptr = np.concatenate(([0], np.cumsum(df)))
+        self.doc = doc_ids[order]
+
+        avgdl = lengths.mean() if n_docs else 1.0
+        self.idf = np.log1p((n_docs - df + 0.5) / (df + 0.5))
+        tf = tfs[order]
+        norm = k1 * (1 - b + b * lengths[self.doc] / avgdl)
+        self.weight = np.repeat(self.idf, df) * tf * (k1 + 1) / (tf + norm)
+
+    @classmethod
+    def from_mirror(cls, mirror, **kwargs) -> "RankingIndex":
+        """用本地镜像中的全部材料建索引"""
+        return cls(mirror.all_documents(), **kwargs)
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def scores(self, query: str) -> "np.ndarray":
+        """返回每个文档的相对得分（得分 / 查询的理想得分，约在 0~1 之间）"""
+        import numpy as np
+        grams = char_ngrams(normalize_text(query))
+        counts = Counter(self.vocab[g] for g in grams if g in self.vocab)
+        if not counts:
+            return np.zeros(len(self.documents))
+        # 目录中没出现过的查询词项不贡献得分，但计入理想得分（按 df=0 的 idf），
+        # 否则「人员花名册」只剩「人员」一个已知词项，相对得分会被虚高
+        unknown = len(grams) - sum(counts.values())
+        terms = np.fromiter(counts.keys(), dtype=np.int64)
+        qtf = np.fromiter(counts.values(), dtype=np.float64)
+
+        # 拼接所有查询词项的倒排段，一次 bincount 累加
+        starts, ends = self.ptr[terms], self.ptr[terms + 1]
+        seg_len = ends - starts
+        idx = np.repeat(starts - np.cumsum(seg_len) + seg_len, seg_len) + np.arange(seg_len.sum())
+        scores = np.bincount(
+            self.doc[idx], weights=self.weight[idx] * np.repeat(qtf, seg_len),
+            minlength=len(self.documents),
+        )
+        # 理想得分：查询词项在某文档中词频饱和时的上界
+        unseen_idf = np.log1p((len(self.documents) + 0.5) / 0.5)
+        ideal = float(((self.idf[terms] * qtf).sum() + unknown * unseen_idf) * (self.k1 + 1))
+        return scores / ideal
+
+    def search(
+        self,
+        query: str,
+        limit: int = 5,
+        min_score: float = MIN_SCORE,
+        relative_cutoff: float | None = None,
+    ) -> List[Dict]:
+        """返回得分最高的 limit 个材料，每项为材料字典附加 "score" 键
+
+        Args:
+            query: 查询词（占位符中的材料描述）
+            limit: 返回数量上限
+            min_score: 相对得分下限，低于该值视为不相关
+            relative_cutoff: 只保留得分不低于「最高分 × relative_cutoff」的候选，
+                用于区分明确命中与近似并列（歧义）
+        """
+        import numpy as np
+        if not self.documents:
+            return []
+        scores = self.scores(query)
+        k = min(limit, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+
+        floor = min_score
+        if relative_cutoff and len(top):
+            floor = max(floor, scores[top[0]] * relative_cutoff)
+        return [
+            {**self.documents[i], "score": round(float(scores[i]), 4)}
+            for i in top if scores[i] >= floor
+        ]
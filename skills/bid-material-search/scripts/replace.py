@@ -3,20 +3,30 @@
 扫描 Markdown 文件，替换【此处插入XX扫描件】占位符为实际图片引用。
 """
 
+import hashlib
 import os
 import re
-import httpx
 from pathlib import Path
 from typing import Any, List, Dict
 
+import config
 import search
 import watermark
+from cache import SearchCache
+from image_store import ImageStore, store_key, stream_download
+from mirror import MaterialMirror
+from normalizer import DEFAULT_NORMALIZER
+from ranking import RankingIndex
+from runner import run_sync
+from tracing import Tracer, format_summary
 
-# Load configuration
-from config import API_BASE, API_TOKEN
+
+# 智能搜索策略（词表与编译好的正则见 normalizer.py）
+def strip_descriptive_phrases(text: str) -> str:
+    """去除描述性短语（扫描件、复印件、正反面等）"""
+    return DEFAULT_NORMALIZER.strip_descriptive_phrases(text)
 
 
-# 智能搜索策略
 def remove_common_suffixes(text: str) -> str:
     """去除常见后缀和描述词
 
@@ -26,24 +36,7 @@ def remove_common_suffixes(text: str) -> str:
     Returns:
         去除后缀后的文本
     """
-    # 阶段1：去除描述性短语
-    descriptive_phrases = [
-        '正反面', '扫描件', '复印件', '副本', '原件', '电子件',
-        '（如需要）', '(如需要)', '近三个月内', '有效期内',
-    ]
-    result = text
-    for phrase in descriptive_phrases:
-        result = result.replace(phrase, '')
-
-    # 阶段2：去除常见后缀
-    suffixes = [
-        '认证证书', '证书', '认证', '证明', '文件', '材料', '附件'
-    ]
-    for suffix in suffixes:
-        if result.endswith(suffix):
-            result = result[:-len(suffix)]
-
-    return result.strip()
+    return DEFAULT_NORMALIZER.remove_common_suffixes(text)
 
 
 def extract_keywords(query: str) -> List[str]:
@@ -57,26 +50,7 @@ def extract_keywords(query: str) -> List[str]:
     Returns:
         关键词列表
     """
-    keywords = []
-
-    # ISO 标准号（如 ISO 27001, ISO/IEC 27001）
-    iso_match = re.search(r'ISO[/\s]?(?:IEC)?[\s]?(\d+)', query, re.IGNORECASE)
-    if iso_match:
-        keywords.append(iso_match.group(1))  # 只提取数字
-        keywords.append(f'ISO {iso_match.group(1)}')
-
-    # CMMI 等级
-    cmmi_match = re.search(r'CMMI[\s]?(\d+)', query, re.IGNORECASE)
-    if cmmi_match:
-        keywords.append(f'CMMI{cmmi_match.group(1)}')
-        keywords.append(f'CMMI {cmmi_match.group(1)}')
-
-    # 去掉数字、括号等，提取主要名词
-    clean = re.sub(r'[（）()【】\[\]0-9一二三四五六七八九十]+', '', query)
-    if clean.strip():
-        keywords.append(clean.strip())
-
-    return keywords
+    return DEFAULT_NORMALIZER.extract_keywords(query)
 
 
 def expand_abbreviation(query: str) -> str:
@@ -90,20 +64,7 @@ def expand_abbreviation(query: str) -> str:
     Returns:
         扩展后的查询词
     """
-    abbreviations = {
-        '财审': '财务审计报告',
-        '营执': '营业执照',
-        '等保': '信息系统安全等级保护',
-        '软著': '软件著作权',
-        '社保': '社会保险',
-        '高企': '高新技术企业',
-    }
-
-    for abbr, full in abbreviations.items():
-        if abbr in query:
-            query = query.replace(abbr, full)
-
-    return query
+    return DEFAULT_NORMALIZER.expand_abbreviation(query)
 
 
 def apply_synonyms(query: str) -> List[str]:
@@ -117,24 +78,41 @@ def apply_synonyms(query: str) -> List[str]:
     Returns:
         包含原词和同义词的列表
     """
-    result = [query]
+    return DEFAULT_NORMALIZER.apply_synonyms(query)
 
-    synonyms = {
-        '委托代理人': ['委托人', '代理人'],
-        '法定代表人': ['法人', '法人代表', '法定代表'],
-        '项目经理': ['项目负责人', '经理'],
-        '团队成员': ['成员', '人员'],
-    }
 
-    for key, syn_list in synonyms.items():
-        if key in query:
-            for syn in syn_list:
-                result.append(query.replace(key, syn))
+# 排序检索时，得分不低于最高分该比例的候选视为并列（歧义），其余丢弃
+RANK_TIE_RATIO = 0.85
+
+
+def rank_query(index: RankingIndex, query: str, limit: int = 5) -> List[Dict]:
+    """用本地排序索引一次检索：展开简称、去掉描述性短语后打分，只保留与最高分接近的候选"""
+    query = strip_descriptive_phrases(expand_abbreviation(query))
+    return index.search(query, limit=limit, relative_cutoff=RANK_TIE_RATIO)
+
+
+def normalize_query(query: str) -> str:
+    """查询词归一化，作为搜索缓存的键
+
+    展开简称并去除描述词/后缀，使「营业执照扫描件」「营执」「营业执照」
+    落到同一个键上。
 
-    return result
+    Args:
+        query: 原始查询词
+
+    Returns:
+        归一化后的查询词
+    """
+    return DEFAULT_NORMALIZER.normalize(query)
 
 
-async def smart_search(query: str, limit: int = 5) -> List[Dict]:
+async def smart_search(
+    query: str,
+    limit: int = 5,
+    cache: SearchCache | None = None,
+    mirror: MaterialMirror | None = None,
+    index: RankingIndex | None = None,
+) -> List[Dict]:
     """智能搜索材料
 
     实现多级回退搜索策略：
@@ -147,10 +125,32 @@ async def smart_search(query: str, limit: int = 5) -> List[Dict]:
     Args:
         query: 原始查询词
         limit: 返回数量上限
+        cache: 搜索结果缓存（按归一化查询词命中，重复占位符不再走回退链）
+        mirror: 本地镜像（见 mirror.py）；传入时回退链在本地检索，不请求服务端
+        index: 本地排序索引（见 ranking.py）；传入时不走回退链，一次打分返回带 score 的候选
 
     Returns:
         搜索结果列表
     """
+    cache_key = f"{limit}:{normalize_query(query)}"
+    if index is not None:
+        cache_key = f"rank:{cache_key}"
+    if cache is not None:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    if index is not None:
+        results = rank_query(index, query, limit)
+    else:
+        results = await _smart_search_uncached(query, limit, mirror)
+    if cache is not None:
+        cache.set(cache_key, results)
+    return results
+
+
+async def _smart_search_uncached(query: str, limit: int, mirror: MaterialMirror | None = None) -> List[Dict]:
+    """smart_search 的实际回退链，不经过缓存"""
     # 策略1: 展开简称
     expanded_query = expand_abbreviation(query)
 
@@ -181,7 +181,10 @@ async def smart_search(query: str, limit: int = 5) -> List[Dict]:
 
     # 逐个尝试
     for i, q in enumerate(unique_queries):
-        results = await search.search_materials(query=q, limit=limit)
+        if mirror is not None:
+            results = mirror.search(q, limit=limit)
+        else:
+            results = await search.search_materials(query=q, limit=limit)
         if results:
             if i > 0:
                 # 记录使用了哪个查询词成功
@@ -193,7 +196,7 @@ async def smart_search(query: str, limit: int = 5) -> List[Dict]:
 
 
 async def download_image(url: str, output_path: str) -> bool:
-    """下载图片
+    """下载图片（分块流式写盘）
 
     Args:
         url: 图片 URL（可以是相对路径或绝对路径）
@@ -203,26 +206,8 @@ async def download_image(url: str, output_path: str) -> bool:
         是否成功下载
     """
     try:
-        # Handle relative URLs
-        if url.startswith("/"):
-            url = f"{API_BASE}{url}"
-
-        headers = {}
-        if API_TOKEN:
-            headers["Authorization"] = f"Bearer {API_TOKEN}"
-
-        async with httpx.AsyncClient(timeout=60) as client:
-            resp = await client.get(url, headers=headers)
-            resp.raise_for_status()
-
-            # Ensure output directory exists
-            Path(output_path).parent.mkdir(parents=True, exist_ok=True)
-
-            # Write file
-            with open(output_path, "wb") as f:
-                f.write(resp.content)
-
-            return True
+        await stream_download(url, output_path)
+        return True
     except Exception as e:
         print(f"下载图片失败: {e}")
         return False
@@ -235,6 +220,10 @@ async def replace_placeholder(
     project_name: str = "",
     output_dir: str = "响应文件",
     auto_mode: bool = False,
+    cache: SearchCache | None = None,
+    store: ImageStore | None = None,
+    mirror: MaterialMirror | None = None,
+    index: RankingIndex | None = None,
 ) -> dict:
     """替换单个占位符
 
@@ -248,6 +237,10 @@ async def replace_placeholder(
             多个匹配结果时按相关度取第一个但在返回结果中明确标注 ambiguous=True，
             供上游质检环节（bid-assembly）复核；非自动模式下应返回候选列表交由
             调用方（Claude）向用户提问后再次调用并指定 doc_id）
+        cache: 搜索结果缓存（批量替换时由 replace_all_placeholders 传入）
+        store: 图片本地存储（为 None 时使用默认目录下的 ImageStore）
+        mirror: 本地镜像（见 mirror.py）；传入时在本地检索匹配材料
+        index: 本地排序索引（见 ranking.py）；传入时按 BM25 得分一次检索
 
     Returns:
         {
@@ -259,7 +252,7 @@ async def replace_placeholder(
         }
     """
     # 1. 智能搜索文档（使用多级回退策略）
-    results = await smart_search(query=query, limit=5)
+    results = await smart_search(query=query, limit=5, cache=cache, mirror=mirror, index=index)
     if not results:
         return {"success": False, "message": f"未找到匹配 '{query}' 的材料"}
 
@@ -299,7 +292,7 @@ async def replace_placeholder(
 
     return await _replace_with_document(
         target_file, placeholder, doc_id, doc_title, project_name, output_dir,
-        ambiguous=ambiguous_flag, ambiguous_note=ambiguous_note,
+        ambiguous=ambiguous_flag, ambiguous_note=ambiguous_note, store=store,
     )
 
 
@@ -335,6 +328,7 @@ async def _replace_with_document(
     ambiguous: bool = False,
     ambiguous_note: str | None = None,
     detail: dict | None = None,
+    store: ImageStore | None = None,
 ) -> dict:
     """内部函数：给定确定的 doc_id，完成图片下载、水印、占位符替换"""
     # 2. 获取文档详情
@@ -384,29 +378,43 @@ async def _replace_with_document(
     if not image_file:
         return {"success": False, "message": "文档没有图片附件（无原始图片或提取页面）"}
 
-    # 4. 下载图片
+    # 4. 下载图片（经本地存储去重，同一附件只下载一次）
     image_url = image_file.get("url")
-    filename = image_file.get("filename", f"material_{doc_id}.png")
-
-    # 保存图片
+    # 输出文件名带上文档 id，避免不同材料的同名附件互相覆盖
+    filename = f"{doc_id}_{image_file.get('filename') or f'material_{doc_id}.png'}"
     output_path = os.path.join(output_dir, filename)
-    success = await download_image(image_url, output_path)
-    if not success:
+
+    if store is None:
+        store = ImageStore()
+    try:
+        stored = await store.fetch(
+            image_url, store_key(doc_id, current_revision, image_file), filename,
+        )
+    except Exception as e:
+        print(f"下载图片失败: {e}")
         return {"success": False, "message": "下载图片失败"}
 
-    # 5. 添加水印（如果有项目名称）
+    # 5. 添加水印（如果有项目名称）：水印图由存储中的原图派生并缓存，
+    # 原图保持不动，重跑不会叠加水印
+    source = stored
     if project_name:
         try:
-            output_path = watermark.add_watermark(
-                output_path,
-                output_path,  # 覆盖原图
+            source = watermark.add_watermark_cached(
+                stored,
+                None,
                 watermark_text=project_name,
+                cache_dir=store.watermark_dir,
                 position="bottom_right",
                 opacity=128,
                 font_size=20,
+                **watermark.DOCX_ENCODING,
             )
         except Exception as e:
             print(f"添加水印失败: {e}")
+    try:
+        ImageStore.materialize(source, output_path)
+    except OSError as e:
+        return {"success": False, "message": f"写入图片失败: {e}"}
 
     # 6. 更新 Markdown 文件
     try:
@@ -432,10 +440,25 @@ async def _replace_with_document(
         return {"success": False, "message": f"更新文件失败: {e}"}
 
 
+def run_state_dir(directory: str | Path) -> Path:
+    """批量替换的运行状态目录（搜索缓存、请求追踪），按响应文件目录的绝对路径区分
+
+    位于 MATERIALHUB_CACHE_DIR/runs/ 下，不写入要提交的响应文件目录。
+    """
+    path = Path(directory).resolve()
+    digest = hashlib.sha256(str(path).encode("utf-8")).hexdigest()[:12]
+    return Path(config.MATERIAL_CACHE_DIR) / "runs" / f"{path.name}-{digest}"
+
+
 async def replace_all_placeholders(
     directory: str = "响应文件",
     project_name: str = "",
     auto_mode: bool = True,
+    use_cache: bool = True,
+    persist_cache: bool = True,
+    use_mirror: bool = False,
+    use_ranking: bool = False,
+    trace: bool = True,
 ) -> dict:
     """批量替换所有占位符
 
@@ -449,6 +472,17 @@ async def replace_all_placeholders(
             汇总到 ambiguous_count，供质检环节（bid-assembly）复核；
             如需交互式逐一确认，调用方应改用 replace_placeholder（auto_mode=False）
             单独处理每个占位符
+        use_cache: 是否按归一化查询词缓存搜索结果（同一材料只搜一次）
+        persist_cache: 是否把缓存写入 run_state_dir(directory)/search_cache.json
+            （MATERIALHUB_CACHE_DIR 下，不进入响应文件目录），
+            供 TTL（MATERIALHUB_SEARCH_CACHE_TTL，默认 30 分钟）内的重跑复用
+        use_mirror: 在本地镜像中检索材料（需先运行 `python scripts/mirror.py sync`），
+            占位符匹配不再请求服务端；图片下载仍走 ImageStore
+        use_ranking: 在本地镜像上建 RankingIndex（字符 n-gram BM25，需要 NumPy），
+            每个占位符一次打分取候选，不再逐个尝试回退查询词；隐含 use_mirror=True
+        trace: 把每个 MaterialHub 请求（接口、状态码、耗时、字节数、重试次数）和每个占位符
+            查询的耗时逐行写入运行状态目录下的 materialhub_trace.jsonl（见 run_state_dir、tracing.py）；
+            无论是否写文件，返回值的 trace 都带汇总
 
     Returns:
         {
@@ -457,6 +491,8 @@ async def replace_all_placeholders(
             "failed_count": int,
             "ambiguous_count": int,  # 存疑替换数量，需人工复核
             "expiry_warning_count": int,  # 过期/临期材料数量，需人工复核
+            "search_cache": {"hits": int, "misses": int, "hit_rate": float, ...},
+            "trace": {"calls": int, "total_ms": float, "endpoints": {...}, "slowest_queries": [...], ...},
             "details": [...]
         }
     """
@@ -469,80 +505,115 @@ async def replace_all_placeholders(
     if not md_files:
         return {"success": False, "message": f"目录 {directory} 下没有 .md 文件"}
 
-    # 占位符正则表达式
-    placeholder_pattern = r"【此处插入(.+?)(扫描件)?】"
-
-    replaced_count = 0
-    failed_count = 0
-    ambiguous_count = 0
-    expiry_warning_count = 0
-    details = []
-
-    for md_file in md_files:
-        try:
-            with open(md_file, "r", encoding="utf-8") as f:
-                content = f.read()
-
-            # 查找所有占位符
-            placeholders = re.findall(placeholder_pattern, content)
-            if not placeholders:
-                continue
-
-            print(f"\n处理文件: {md_file}")
-            print(f"找到 {len(placeholders)} 个占位符")
-
-            for match in placeholders:
-                material_name = match[0].strip()
-                full_placeholder = f"【此处插入{match[0]}{match[1]}】"
-
-                print(f"  替换: {full_placeholder} (查询: {material_name})")
-
-                result = await replace_placeholder(
-                    target_file=str(md_file),
-                    placeholder=full_placeholder,
-                    query=material_name,
-                    project_name=project_name,
-                    output_dir=directory,
-                    auto_mode=auto_mode,
-                )
-
-                if result["success"]:
-                    replaced_count += 1
-                    if result.get("ambiguous"):
-                        ambiguous_count += 1
-                    if result.get("expiry_warning"):
-                        expiry_warning_count += 1
-                    details.append({
-                        "file": str(md_file),
-                        "placeholder": full_placeholder,
-                        "query": material_name,
-                        "status": "success",
-                        "image": result.get("image_path"),
-                        "ambiguous": result.get("ambiguous", False),
-                        "ambiguous_note": result.get("ambiguous_note"),
-                        "expiry_warning": result.get("expiry_warning"),
-                    })
-                    print(f"    ✓ 成功")
-                    if result.get("ambiguous_note"):
-                        print(f"    ⚠️ {result['ambiguous_note']}")
-                    if result.get("expiry_warning"):
-                        print(f"    {result['expiry_warning']}")
-                else:
-                    failed_count += 1
-                    details.append({
-                        "file": str(md_file),
-                        "placeholder": full_placeholder,
-                        "query": material_name,
-                        "status": "failed",
-                        "error": result.get("message"),
-                        "ambiguous": result.get("ambiguous", False),
-                        "candidates": result.get("candidates"),
-                    })
-                    print(f"    ✗ 失败: {result.get('message')}")
-
-        except Exception as e:
-            print(f"处理文件 {md_file} 失败: {e}")
-            failed_count += 1
+    store = ImageStore()
+    mirror = MaterialMirror() if use_mirror or use_ranking else None
+    tracer = None
+    try:
+        index = RankingIndex.from_mirror(mirror) if use_ranking else None
+        cache = None
+        if use_cache:
+            cache_path = run_state_dir(directory) / "search_cache.json" if persist_cache else None
+            cache = SearchCache(cache_path)
+        tracer = Tracer(run_state_dir(directory) / "materialhub_trace.jsonl" if trace else None)
+
+        # 占位符正则表达式
+        placeholder_pattern = r"【此处插入(.+?)(扫描件)?】"
+
+        replaced_count = 0
+        failed_count = 0
+        ambiguous_count = 0
+        expiry_warning_count = 0
+        details = []
+
+        for md_file in md_files:
+            try:
+                with open(md_file, "r", encoding="utf-8") as f:
+                    content = f.read()
+
+                # 查找所有占位符
+                placeholders = re.findall(placeholder_pattern, content)
+                if not placeholders:
+                    continue
+
+                # 同一材料的不同写法（营执 / 营业执照扫描件）归一化后只算一种
+                materials = DEFAULT_NORMALIZER.normalize_many(m[0].strip() for m in placeholders)
+                print(f"\n处理文件: {md_file}")
+                print(f"找到 {len(placeholders)} 个占位符（{len(set(materials))} 种材料）")
+
+                for match in placeholders:
+                    material_name = match[0].strip()
+                    full_placeholder = f"【此处插入{match[0]}{match[1]}】"
+
+                    print(f"  替换: {full_placeholder} (查询: {material_name})")
+
+                    async with tracer.query(material_name, file=str(md_file)) as traced:
+                        result = await replace_placeholder(
+                            target_file=str(md_file),
+                            placeholder=full_placeholder,
+                            query=material_name,
+                            project_name=project_name,
+                            output_dir=directory,
+                            auto_mode=auto_mode,
+                            cache=cache,
+                            store=store,
+                            mirror=mirror,
+                            index=index,
+                        )
+                        traced["status"] = "success" if result["success"] else "failed"
+
+                    if result["success"]:
+                        replaced_count += 1
+                        if result.get("ambiguous"):
+                            ambiguous_count += 1
+                        if result.get("expiry_warning"):
+                            expiry_warning_count += 1
+                        details.append({
+                            "file": str(md_file),
+                            "placeholder": full_placeholder,
+                            "query": material_name,
+                            "status": "success",
+                            "image": result.get("image_path"),
+                            "ambiguous": result.get("ambiguous", False),
+                            "ambiguous_note": result.get("ambiguous_note"),
+                            "expiry_warning": result.get("expiry_warning"),
+                        })
+                        print(f"    ✓ 成功")
+                        if result.get("ambiguous_note"):
+                            print(f"    ⚠️ {result['ambiguous_note']}")
+                        if result.get("expiry_warning"):
+                            print(f"    {result['expiry_warning']}")
+                    else:
+                        failed_count += 1
+                        details.append({
+                            "file": str(md_file),
+                            "placeholder": full_placeholder,
+                            "query": material_name,
+                            "status": "failed",
+                            "error": result.get("message"),
+                            "ambiguous": result.get("ambiguous", False),
+                            "candidates": result.get("candidates"),
+                        })
+                        print(f"    ✗ 失败: {result.get('message')}")
+
+            except Exception as e:
+                print(f"处理文件 {md_file} 失败: {e}")
+                failed_count += 1
+    finally:
+        # 中途抛出异常时同样关闭 SQLite 连接和追踪文件（已写入的追踪记录保留，便于排查）
+        if mirror is not None:
+            mirror.close()
+        if tracer is not None:
+            tracer.close()
+
+    trace_summary = tracer.summary()
+    print(f"\n{format_summary(trace_summary)}")
+
+    cache_stats = None
+    if cache is not None:
+        cache.save()
+        cache_stats = cache.stats()
+        print(f"\n搜索缓存: 命中 {cache_stats['hits']} / 未命中 {cache_stats['misses']}"
+              f"（命中率 {cache_stats['hit_rate']:.0%}）")
 
     return {
         "success": True,
@@ -550,6 +621,9 @@ async def replace_all_placeholders(
         "failed_count": failed_count,
         "ambiguous_count": ambiguous_count,
         "expiry_warning_count": expiry_warning_count,
+        "search_cache": cache_stats,
+        "image_store": store.stats(),
+        "trace": trace_summary,
         "total_files": len(md_files),
         "details": details,
         "project_name": project_name,
@@ -559,17 +633,14 @@ async def replace_all_placeholders(
 # Sync wrappers
 def replace_placeholder_sync(*args, **kwargs) -> dict:
     """同步版本的 replace_placeholder"""
-    import asyncio
-    return asyncio.run(replace_placeholder(*args, **kwargs))
+    return run_sync(replace_placeholder(*args, **kwargs))
 
 
 def replace_placeholder_by_id_sync(*args, **kwargs) -> dict:
     """同步版本的 replace_placeholder_by_id"""
-    import asyncio
-    return asyncio.run(replace_placeholder_by_id(*args, **kwargs))
+    return run_sync(replace_placeholder_by_id(*args, **kwargs))
 
 
 def replace_all_placeholders_sync(*args, **kwargs) -> dict:
     """同步版本的 replace_all_placeholders"""
-    import asyncio
-    return asyncio.run(replace_all_placeholders(*args, **kwargs))
+    return run_sync(replace_all_placeholders(*args, **kwargs))
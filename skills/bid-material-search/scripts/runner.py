@@ -0,0 +1,170 @@
+"""同步包装器的后台事件循环
+
+各模块的 *_sync 包装器原先每次调用都 asyncio.run()：新建事件循环、新建 httpx 客户端、
+重新握手，调用结束再全部拆掉。Agent 在循环里逐个调用时，这部分开销占了大头。
+
+本模块提供一个长驻的后台线程，线程里跑一个持久事件循环并持有共享的 httpx.AsyncClient
+（连接池）：
+
+- run_sync(coro)：把协程提交到后台循环并阻塞等待结果，*_sync 包装器统一走这里
+- pooled_client()：在后台循环内返回共享客户端（连接复用），在其他循环里（如调用方
+  自己 asyncio.run 异步接口）退化为临时客户端，用完即关。超时统一为 DEFAULT_TIMEOUT，
+  需要更长超时的请求在请求上单独传 timeout
+- MaterialHubSession：上下文管理器，显式限定一组调用的循环与连接池生命周期；
+  会话栈是 contextvars 变量，只对进入会话的线程（或协程）生效
+
+    with MaterialHubSession() as hub:
+        for name in names:
+            results = hub.run(search_materials(query=name))
+"""
+
+import asyncio
+import atexit
+import contextlib
+import contextvars
+import threading
+from typing import Any, AsyncIterator, Awaitable, Dict, Tuple
+
+import httpx
+
+import config
+
+DEFAULT_TIMEOUT = 30
+
+
+class _LoopRunner:
+    """后台线程 + 持久事件循环 + 共享 httpx 客户端"""
+
+    def __init__(self, name: str = "materialhub-loop"):
+        self.loop = asyncio.new_event_loop()
+        # 按 API_BASE 各一个客户端：运行中修改 config.API_BASE 后的请求发往新地址
+        self.clients: Dict[str, httpx.AsyncClient] = {}
+        self._thread = threading.Thread(target=self._run_loop, name=name, daemon=True)
+        self._thread.start()
+        with _live_lock:
+            _live_runners[self.loop] = self
+
+    def _run_loop(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def get_client(self) -> httpx.AsyncClient:
+        """当前 config.API_BASE 的共享客户端，只能在本循环内使用（首次使用时创建）"""
+        base_url = config.API_BASE
+        client = self.clients.get(base_url)
+        if client is None:
+            client = self.clients[base_url] = httpx.AsyncClient(base_url=base_url, timeout=DEFAULT_TIMEOUT)
+        return client
+
+    def run(self, coro: Awaitable) -> Any:
+        """在后台循环上执行协程并阻塞等待结果"""
+        if not self._thread.is_alive():
+            raise RuntimeError("事件循环已关闭")
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self.loop:
+            # 在后台循环里同步等待自己会死锁
+            raise RuntimeError("不能在 MaterialHub 后台事件循环内调用同步接口，请直接 await 异步版本")
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    def close(self) -> None:
+        """关闭共享客户端并停止循环"""
+        if not self._thread.is_alive():
+            return
+
+        async def _shutdown():
+            clients, self.clients = list(self.clients.values()), {}
+            for client in clients:
+                await client.aclose()
+
+        asyncio.run_coroutine_threadsafe(_shutdown(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        with _live_lock:
+            _live_runners.pop(self.loop, None)
+        self.loop.close()
+
+
+_default_runner: _LoopRunner | None = None
+_default_lock = threading.Lock()
+# 当前线程 / 协程已进入的 MaterialHubSession（后进入的优先）；
+# 各线程的上下文互相独立，一个线程的会话不会接走另一个线程的调用
+_sessions: contextvars.ContextVar[Tuple[_LoopRunner, ...]] = contextvars.ContextVar(
+    "materialhub_sessions", default=()
+)
+# 所有未关闭的循环 → runner，供循环内的代码找到自己所在的 runner
+_live_runners: Dict[asyncio.AbstractEventLoop, _LoopRunner] = {}
+_live_lock = threading.Lock()
+
+
+def _current_runner() -> _LoopRunner:
+    global _default_runner
+    sessions = _sessions.get()
+    if sessions:
+        return sessions[-1]
+    with _default_lock:
+        if _default_runner is None:
+            _default_runner = _LoopRunner()
+            atexit.register(_default_runner.close)
+        return _default_runner
+
+
+def run_sync(coro: Awaitable) -> Any:
+    """同步执行协程：提交到当前会话（或默认）的后台事件循环"""
+    return _current_runner().run(coro)
+
+
+def _runner_for_running_loop() -> _LoopRunner | None:
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+    with _live_lock:
+        return _live_runners.get(loop)
+
+
+@contextlib.asynccontextmanager
+async def pooled_client() -> AsyncIterator[httpx.AsyncClient]:
+    """获取 MaterialHub 客户端（base_url 为调用时的 config.API_BASE）
+
+    在后台事件循环内返回共享客户端（不关闭，连接留在池中复用）；
+    否则新建一个临时客户端，退出时关闭。两者的超时都是 DEFAULT_TIMEOUT，
+    需要更长超时的请求（如大图下载、镜像同步）应在请求上单独传 timeout。
+    """
+    runner = _runner_for_running_loop()
+    if runner is not None:
+        yield runner.get_client()
+        return
+    async with httpx.AsyncClient(base_url=config.API_BASE, timeout=DEFAULT_TIMEOUT) as client:
+        yield client
+
+
+class MaterialHubSession:
+    """显式管理后台事件循环与连接池生命周期的会话
+
+    会话内的 *_sync 调用与 hub.run(...) 都提交到本会话的循环、复用本会话的连接池；
+    退出时关闭连接并停止循环。会话只对进入它的线程（或协程）生效，
+    其他线程中的调用仍走各自的会话或默认循环。
+    """
+
+    def __init__(self):
+        self._runner: _LoopRunner | None = None
+        self._token: contextvars.Token | None = None
+
+    def __enter__(self) -> "MaterialHubSession":
+        self._runner = _LoopRunner(name="materialhub-session")
+        self._token = _sessions.set((*_sessions.get(), self._runner))
+        return self
+
+    def __exit__(self, *exc) -> None:
+        _sessions.reset(self._token)
+        self._runner.close()
+        self._runner = self._token = None
+
+    def run(self, coro: Awaitable) -> Any:
+        """在会话的事件循环上执行协程并返回结果"""
+        if self._runner is None:
+            raise RuntimeError("会话未进入，请使用 with MaterialHubSession() as hub")
+        return self._runner.run(coro)
@@ -7,21 +7,23 @@ import httpx
 from typing import Any
 
 # Load configuration
-from config import API_BASE, API_TOKEN
+import config
+from runner import pooled_client, run_sync
+from tracing import traced_get
 
 
 def _headers() -> dict:
     """构建请求头"""
     h = {"Content-Type": "application/json"}
-    if API_TOKEN:
-        h["Authorization"] = f"Bearer {API_TOKEN}"
+    if config.API_TOKEN:
+        h["Authorization"] = f"Bearer {config.API_TOKEN}"
     return h
 
 
 async def _get(path: str, params: dict | None = None) -> Any:
     """发送 GET 请求到 MaterialHub API"""
-    async with httpx.AsyncClient(base_url=API_BASE, timeout=30) as client:
-        resp = await client.get(path, params=params, headers=_headers())
+    async with pooled_client() as client:
+        resp = await traced_get(client, path, params, _headers())
         resp.raise_for_status()
         return resp.json()
 
@@ -143,11 +145,9 @@ async def get_document_detail(document_id: int) -> dict | None:
 # Sync wrappers for easier use
 def search_materials_sync(*args, **kwargs) -> list[dict]:
     """同步版本的 search_materials"""
-    import asyncio
-    return asyncio.run(search_materials(*args, **kwargs))
+    return run_sync(search_materials(*args, **kwargs))
 
 
 def get_document_detail_sync(document_id: int) -> dict | None:
     """同步版本的 get_document_detail"""
-    import asyncio
-    return asyncio.run(get_document_detail(document_id))
+    return run_sync(get_document_detail(document_id))
@@ -8,33 +8,50 @@
 
 import os
 import re
-import httpx
 from pathlib import Path
 from typing import List, Dict, Optional
 
-from config import API_BASE, API_TOKEN
+import config
 import watermark
+from image_store import ImageStore, store_key, stream_download
+from mirror import MaterialMirror, iter_pages
+from runner import pooled_client, run_sync
+from tracing import traced_get
 
 
 def _headers() -> dict:
     """构建请求头"""
     h = {"Content-Type": "application/json"}
-    if API_TOKEN:
-        h["Authorization"] = f"Bearer {API_TOKEN}"
+    if config.API_TOKEN:
+        h["Authorization"] = f"Bearer {config.API_TOKEN}"
     return h
 
 
-async def get_all_materials(limit: int = 100) -> List[Dict]:
+async def get_all_materials(
+    limit: int | None = None,
+    mirror: Optional[MaterialMirror] = None,
+) -> List[Dict]:
     """获取MaterialHub中的所有材料列表
 
+    按页拉取直到取完（旧版只取第一页 100 条，大目录会被静默截断）。
+
+    Args:
+        limit: 最多返回多少条，None 表示全部
+        mirror: 本地镜像（见 mirror.py）；传入时直接读本地，不请求服务端
+
     Returns:
         材料列表，每个包含：id, title, doc_type, status等
     """
-    async with httpx.AsyncClient(base_url=API_BASE, timeout=30) as client:
-        resp = await client.get("/api/v2/documents/", params={"limit": limit}, headers=_headers())
-        resp.raise_for_status()
-        data = resp.json()
-        return data.get("results", [])
+    if mirror is not None:
+        return mirror.all_documents(limit)
+
+    materials: List[Dict] = []
+    async with pooled_client() as client:
+        async for page in iter_pages(client, "/api/v2/documents/"):
+            materials.extend(page)
+            if limit is not None and len(materials) >= limit:
+                return materials[:limit]
+    return materials
 
 
 async def get_material_detail(material_id: int) -> Optional[Dict]:
@@ -43,27 +60,17 @@ async def get_material_detail(material_id: int) -> Optional[Dict]:
     Returns:
         材料详情，包含files等信息
     """
-    async with httpx.AsyncClient(base_url=API_BASE, timeout=30) as client:
-        resp = await client.get(f"/api/v2/documents/{material_id}", headers=_headers())
+    async with pooled_client() as client:
+        resp = await traced_get(client, f"/api/v2/documents/{material_id}", headers=_headers())
         resp.raise_for_status()
         return resp.json()
 
 
 async def download_image(url: str, output_path: str) -> bool:
-    """下载图片"""
+    """下载图片（分块流式写盘）"""
     try:
-        if url.startswith("/"):
-            url = f"{API_BASE}{url}"
-
-        async with httpx.AsyncClient(timeout=60) as client:
-            resp = await client.get(url, headers=_headers())
-            resp.raise_for_status()
-
-            Path(output_path).parent.mkdir(parents=True, exist_ok=True)
-            with open(output_path, "wb") as f:
-                f.write(resp.content)
-
-            return True
+        await stream_download(url, output_path)
+        return True
     except Exception as e:
         print(f"下载图片失败: {e}")
         return False
@@ -74,7 +81,8 @@ async def extract_and_insert_material(
     placeholder: str,
     target_file: str,
     output_dir: str,
-    project_name: str = ""
+    project_name: str = "",
+    store: Optional[ImageStore] = None,
 ) -> Dict:
     """提取材料图片并插入到文件
 
@@ -84,6 +92,7 @@ async def extract_and_insert_material(
         target_file: 目标Markdown文件
         output_dir: 图片输出目录
         project_name: 项目名称（用于水印）
+        store: 图片本地存储（为 None 时使用默认目录下的 ImageStore）
 
     Returns:
         操作结果
@@ -119,28 +128,41 @@ async def extract_and_insert_material(
     if not image_file:
         return {"success": False, "message": "没有可用的图片"}
 
-    # 3. 下载图片
+    # 3. 下载图片（经本地存储去重；文件名带材料 id，避免同名附件互相覆盖）
     image_url = image_file.get("url")
-    filename = image_file.get("filename", f"material_{material_id}.png")
+    filename = f"{material_id}_{image_file.get('filename') or f'material_{material_id}.png'}"
     output_path = os.path.join(output_dir, filename)
 
-    success = await download_image(image_url, output_path)
-    if not success:
+    if store is None:
+        store = ImageStore()
+    try:
+        stored = await store.fetch(
+            image_url, store_key(material_id, current_revision, image_file), filename,
+        )
+    except Exception as e:
+        print(f"下载图片失败: {e}")
         return {"success": False, "message": "下载图片失败"}
 
-    # 4. 添加水印
+    # 4. 添加水印（从原图派生并缓存，原图不被覆盖）
+    source = stored
     if project_name:
         try:
-            watermark.add_watermark(
-                output_path,
-                output_path,
+            source = watermark.add_watermark_cached(
+                stored,
+                None,
                 watermark_text=project_name,
+                cache_dir=store.watermark_dir,
                 position="bottom_right",
                 opacity=128,
                 font_size=20,
+                **watermark.DOCX_ENCODING,
             )
         except Exception as e:
             print(f"添加水印失败: {e}")
+    try:
+        ImageStore.materialize(source, output_path)
+    except OSError as e:
+        return {"success": False, "message": f"写入图片失败: {e}"}
 
     # 5. 更新Markdown文件
     try:
@@ -209,15 +231,12 @@ def find_placeholders(directory: str) -> List[Dict]:
 
 # 同步包装器
 def get_all_materials_sync(*args, **kwargs):
-    import asyncio
-    return asyncio.run(get_all_materials(*args, **kwargs))
+    return run_sync(get_all_materials(*args, **kwargs))
 
 
 def get_material_detail_sync(*args, **kwargs):
-    import asyncio
-    return asyncio.run(get_material_detail(*args, **kwargs))
+    return run_sync(get_material_detail(*args, **kwargs))
 
 
 def extract_and_insert_material_sync(*args, **kwargs):
-    import asyncio
-    return asyncio.run(extract_and_insert_material(*args, **kwargs))
+    return run_sync(extract_and_insert_material(*args, **kwargs))
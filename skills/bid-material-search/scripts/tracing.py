@@ -0,0 +1,273 @@
+"""MaterialHub 请求追踪与计时
+
+批量替换时原先只有 print 输出，看不出时间花在哪个接口、哪个占位符上。本模块提供：
+
+- traced_stream / traced_get：所有 MaterialHub GET 请求（search / extract / simple_replace /
+  mirror 的 _get 与列表分页、image_store 的图片下载）统一走这里。遇到连接错误或
+  502/503/504 时按指数退避重试（MATERIALHUB_RETRIES，默认 2 次），并记录接口、状态码、
+  耗时（含响应体读取）、字节数和重试次数
+- Tracer：收集请求记录与占位符级别的查询记录，可选逐行写入 JSON Lines 追踪文件，
+  summary() 汇总每个接口的调用数/耗时/字节数和最慢的查询
+
+当前 Tracer 存在 contextvars 中，asyncio.gather 派生的子任务会继承；没有激活的
+Tracer 时只重试、不记录。
+
+    with Tracer("trace.jsonl") as tracer:
+        async with tracer.query("营业执照"):      # 单次查询
+            await search_materials("营业执照")
+        with tracer.activate():                  # 或者追踪一段任意调用
+            await extract_bulk(["珞信通达"], ["周杨"])
+    print(format_summary(tracer.summary()))
+
+命令行汇总已有的追踪文件：
+
+    python scripts/tracing.py ~/.cache/bid-material-search/runs/响应文件-<hash>/materialhub_trace.jsonl
+"""
+
+import argparse
+import asyncio
+import contextlib
+import contextvars
+import json
+import re
+import time
+from pathlib import Path
+from typing import AsyncIterator, Dict, Iterable, List
+from urllib.parse import urlparse
+
+import httpx
+
+import config
+
+# 可重试的状态码与传输层错误（只对 GET 重试，请求幂等）
+RETRY_STATUSES = (502, 503, 504)
+RETRY_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.RemoteProtocolError)
+RETRY_BACKOFF = 0.2  # 秒，第 n 次重试前等待 RETRY_BACKOFF * 2 ** (n - 1)
+
+_ID_RE = re.compile(r"/\d+(?=/|$)")
+
+_tracer: contextvars.ContextVar["Tracer | None"] = contextvars.ContextVar("materialhub_tracer", default=None)
+_query: contextvars.ContextVar[dict | None] = contextvars.ContextVar("materialhub_query", default=None)
+
+
+def endpoint_of(url: str) -> str:
+    """把请求路径归并为接口名：去掉主机与查询串，数字 id 替换为 {id}"""
+    path = urlparse(url).path or url
+    return _ID_RE.sub("/{id}", path.rstrip("/") or "/")
+
+
+class Tracer:
+    """请求与查询记录的收集器
+
+    Args:
+        path: JSON Lines 追踪文件路径（覆盖写）；None 时只在内存中汇总
+    """
+
+    def __init__(self, path: str | Path | None = None):
+        self.path = Path(path) if path else None
+        self.records: List[dict] = []
+        self._file = None
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, "w", encoding="utf-8")
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> "Tracer":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def record(self, entry: dict) -> None:
+        self.records.append(entry)
+        if self._file is not None:
+            self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._file.flush()
+
+    @contextlib.contextmanager
+    def activate(self):
+        """在当前上下文（及其派生的任务）中启用本 Tracer"""
+        token = _tracer.set(self)
+        try:
+            yield self
+        finally:
+            _tracer.reset(token)
+
+    @contextlib.asynccontextmanager
+    async def query(self, query: str, **fields) -> AsyncIterator[dict]:
+        """记录一次占位符查询：其间启用本 Tracer，请求都归到该查询下，结束时写入汇总记录
+
+        产出的 dict 可由调用方补充字段（如 status）。
+        """
+        entry = {"kind": "query", "query": query, **fields, "calls": 0, "bytes": 0, "retries": 0}
+        tracer_token, query_token = _tracer.set(self), _query.set(entry)
+        start = time.perf_counter()
+        try:
+            yield entry
+        finally:
+            _query.reset(query_token)
+            _tracer.reset(tracer_token)
+            entry["ms"] = round((time.perf_counter() - start) * 1000, 2)
+            entry["ts"] = time.time()
+            self.record(entry)
+
+    def summary(self, top: int = 5) -> dict:
+        return summarize(self.records, top, self.path)
+
+
+def _percentile(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))] if values else 0.0
+
+
+def summarize(records: Iterable[dict], top: int = 5, path: str | Path | None = None) -> dict:
+    """汇总追踪记录
+
+    Returns:
+        {
+            "calls": int, "total_ms": float, "bytes": int, "retries": int, "errors": int,
+            "endpoints": {"/api/v2/search": {"calls", "total_ms", "p50_ms", "p95_ms",
+                                             "bytes", "retries", "errors"}, ...},
+            "slowest_queries": [{"query", "ms", "calls", "retries", ...}, ...],
+            "trace_file": str | None
+        }
+    """
+    requests, queries = [], []
+    for r in records:
+        (queries if r.get("kind") == "query" else requests).append(r)
+
+    by_endpoint: Dict[str, List[dict]] = {}
+    for r in requests:
+        by_endpoint.setdefault(r["endpoint"], []).append(r)
+    endpoints = {}
+    for name, rs in sorted(by_endpoint.items(), key=lambda kv: -sum(r["ms"] for r in kv[1])):
+        latencies = [r["ms"] for r in rs]
+        endpoints[name] = {
+            "calls": len(rs),
+            "total_ms": round(sum(latencies), 2),
+            "p50_ms": _percentile(latencies, 0.5),
+            "p95_ms": _percentile(latencies, 0.95),
+            "bytes": sum(r["bytes"] for r in rs),
+            "retries": sum(r["retries"] for r in rs),
+            "errors": sum(1 for r in rs if r.get("error") or (r.get("status") or 0) >= 400),
+        }
+
+    slowest = sorted(queries, key=lambda q: -q["ms"])[:top]
+    return {
+        "calls": len(requests),
+        "total_ms": round(sum(r["ms"] for r in requests), 2),
+        "bytes": sum(r["bytes"] for r in requests),
+        "retries": sum(r["retries"] for r in requests),
+        "errors": sum(e["errors"] for e in endpoints.values()),
+        "endpoints": endpoints,
+        "slowest_queries": [{k: v for k, v in q.items() if k not in ("kind", "ts")} for q in slowest],
+        "trace_file": str(path) if path else None,
+    }
+
+
+def format_summary(summary: dict) -> str:
+    """把 summarize() 的结果格式化为文本表格"""
+    lines = [
+        f"请求 {summary['calls']} 次，累计 {summary['total_ms'] / 1000:.2f} s，"
+        f"{summary['bytes'] / 1024:.0f} KB，重试 {summary['retries']} 次，错误 {summary['errors']} 次",
+        # 表头用 ASCII，中文按双宽字符显示会错位
+        f"  {'endpoint':<36}{'calls':>6}{'total_ms':>10}{'p50':>8}{'p95':>8}{'KB':>9}{'retry':>6}",
+    ]
+    for name, e in summary["endpoints"].items():
+        lines.append(f"  {name:<36}{e['calls']:>6}{e['total_ms']:>10.0f}{e['p50_ms']:>8.0f}"
+                     f"{e['p95_ms']:>8.0f}{e['bytes'] / 1024:>9.0f}{e['retries']:>6}")
+    if summary["slowest_queries"]:
+        lines.append("  最慢的查询:")
+        for q in summary["slowest_queries"]:
+            lines.append(f"    {q['ms']:8.0f} ms  {q['calls']:3d} 次请求  {q['query']}")
+    return "\n".join(lines)
+
+
+@contextlib.asynccontextmanager
+async def traced_stream(
+    client: httpx.AsyncClient,
+    url: str,
+    params: dict | None = None,
+    headers: dict | None = None,
+    timeout: float | None = None,
+) -> AsyncIterator[httpx.Response]:
+    """流式 GET：瞬时故障按退避重试，退出时关闭响应并记录追踪
+
+    产出的响应尚未读取响应体，调用方自行 aiter_bytes() / aread()；
+    状态码检查（raise_for_status）也由调用方决定。
+    """
+    tracer, query = _tracer.get(), _query.get()
+    entry = {"kind": "http", "method": "GET", "endpoint": endpoint_of(url), "url": url,
+             "params": params or None, "status": None, "bytes": 0, "retries": 0}
+    if query is not None:
+        entry["query"] = query["query"]
+    extra = {} if timeout is None else {"timeout": timeout}
+    max_retries = config.HTTP_RETRIES
+    start = time.perf_counter()
+    resp = None
+    try:
+        while True:
+            request = client.build_request("GET", url, params=params, headers=headers, **extra)
+            try:
+                resp = await client.send(request, stream=True)
+            except RETRY_ERRORS:
+                if entry["retries"] >= max_retries:
+                    raise
+            else:
+                if resp.status_code not in RETRY_STATUSES or entry["retries"] >= max_retries:
+                    break
+                await resp.aclose()
+            entry["retries"] += 1
+            await asyncio.sleep(RETRY_BACKOFF * 2 ** (entry["retries"] - 1))
+        entry["status"] = resp.status_code
+        yield resp
+    except BaseException as e:
+        entry["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        if resp is not None:
+            await resp.aclose()
+            entry["bytes"] = resp.num_bytes_downloaded
+        entry["ms"] = round((time.perf_counter() - start) * 1000, 2)
+        entry["ts"] = time.time()
+        if query is not None:
+            query["calls"] += 1
+            query["bytes"] += entry["bytes"]
+            query["retries"] += entry["retries"]
+        if tracer is not None:
+            tracer.record(entry)
+
+
+async def traced_get(
+    client: httpx.AsyncClient,
+    url: str,
+    params: dict | None = None,
+    headers: dict | None = None,
+    timeout: float | None = None,
+) -> httpx.Response:
+    """GET 并读取完整响应体（带重试与追踪），返回的响应可直接 .json()
+
+    timeout 为 None 时沿用客户端的超时。
+    """
+    async with traced_stream(client, url, params=params, headers=headers, timeout=timeout) as resp:
+        await resp.aread()
+    return resp
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarise a MaterialHub JSON-lines trace")
+    parser.add_argument("trace", help="追踪文件（replace_all_placeholders 写入的 materialhub_trace.jsonl，路径见返回值 trace_file）")
+    parser.add_argument("--top", type=int, default=10, help="列出最慢的 N 个查询")
+    args = parser.parse_args()
+
+    with open(args.trace, "r", encoding="utf-8") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    print(format_summary(summarize(records, args.top, args.trace)))
+
+
+if __name__ == "__main__":
+    main()
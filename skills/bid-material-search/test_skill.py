@@ -7,6 +7,8 @@ bid-material-search skill 测试脚本
 
 import sys
 import os
+import json
+import shutil
 from pathlib import Path
 import httpx
 
@@ -15,9 +17,18 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), "scripts"))
 
 from config import API_BASE, API_TOKEN, _config_source
 from search import search_materials_sync, get_document_detail_sync
-from extract import extract_company_data_sync, extract_person_data_sync
-from replace import replace_placeholder_sync, replace_all_placeholders_sync
+from extract import extract_company_data_sync, extract_person_data_sync, extract_bulk_sync
+from replace import (replace_placeholder_sync, replace_all_placeholders_sync, normalize_query, rank_query,
+                     run_state_dir)
 from watermark import get_project_name_from_analysis
+from cache import SearchCache
+from mirror import MaterialMirror
+from ranking import RankingIndex
+from runner import MaterialHubSession, pooled_client, run_sync
+
+# import scripts（包的按需加载）的启动耗时上限（毫秒）；墙钟耗时受机器负载影响，
+# 默认只报告，设置 IMPORT_BUDGET_MS 环境变量后才作为失败条件
+IMPORT_BUDGET_MS = float(os.getenv("IMPORT_BUDGET_MS", "0"))
 
 
 def print_section(title: str):
@@ -168,6 +179,23 @@ def test_extract_company():
         for p in data['persons'][:2]:
             print(f"    - {p['name']} ({p.get('education', 'N/A')})")
 
+    print("\n3.2 批量提取公司 + 团队成员")
+    person_names = [p['name'] for p in data.get('persons', [])[:3]]
+    cache = {}
+    bulk = extract_bulk_sync([company_name], person_names + person_names[:1], cache=cache)
+    if set(bulk["persons"]) != set(person_names):
+        print("✗ 批量结果未按输入名称返回")
+        return False
+    for name, person in bulk["persons"].items():
+        print(f"  {'✓' if 'error' not in person else '⚠️'} {name}: {person.get('error', '已提取')}")
+
+    # 第二次调用命中运行期缓存，返回同一份结果
+    again = extract_bulk_sync([company_name], person_names, cache=cache)
+    if any(again["persons"][n] is not bulk["persons"][n] for n in person_names if "error" not in bulk["persons"][n]):
+        print("✗ 运行期缓存未命中")
+        return False
+    print(f"✓ 运行期缓存 {len(cache)} 条")
+
     return True
 
 
@@ -234,6 +262,645 @@ def test_watermark():
         return False
 
 
+def test_search_cache():
+    """测试搜索结果缓存（离线，不依赖 MaterialHub）"""
+    print_section("测试 6: 搜索缓存")
+
+    print("\n6.1 归一化查询词")
+    keys = {normalize_query(q) for q in ["营业执照扫描件", "营执", "营业执照复印件"]}
+    if keys != {"营业执照"}:
+        print(f"✗ 归一化结果不一致: {keys}")
+        return False
+    print("✓ 简称/后缀变体归一化到同一个键")
+
+    print("\n6.2 命中统计与持久化")
+    cache_file = Path("test_output") / ".search_cache.json"
+    cache_file.parent.mkdir(exist_ok=True)
+    cache_file.unlink(missing_ok=True)
+
+    cache = SearchCache(cache_file)
+    cache.set("5:营业执照", [{"id": 1, "title": "营业执照"}])
+    cache.set("5:不存在", [])
+    cache.get("5:营业执照")
+    cache.get("5:营业执照")
+    cache.get("5:iso 9001")
+    cache.save()
+    stats = cache.stats()
+    print(f"  {stats}")
+    if stats["hits"] != 2 or stats["misses"] != 1:
+        print("✗ 命中统计错误")
+        return False
+
+    reloaded = SearchCache(cache_file)
+    if reloaded.get("5:营业执照") is None or reloaded.get("5:不存在") is not None:
+        print("✗ 持久化缓存应只保留非空结果")
+        return False
+
+    expired = SearchCache(cache_file, ttl=0)
+    if expired.get("5:营业执照") is not None:
+        print("✗ 过期条目未被丢弃")
+        return False
+
+    print("✓ 缓存命中、持久化与 TTL 正常")
+    return True
+
+
+def test_mirror():
+    """测试本地镜像检索与同步（离线，同步部分使用桩服务）"""
+    print_section("测试 7: 本地镜像")
+
+    db = Path("test_output") / "mirror.db"
+    db.parent.mkdir(exist_ok=True)
+    db.unlink(missing_ok=True)
+
+    with MaterialMirror(db) as mirror:
+        print("\n7.1 写入与变更统计")
+        doc = {"id": 1, "title": "营业执照", "entity_names": ["珞信通达（北京）科技有限公司"]}
+        states = [
+            mirror._upsert_document(doc),
+            mirror._upsert_document(doc),
+            mirror._upsert_document({**doc, "title": "营业执照副本"}),
+            mirror._upsert_document({"id": 2, "title": "ISO9001质量管理体系认证证书", "entity_names": []}),
+        ]
+        print(f"  {states}")
+        if states != ["added", "unchanged", "updated", "added"]:
+            print("✗ 变更统计错误")
+            return False
+
+        print("\n7.2 标题 / 实体名检索")
+        checks = {
+            "营业执照": [1],      # trigram 全文检索
+            "珞信通达": [1],      # 命中关联实体名
+            "9001": [2],
+            "执照": [1],          # 两字查询退化为 LIKE
+            "不存在的材料": [],
+        }
+        for query, expected in checks.items():
+            ids = [d["id"] for d in mirror.search(query)]
+            print(f"  {query}: {ids}")
+            if ids != expected:
+                print(f"✗ 检索结果错误，期望 {expected}")
+                return False
+
+    import config
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), "benchmarks"))
+    from stub_server import StubCatalogue, StubMaterialHub
+
+    def _edit(catalogue, doc_id, updated_at):
+        catalogue.documents[doc_id]["title"] += "（新版）"
+        catalogue.documents[doc_id]["updated_at"] = updated_at
+
+    saved = config.API_BASE, config.API_TOKEN
+    try:
+        for honour in (True, False):
+            label = "支持" if honour else "忽略"
+            print(f"\n7.{3 if honour else 4} 服务端{label} updated_since：增量同步与删除对账")
+            catalogue = StubCatalogue(size=60, image_size=(200, 280))
+            ids = sorted(catalogue.documents)
+            db.unlink(missing_ok=True)
+            with StubMaterialHub(catalogue, honour_updated_since=honour) as hub, MaterialHubSession(), \
+                    MaterialMirror(db) as mirror:
+                config.API_BASE, config.API_TOKEN = hub.url, ""
+                runs = [run_sync(mirror.sync())]
+                _edit(catalogue, ids[0], "2099-01-01T00:00:00")
+                del catalogue.documents[ids[1]]
+                runs.append(run_sync(mirror.sync()))
+                _edit(catalogue, ids[2], "2099-01-02T00:00:00")
+                runs.append(run_sync(mirror.sync()))
+                summary = [(r["mode"], r["documents"]["updated"], r["documents"]["removed"]) for r in runs]
+                print(f"  {summary}，镜像 {mirror.count()} / 服务端 {len(catalogue.documents)}")
+                if honour:
+                    expected = [("full", 0, 0), ("reconciled", 1, 1), ("incremental", 1, 0)]
+                else:
+                    # 第二次返回的文档都不早于 since，还无法判断，删除由总数对账发现；
+                    # 第三次返回了更早的文档，判定服务端忽略该参数，按全量处理
+                    expected = [("full", 0, 0), ("reconciled", 1, 1), ("full", 1, 0)]
+                ignored = mirror._state("updated_since_ignored") == "1"
+                if summary != expected or mirror.count() != len(catalogue.documents) or ignored == honour:
+                    print(f"✗ 同步结果错误，期望 {expected}")
+                    return False
+    finally:
+        config.API_BASE, config.API_TOKEN = saved
+
+    print("✓ 本地镜像写入、检索与同步正常")
+    return True
+
+
+def test_ranking():
+    """测试本地排序索引（离线，使用 benchmarks 的标注集）"""
+    print_section("测试 8: 本地排序索引")
+
+    data_file = Path(__file__).parent / "benchmarks" / "data" / "placeholder_pairs.json"
+    with open(data_file, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    index = RankingIndex(data["catalogue"])
+
+    print(f"\n8.1 标注集 {len(data['pairs'])} 条")
+    hits = rejected = 0
+    positives = [p for p in data["pairs"] if p["expected"]]
+    negatives = [p for p in data["pairs"] if not p["expected"]]
+    for pair in data["pairs"]:
+        ids = [r["id"] for r in rank_query(index, pair["query"])]
+        if pair["expected"]:
+            hits += bool(ids) and ids[0] in pair["expected"]
+        else:
+            rejected += not ids
+    print(f"  recall@1 {hits}/{len(positives)}，拒识 {rejected}/{len(negatives)}")
+    if hits < len(positives) * 0.9 or rejected < len(negatives) * 0.9:
+        print("✗ 召回或拒识低于 90%")
+        return False
+
+    print("\n8.2 带分数返回")
+    top = rank_query(index, "营业执照扫描件")
+    print(f"  {[(r['title'], r['score']) for r in top]}")
+    if not top or top[0]["id"] != 1 or not 0 < top[0]["score"] <= 1:
+        print("✗ 排序结果错误")
+        return False
+
+    print("✓ 排序索引召回与拒识正常")
+    return True
+
+
+def test_runner():
+    """测试同步包装器的后台事件循环（离线）"""
+    print_section("测试 9: 后台事件循环")
+
+    import asyncio
+
+    async def _loop_and_client():
+        async with pooled_client() as client:
+            return asyncio.get_running_loop(), client
+
+    print("\n9.1 多次同步调用复用同一循环与连接池")
+    loop1, client1 = run_sync(_loop_and_client())
+    loop2, client2 = run_sync(_loop_and_client())
+    if loop1 is not loop2 or client1 is not client2:
+        print("✗ 未复用事件循环或客户端")
+        return False
+    print("✓ 同一事件循环、同一客户端")
+
+    print("\n9.2 会话独立的循环，退出后关闭")
+    with MaterialHubSession() as hub:
+        loop3, client3 = hub.run(_loop_and_client())
+        loop4, _ = run_sync(_loop_and_client())  # 会话内的同步包装器也走会话循环
+    if loop3 is loop1 or loop4 is not loop3 or not loop3.is_closed() or not client3.is_closed:
+        print("✗ 会话循环未隔离或未关闭")
+        return False
+    print("✓ 会话循环隔离并在退出时关闭")
+
+    print("\n9.3 会话只对进入它的线程生效")
+    import threading
+    entered, done = threading.Event(), threading.Event()
+    session_loop = []
+
+    def _hold_session():
+        with MaterialHubSession() as hub:
+            session_loop.append(hub.run(_loop_and_client())[0])
+            entered.set()
+            done.wait(10)
+
+    worker = threading.Thread(target=_hold_session)
+    worker.start()
+    entered.wait(10)
+    other_loop, _ = run_sync(_loop_and_client())  # 另一线程的会话未退出
+    done.set()
+    worker.join()
+    if other_loop is session_loop[0] or other_loop is not loop1:
+        print("✗ 调用被路由到了其他线程的会话")
+        return False
+    print("✓ 其他线程的调用仍走默认循环")
+
+    print("\n9.4 修改 API_BASE 后共享客户端随之切换")
+    import config
+    saved = config.API_BASE
+    try:
+        config.API_BASE = "http://127.0.0.1:1"
+        _, client5 = run_sync(_loop_and_client())
+    finally:
+        config.API_BASE = saved
+    _, client6 = run_sync(_loop_and_client())
+    if str(client5.base_url).rstrip("/") != "http://127.0.0.1:1" or client6 is not client1:
+        print("✗ 共享客户端未跟随 config.API_BASE")
+        return False
+    print("✓ 按 API_BASE 各用一个共享客户端")
+    return True
+
+
+def test_import_time():
+    """测试包的按需加载与启动耗时（离线，python -X importtime）"""
+    print_section("测试 10: 启动耗时")
+
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), "benchmarks"))
+    from bench_import import TARGETS, heavy_modules, measure
+
+    print("\n10.1 导入包不加载重依赖、不读取配置")
+    heavy = heavy_modules(TARGETS["scripts"] + "\nimport config\nassert 'API_BASE' not in vars(config)")
+    if heavy:
+        print(f"✗ import scripts 连带导入了 {heavy}")
+        return False
+    print("✓ httpx / PIL / NumPy / dotenv 均未导入，配置未解析")
+
+    print("\n10.2 首次访问时加载")
+    heavy = heavy_modules("import scripts\nscripts.search_materials\nimport config\nconfig.API_BASE")
+    if set(heavy) != {"httpx", "dotenv"}:
+        print(f"✗ 访问 search_materials / API_BASE 后导入的重依赖为 {heavy}")
+        return False
+    print("✓ 按需导入 httpx，按需读取 .env")
+
+    print("\n10.3 启动耗时（中位数）")
+    timings = {name: measure(stmt, name, repeat=3) for name, stmt in TARGETS.items()}
+    print("  " + "  ".join(f"{name} {ms:.1f} ms" for name, ms in timings.items()))
+    if not IMPORT_BUDGET_MS:
+        print("✓ 仅报告耗时（设置 IMPORT_BUDGET_MS 环境变量以检查上限）")
+    elif timings["scripts"] > IMPORT_BUDGET_MS:
+        print(f"✗ import scripts 超过 {IMPORT_BUDGET_MS:g} ms")
+        return False
+    else:
+        print(f"✓ import scripts 在 {IMPORT_BUDGET_MS:g} ms 以内")
+    return True
+
+
+def test_stub_replace():
+    """测试对离线桩服务的批量替换（离线，benchmarks/stub_server.py）"""
+    print_section("测试 11: 桩服务批量替换")
+
+    import config
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), "benchmarks"))
+    from stub_server import StubCatalogue, StubMaterialHub
+
+    work = Path("test_output") / "stub"
+    if work.exists():
+        shutil.rmtree(work)
+    work.mkdir(parents=True)
+    placeholders = "【此处插入营业执照扫描件】\n【此处插入营执】\n【此处插入ISO9001认证证书】\n【此处插入不存在的材料】\n"
+
+    saved = config.API_BASE, config.API_TOKEN, config.MATERIAL_CACHE_DIR
+    try:
+        with StubMaterialHub(StubCatalogue(size=100, image_size=(200, 280))) as hub, MaterialHubSession():
+            config.API_BASE, config.API_TOKEN, config.MATERIAL_CACHE_DIR = hub.url, "", str(work / "cache")
+
+            print("\n11.1 冷启动")
+            (work / "a.md").write_text(placeholders, encoding="utf-8")
+            result = replace_all_placeholders_sync(str(work), project_name="测试项目")
+            cold = hub.stats()
+            print(f"  替换 {result['replaced_count']}，失败 {result['failed_count']}，请求 {cold['requests']}")
+            if result["replaced_count"] != 3 or result["failed_count"] != 1:
+                print("✗ 替换结果错误")
+                return False
+
+            print("\n11.2 重跑复用图片存储")
+            hub.reset_stats()
+            (work / "a.md").write_text(placeholders, encoding="utf-8")
+            result = replace_all_placeholders_sync(str(work), project_name="测试项目")
+            warm = hub.stats()
+            downloaded = warm["endpoints"].get("download", {}).get("bytes", 0)
+            print(f"  请求 {warm['requests']}，下载字节 {downloaded}")
+            if result["replaced_count"] != 3 or downloaded:
+                print("✗ 重跑未复用本地图片")
+                return False
+
+            print("\n11.3 搜索缓存不写入响应文件目录")
+            if (work / ".search_cache.json").exists() or not (run_state_dir(work) / "search_cache.json").exists():
+                print("✗ 搜索缓存应写入 MATERIALHUB_CACHE_DIR 下的运行状态目录")
+                return False
+
+            print("\n11.4 交付图片与存储对象互不共用 inode")
+            images = [d["image"] for d in result["details"] if d["status"] == "success"]
+            if any(os.stat(image).st_nlink != 1 for image in images):
+                print("✗ 交付图片是存储对象的硬链接，原地修改会改写存储")
+                return False
+    finally:
+        config.API_BASE, config.API_TOKEN, config.MATERIAL_CACHE_DIR = saved
+
+    print("✓ 桩服务上的批量替换与重跑正常")
+    return True
+
+
+def test_tracing():
+    """测试请求追踪与瞬时故障重试（离线，桩服务注入 503）"""
+    print_section("测试 12: 请求追踪")
+
+    import config
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), "benchmarks"))
+    from stub_server import StubCatalogue, StubMaterialHub
+
+    work = Path("test_output") / "trace"
+    if work.exists():
+        shutil.rmtree(work)
+    work.mkdir(parents=True)
+    (work / "a.md").write_text("【此处插入营业执照扫描件】\n【此处插入ISO9001认证证书】\n【此处插入营执】\n",
+                               encoding="utf-8")
+
+    saved = config.API_BASE, config.API_TOKEN, config.MATERIAL_CACHE_DIR
+    try:
+        with StubMaterialHub(StubCatalogue(size=100, image_size=(200, 280)), error_rate=0.2, seed=1) as hub, \
+                MaterialHubSession():
+            config.API_BASE, config.API_TOKEN, config.MATERIAL_CACHE_DIR = hub.url, "", str(work / "cache")
+            result = replace_all_placeholders_sync(str(work), project_name="测试项目")
+            injected = hub.stats()["errors"]
+            trace_file = run_state_dir(work) / "materialhub_trace.jsonl"
+    finally:
+        config.API_BASE, config.API_TOKEN, config.MATERIAL_CACHE_DIR = saved
+
+    summary = result["trace"]
+    print(f"\n12.1 注入错误 {injected} 次，客户端重试 {summary['retries']} 次")
+    if result["replaced_count"] != 3 or summary["retries"] != injected:
+        print("✗ 瞬时故障未被重试吸收")
+        return False
+
+    print("\n12.2 追踪文件与汇总")
+    if Path(summary["trace_file"]) != trace_file or (work / ".materialhub_trace.jsonl").exists():
+        print("✗ 追踪文件应写入运行状态目录，而不是响应文件目录")
+        return False
+    with open(summary["trace_file"], "r", encoding="utf-8") as f:
+        lines = [json.loads(line) for line in f]
+    queries = [r for r in lines if r["kind"] == "query"]
+    print(f"  {len(lines)} 行，{len(queries)} 个查询，接口 {list(summary['endpoints'])}")
+    if len(lines) != summary["calls"] + 3 or "/api/v2/search" not in summary["endpoints"] \
+            or sum(q["calls"] for q in queries) != summary["calls"]:
+        print("✗ 追踪记录不完整")
+        return False
+
+    print("\n12.3 中途异常时仍关闭镜像连接与追踪文件")
+    import asyncio
+    import sqlite3
+    import replace
+
+    class Abort(BaseException):
+        pass
+
+    async def _abort(**kwargs):
+        raise Abort()
+
+    opened = []
+
+    def _tracked(cls):
+        class Tracked(cls):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                opened.append(self)
+        return Tracked
+
+    saved_replace = replace.replace_placeholder, replace.MaterialMirror, replace.Tracer
+    replace.replace_placeholder = _abort
+    replace.MaterialMirror, replace.Tracer = _tracked(MaterialMirror), _tracked(replace.Tracer)
+    (work / "a.md").write_text("【此处插入营业执照扫描件】\n", encoding="utf-8")
+    config.MATERIAL_CACHE_DIR = str(work / "cache")
+    try:
+        asyncio.run(replace.replace_all_placeholders(str(work), project_name="测试项目", use_mirror=True))
+        print("✗ 异常未向上传播")
+        return False
+    except Abort:
+        pass
+    finally:
+        replace.replace_placeholder, replace.MaterialMirror, replace.Tracer = saved_replace
+        config.MATERIAL_CACHE_DIR = saved[2]
+    mirror, tracer = opened
+    try:
+        mirror.conn.execute("SELECT 1")
+        print("✗ 镜像连接未关闭")
+        return False
+    except sqlite3.ProgrammingError:
+        pass
+    if tracer._file is not None:
+        print("✗ 追踪文件未关闭")
+        return False
+
+    print("✓ 请求追踪与重试正常")
+    return True
+
+
+def test_bulk_errors():
+    """测试批量提取的逐名称容错（离线，桩服务返回格式异常的记录）"""
+    print_section("测试 13: 批量提取容错")
+
+    import config
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), "benchmarks"))
+    from stub_server import StubCatalogue, StubMaterialHub
+
+    catalogue = StubCatalogue(size=100, image_size=(200, 280))
+    catalogue.entities["王芳"]["attributes"] = "格式异常"  # 不是 dict，整理结果时抛异常
+
+    saved = config.API_BASE, config.API_TOKEN
+    try:
+        with StubMaterialHub(catalogue) as hub, MaterialHubSession():
+            config.API_BASE, config.API_TOKEN = hub.url, ""
+            cache = {}
+            bulk = extract_bulk_sync([], ["周杨", "王芳", "不存在的人"], cache=cache)
+    finally:
+        config.API_BASE, config.API_TOKEN = saved
+
+    kinds = {name: person.get("error_kind") for name, person in bulk["persons"].items()}
+    print(f"\n13.1 错误类型: {kinds}")
+    if kinds != {"周杨": None, "王芳": "unexpected", "不存在的人": "not_found"}:
+        print("✗ 单个名称的异常应只影响其自身条目")
+        return False
+
+    print("\n13.2 缓存只保留成功与确定结果")
+    if sorted(name for _, name in cache) != ["不存在的人", "周杨"]:
+        print(f"✗ 缓存内容错误: {list(cache)}")
+        return False
+
+    print("\n13.3 任务被取消时向上传播")
+    import asyncio
+    import extract
+    original = extract.extract_person_data
+
+    async def _cancelled(name, client=None):
+        if name == "王芳":
+            raise asyncio.CancelledError()
+        return {"name": name}
+
+    extract.extract_person_data = _cancelled
+    try:
+        asyncio.run(extract.extract_bulk([], ["周杨", "王芳"]))
+        print("✗ 取消被吞掉了")
+        return False
+    except asyncio.CancelledError:
+        pass
+    finally:
+        extract.extract_person_data = original
+
+    print("✓ 批量提取逐名称容错正常")
+    return True
+
+
+def _noise_image(size, mode="RGB", seed=0):
+    """确定性的随机噪声图（几乎不可压缩，用来逼出体积上限的各个分支）"""
+    import random
+    from PIL import Image
+    return Image.frombytes(mode, size, random.Random(seed).randbytes(size[0] * size[1] * len(mode)))
+
+
+def test_encoding():
+    """测试输出编码策略（离线，Pillow）"""
+    print_section("测试 14: 输出编码策略")
+
+    import io
+    from PIL import Image, ImageDraw
+    from watermark import add_watermark, encode_image, MIN_JPEG_QUALITY
+
+    def quant_tables(quality):
+        buf = io.BytesIO()
+        Image.new("RGB", (8, 8)).save(buf, "JPEG", quality=quality)
+        return Image.open(io.BytesIO(buf.getvalue())).quantization
+
+    def written_as_recorded(data, encoding):
+        out = Image.open(io.BytesIO(data))
+        if len(data) != encoding["bytes"] or list(out.size) != encoding["size"]:
+            return False
+        return encoding["format"] != "JPEG" or out.quantization == quant_tables(encoding["quality"])
+
+    photo = _noise_image((600, 600))
+    full = len(encode_image(photo, "JPEG", quality=90)[0])
+    floor = len(encode_image(photo, "JPEG", quality=MIN_JPEG_QUALITY)[0])
+
+    print("\n14.1 JPEG 二分质量")
+    data, encoding = encode_image(photo, "JPEG", quality=90, target_bytes=(full + floor) // 2)
+    print(f"  {encoding}")
+    if not (MIN_JPEG_QUALITY < encoding["quality"] < 90) or encoding["size"] != [600, 600] \
+            or not encoding["target_met"] or not written_as_recorded(data, encoding):
+        print("✗ 应在原尺寸下取满足目标的最高质量")
+        return False
+
+    print("\n14.2 最低质量仍超出时缩小尺寸")
+    data, encoding = encode_image(photo, "JPEG", quality=90, target_bytes=300)
+    print(f"  {encoding}")
+    if encoding["quality"] != MIN_JPEG_QUALITY or max(encoding["size"]) >= 600 \
+            or not written_as_recorded(data, encoding):
+        print("✗ 记录的质量/字节数与实际写出的编码不符")
+        return False
+
+    print("\n14.3 PNG 只对少色图改用调色板")
+    line_art = Image.new("RGBA", (1200, 1200), "white")
+    draw = ImageDraw.Draw(line_art)
+    for x in range(0, 1200, 6):
+        draw.line([(x, 0), (1200 - x, 1200)], fill=(x % 200, 0, 0, 255))
+    plain = len(encode_image(line_art, "PNG")[0])
+    data, encoding = encode_image(line_art, "PNG", target_bytes=plain - 1)
+    lossless = Image.open(io.BytesIO(data)).convert("RGBA").tobytes() == line_art.tobytes()
+    print(f"  线稿: {encoding}")
+    if not encoding["palette"] or encoding["size"] != [1200, 1200] or not lossless \
+            or not written_as_recorded(data, encoding):
+        print("✗ 少色 PNG 应无损改用调色板")
+        return False
+    data, encoding = encode_image(_noise_image((600, 600), "RGBA"), "PNG", target_bytes=400 * 1024)
+    print(f"  照片: {encoding}")
+    if encoding["palette"] or max(encoding["size"]) >= 600 or not written_as_recorded(data, encoding):
+        print("✗ 多色 PNG 不应被量化，应缩小尺寸")
+        return False
+
+    print("\n14.4 add_watermark 的 max_dimension 与 encoding_log")
+    work = Path("test_output") / "encoding"
+    work.mkdir(parents=True, exist_ok=True)
+    _noise_image((1600, 1200)).save(work / "scan.jpg", quality=95)
+    log = []
+    add_watermark(work / "scan.jpg", work / "out.jpg", "测试项目", encoding_log=log,
+                  max_dimension=800, quality=90, target_bytes=250 * 1024)
+    print(f"  {log}")
+    if len(log) != 1 or log[0]["size"] != [800, 600] \
+            or not written_as_recorded((work / "out.jpg").read_bytes(), log[0]):
+        print("✗ encoding_log 与输出文件不符")
+        return False
+
+    print("✓ 输出编码策略正常")
+    return True
+
+
+def test_watermark_cache():
+    """测试水印结果缓存（离线，Pillow）"""
+    print_section("测试 15: 水印缓存")
+
+    import functools
+    import hashlib
+    import watermark
+
+    work = Path("test_output") / "watermark_cache"
+    if work.exists():
+        shutil.rmtree(work)
+    work.mkdir(parents=True)
+    source, cache_dir = work / "营业执照.png", work / "cache"
+    _noise_image((400, 300)).save(source)
+    pristine = hashlib.sha256(source.read_bytes()).hexdigest()
+
+    calls = []
+    original = watermark.add_watermark
+
+    @functools.wraps(original)
+    def counting(*args, **kwargs):
+        calls.append(args[0])
+        return original(*args, **kwargs)
+
+    watermark.add_watermark = counting
+    try:
+        print("\n15.1 同一原图、文字与参数重跑命中缓存")
+        outputs = []
+        for run in range(2):
+            out = work / "响应文件" / "营业执照.png"
+            watermark.add_watermark_cached(source, out, "测试项目", cache_dir=cache_dir, opacity=128)
+            outputs.append(out.read_bytes())
+        print(f"  渲染 {len(calls)} 次")
+        if len(calls) != 1 or outputs[0] != outputs[1] or out.stat().st_nlink != 1:
+            print("✗ 重跑应直接复制缓存结果，且输出与第一次逐字节一致")
+            return False
+
+        print("\n15.2 原图保持不变")
+        if hashlib.sha256(source.read_bytes()).hexdigest() != pristine:
+            print("✗ 原图被修改，重跑会叠加水印")
+            return False
+
+        print("\n15.3 参数变化生成新的变体")
+        watermark.add_watermark_cached(source, out, "测试项目", cache_dir=cache_dir, opacity=200)
+        variants = list(cache_dir.glob("*/*.png"))
+        if len(calls) != 2 or len(variants) != 2 or out.read_bytes() == outputs[0]:
+            print(f"✗ 修改 opacity 后应重新渲染（渲染 {len(calls)} 次，变体 {len(variants)} 个）")
+            return False
+    finally:
+        watermark.add_watermark = original
+
+    print("✓ 水印缓存命中、原图不变、参数区分变体")
+    return True
+
+
+def test_watermark_batch():
+    """测试进程池批量加水印（离线，Pillow）"""
+    print_section("测试 16: 批量加水印")
+
+    from watermark import add_watermark_batch, watermark_batch
+
+    work = Path("test_output") / "watermark_batch"
+    if work.exists():
+        shutil.rmtree(work)
+    inputs = work / "扫描件"
+    inputs.mkdir(parents=True)
+    for k in range(3):
+        _noise_image((320, 240), seed=k).save(inputs / f"图{k}.{'png' if k % 2 else 'jpg'}")
+    (inputs / "损坏.jpg").write_bytes(b"not an image")
+    (inputs / "丢失.png").symlink_to(work / "不存在.png")  # 无法读取大小
+    readable = sum(p.stat().st_size for p in inputs.iterdir() if p.exists())
+
+    print("\n16.1 workers=2：损坏与不可读的文件逐个记为失败")
+    summary = watermark_batch(inputs, work / "并行", "测试项目", workers=2)
+    failed = sorted(Path(f["path"]).name for f in summary["failed"])
+    print(f"  成功 {len(summary['processed'])}，失败 {failed}，{summary['images_per_s']} img/s")
+    output_bytes = sum(Path(p).stat().st_size for p in summary["processed"])
+    if summary["total"] != 5 or summary["workers"] != 2 or len(summary["processed"]) != 3 \
+            or failed != ["丢失.png", "损坏.jpg"] or summary["input_bytes"] != readable \
+            or summary["output_bytes"] != output_bytes or len(summary["encodings"]) != 3:
+        print("✗ 汇总计数错误")
+        return False
+
+    print("\n16.2 与 workers=1 的输出逐字节一致")
+    serial = add_watermark_batch(inputs, work / "串行", "测试项目")
+    if [Path(p).name for p in serial] != [Path(p).name for p in summary["processed"]] \
+            or any(Path(a).read_bytes() != Path(b).read_bytes() for a, b in zip(serial, summary["processed"])):
+        print("✗ 多进程输出与串行不一致")
+        return False
+
+    print("✓ 批量加水印汇总与并行输出正常")
+    return True
+
+
 def run_all_tests():
     """运行所有测试"""
     print("\n" + "🧪" * 30)
@@ -246,6 +913,17 @@ def run_all_tests():
         "公司数据提取": False,
         "占位符替换": False,
         "水印提取": False,
+        "搜索缓存": False,
+        "本地镜像": False,
+        "排序索引": False,
+        "后台事件循环": False,
+        "启动耗时": False,
+        "桩服务批量替换": False,
+        "请求追踪": False,
+        "批量提取容错": False,
+        "输出编码策略": False,
+        "水印缓存": False,
+        "批量加水印": False,
     }
 
     try:
@@ -273,6 +951,61 @@ def run_all_tests():
     except Exception as e:
         print(f"\n✗ 水印提取测试异常: {e}")
 
+    try:
+        results["搜索缓存"] = test_search_cache()
+    except Exception as e:
+        print(f"\n✗ 搜索缓存测试异常: {e}")
+
+    try:
+        results["本地镜像"] = test_mirror()
+    except Exception as e:
+        print(f"\n✗ 本地镜像测试异常: {e}")
+
+    try:
+        results["排序索引"] = test_ranking()
+    except Exception as e:
+        print(f"\n✗ 排序索引测试异常: {e}")
+
+    try:
+        results["后台事件循环"] = test_runner()
+    except Exception as e:
+        print(f"\n✗ 后台事件循环测试异常: {e}")
+
+    try:
+        results["启动耗时"] = test_import_time()
+    except Exception as e:
+        print(f"\n✗ 启动耗时测试异常: {e}")
+
+    try:
+        results["桩服务批量替换"] = test_stub_replace()
+    except Exception as e:
+        print(f"\n✗ 桩服务批量替换测试异常: {e}")
+
+    try:
+        results["请求追踪"] = test_tracing()
+    except Exception as e:
+        print(f"\n✗ 请求追踪测试异常: {e}")
+
+    try:
+        results["批量提取容错"] = test_bulk_errors()
+    except Exception as e:
+        print(f"\n✗ 批量提取容错测试异常: {e}")
+
+    try:
+        results["输出编码策略"] = test_encoding()
+    except Exception as e:
+        print(f"\n✗ 输出编码策略测试异常: {e}")
+
+    try:
+        results["水印缓存"] = test_watermark_cache()
+    except Exception as e:
+        print(f"\n✗ 水印缓存测试异常: {e}")
+
+    try:
+        results["批量加水印"] = test_watermark_batch()
+    except Exception as e:
+        print(f"\n✗ 批量加水印测试异常: {e}")
+
     # 总结
     print("\n" + "=" * 60)
     print("测试结果总结")
@@ -5,13 +5,246 @@
 为投标材料图片添加项目名称水印，防止材料被滥用。
 """
 
+import hashlib
+import inspect
+import io
+import json
 import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 from PIL import Image, ImageDraw, ImageFont
 import logging
 
 logger = logging.getLogger(__name__)
 
+# 使用混合字体方案：中文用CJK字体，数字/ASCII用西文字体
+# 这样可以避免CJK字体对ASCII字符支持不完整的问题
+CN_FONT_PATHS = [
+    "/usr/share/fonts/truetype/droid/DroidSansFallbackFull.ttf",
+    "/usr/share/fonts/truetype/wqy/wqy-microhei.ttf",
+    "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc",
+    "/Library/Fonts/Arial Unicode.ttf",
+    "C:\\Windows\\Fonts\\simhei.ttf",
+]
+
+EN_FONT_PATHS = [
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf",
+    "/System/Library/Fonts/Helvetica.ttc",
+    "C:\\Windows\\Fonts\\arial.ttf",
+]
+
+# 文字印章的留白（像素），容纳字形越出度量框的部分及旋转后的边角
+STAMP_PADDING = 50
+
+
+@lru_cache(maxsize=32)
+def _load_font(path: str, size: int, index: int = 0):
+    """加载 TrueType 字体（按 路径/字号/索引 缓存，.ttc CJK 字体动辄几十 MB）"""
+    return ImageFont.truetype(path, size, index=index)
+
+
+@lru_cache(maxsize=1)
+def _existing_font_paths() -> tuple[tuple[str, ...], tuple[str, ...]]:
+    """探测一次本机存在的候选字体路径"""
+    return (
+        tuple(p for p in CN_FONT_PATHS if os.path.exists(p)),
+        tuple(p for p in EN_FONT_PATHS if os.path.exists(p)),
+    )
+
+
+@lru_cache(maxsize=16)
+def _get_fonts(font_size: int) -> tuple:
+    """返回 (cn_font, en_font, cn_path, en_path)，无可用字体时退回默认字体"""
+    cn_paths, en_paths = _existing_font_paths()
+
+    # 加载中文字体
+    cn_font, cn_path = None, None
+    for font_path in cn_paths:
+        try:
+            cn_font = _load_font(font_path, font_size, 2 if font_path.endswith('.ttc') else 0)
+            cn_path = font_path
+            logger.debug(f"Loaded Chinese font: {font_path}")
+            break
+        except Exception as e:
+            logger.debug(f"Failed to load Chinese font {font_path}: {e}")
+
+    # 加载西文/数字字体
+    en_font, en_path = None, None
+    for font_path in en_paths:
+        try:
+            en_font = _load_font(font_path, font_size)
+            en_path = font_path
+            logger.debug(f"Loaded English font: {font_path}")
+            break
+        except Exception as e:
+            logger.debug(f"Failed to load English font {font_path}: {e}")
+
+    # 如果无法加载字体，使用默认字体
+    if cn_font is None:
+        cn_font = ImageFont.load_default()
+        logger.warning("Using default font for Chinese")
+    if en_font is None:
+        en_font = ImageFont.load_default()
+        logger.warning("Using default font for English")
+
+    return cn_font, en_font, cn_path, en_path
+
+
+def _segment_text(text: str) -> list[tuple[str, str]]:
+    """将文本分段：中文字符用cn_font，ASCII字符用en_font"""
+    segments = []
+    current_segment = ""
+    current_type = None
+
+    for char in text:
+        # 判断字符类型：ASCII (包括数字) 或 非ASCII (中文等)
+        is_ascii = ord(char) < 128
+
+        if current_type is None:
+            current_type = 'ascii' if is_ascii else 'chinese'
+            current_segment = char
+        elif (is_ascii and current_type == 'ascii') or (not is_ascii and current_type == 'chinese'):
+            current_segment += char
+        else:
+            segments.append((current_type, current_segment))
+            current_type = 'ascii' if is_ascii else 'chinese'
+            current_segment = char
+
+    if current_segment:
+        segments.append((current_type, current_segment))
+
+    return segments
+
+
+def _text_stamp(text: str, font_size: int, color: tuple, opacity: int, rotation: int) -> tuple:
+    """返回预渲染的 RGBA 文字印章 (stamp, total_width, max_height, padding)
+
+    文字绘制在 (padding, padding) 处；rotation 非零时印章已旋转。
+    结果按 (文字, 字体, 字号, 颜色, 透明度, 旋转) 缓存，批量加水印时
+    每张图只剩一次粘贴和一次 alpha 合成。
+    """
+    cn_font, en_font, cn_path, en_path = _get_fonts(font_size)
+    return _render_stamp(text, cn_path, en_path, font_size, color, opacity, rotation)
+
+
+@lru_cache(maxsize=32)
+def _render_stamp(text, cn_path, en_path, font_size, color, opacity, rotation):
+    cn_font, en_font, _, _ = _get_fonts(font_size)
+    segments = _segment_text(text)
+
+    # 计算总宽度
+    measure = ImageDraw.Draw(Image.new('RGBA', (1, 1)))
+    total_width = 0
+    max_height = 0
+    for seg_type, seg_text in segments:
+        font = en_font if seg_type == 'ascii' else cn_font
+        try:
+            bbox = measure.textbbox((0, 0), seg_text, font=font)
+            seg_width = bbox[2] - bbox[0]
+            seg_height = bbox[3] - bbox[1]
+        except AttributeError:
+            seg_width, seg_height = measure.textsize(seg_text, font=font)
+        total_width += seg_width
+        max_height = max(max_height, seg_height)
+
+    # 创建文本图层（刚好容纳文本，留一些padding）
+    padding = STAMP_PADDING
+    text_layer = Image.new(
+        'RGBA', (int(total_width + padding * 2), int(max_height + padding * 2)), (255, 255, 255, 0)
+    )
+    text_draw = ImageDraw.Draw(text_layer)
+    text_color = (*color, opacity)
+
+    # 分段绘制水印
+    current_x = padding
+    for seg_type, seg_text in segments:
+        font = en_font if seg_type == 'ascii' else cn_font
+        text_draw.text((current_x, padding), seg_text, font=font, fill=text_color)
+        try:
+            bbox = text_draw.textbbox((current_x, padding), seg_text, font=font)
+            current_x = bbox[2]
+        except AttributeError:
+            seg_width, _ = text_draw.textsize(seg_text, font=font)
+            current_x += seg_width
+
+    # 旋转文本图层
+    if rotation != 0:
+        text_layer = text_layer.rotate(rotation, expand=True, resample=Image.BICUBIC)
+
+    return text_layer, total_width, max_height, padding
+
+
+def _tile_pattern(stamp: Image.Image, spacing_x: int, spacing_y: int) -> Image.Image:
+    """把按 (spacing_x, spacing_y) 网格排布的印章折叠成一个周期图块
+
+    图块坐标 (u, v) 对应网格中以 (0, 0) 为原点的周期位置；与相邻网格重叠的
+    印章部分按行优先顺序贴入，与逐个粘贴的叠加顺序一致。
+    """
+    text_w, text_h = stamp.size
+    pattern = Image.new('RGBA', (spacing_x, spacing_y), (255, 255, 255, 0))
+    for y in range(-((text_h - 1) // spacing_y) * spacing_y, spacing_y, spacing_y):
+        for x in range(-((text_w - 1) // spacing_x) * spacing_x, spacing_x, spacing_x):
+            pattern.paste(stamp, (x, y), stamp)
+    return pattern
+
+
+# 平铺合成时每个条带的目标高度（像素），按水印行距取整
+TILE_BAND_HEIGHT = 512
+
+
+def _composite_tiled(img: Image.Image, stamp: Image.Image, spacing_x: int, spacing_y: int) -> None:
+    """把按网格平铺的印章合成到 img 上，等价于从 (-text_w, -text_h) 起逐个粘贴
+
+    只对一个周期图块做带蒙版的粘贴，用普通复制拼出一条行距整数倍高的条带；
+    由于平铺图层是周期的，同一条带可以逐段原地合成到整张图上，
+    不再分配全尺寸水印图层，粘贴次数也从 (W/sx)·(H/sy) 降到 W/sx + B/sy。
+    """
+    text_w, text_h = stamp.size
+    img_width, img_height = img.size
+    pattern = _tile_pattern(stamp, spacing_x, spacing_y)
+
+    # 网格原点在 (-text_w, -text_h)，换算成图块内的相位
+    phase_x = text_w % spacing_x
+    phase_y = text_h % spacing_y
+
+    row = Image.new('RGBA', (img_width, spacing_y), (255, 255, 255, 0))
+    for x in range(-phase_x, img_width, spacing_x):
+        row.paste(pattern, (x, 0))
+
+    band_height = min(img_height, max(1, TILE_BAND_HEIGHT // spacing_y) * spacing_y)
+    band = Image.new('RGBA', (img_width, band_height), (255, 255, 255, 0))
+    for y in range(-phase_y, band_height, spacing_y):
+        band.paste(row, (0, y))
+
+    for y in range(0, img_height, band_height):
+        h = min(band_height, img_height - y)
+        img.alpha_composite(band, dest=(0, y), source=(0, 0, img_width, h))
+
+
+def _composite_stamp(img: Image.Image, stamp: Image.Image, x: int, y: int, masked: bool) -> None:
+    """把单个印章合成到 img 的 (x, y) 处，只在印章覆盖的区域内分配图层
+
+    masked=True 时按印章自身的 alpha 作蒙版粘贴（旋转印章的既有行为），
+    否则直接复制像素（等价于在透明层上直接绘制文字）。
+    """
+    img_width, img_height = img.size
+    left, top = max(0, x), max(0, y)
+    right, bottom = min(img_width, x + stamp.size[0]), min(img_height, y + stamp.size[1])
+    if right <= left or bottom <= top:
+        return
+
+    layer = Image.new('RGBA', (right - left, bottom - top), (255, 255, 255, 0))
+    if masked:
+        layer.paste(stamp, (x - left, y - top), stamp)
+    else:
+        layer.paste(stamp, (x - left, y - top))
+    img.alpha_composite(layer, dest=(left, top))
+
 
 def add_watermark(
     image_path: str | Path,
@@ -24,6 +257,13 @@ def add_watermark(
     margin: int = 20,
     rotation: int = 0,
     tile: bool = False,
+    max_dimension: int | None = None,
+    quality: int = 95,
+    optimize: bool = False,
+    progressive: bool = False,
+    target_bytes: int | None = None,
+    png_palette: bool = False,
+    encoding_log: list | None = None,
 ) -> str:
     """为图片添加水印
 
@@ -38,6 +278,14 @@ def add_watermark(
         margin: 水印边距（像素）
         rotation: 旋转角度（逆时针，0=水平，-45=右下到左上斜向）
         tile: 是否平铺多个水印贯穿整个图片
+        max_dimension: 输出图片最长边上限（像素）；JPEG 会以缩小尺寸直接解码
+        quality: JPEG 质量（有 target_bytes 时为搜索上限）
+        optimize: JPEG 优化霍夫曼表 / PNG 最大压缩（无损，只是编码更慢）
+        progressive: JPEG 使用渐进式编码
+        target_bytes: 单张输出的目标字节数，超出时依次降 JPEG 质量、PNG 无损调色板化
+            （仅不透明且不超过 256 色的图）、缩小尺寸
+        png_palette: PNG 强制量化为 256 色调色板（颜色多时有损，只适合线稿、文字类扫描件）
+        encoding_log: 传入列表时，实际采用的编码参数会以 dict 追加到其中
 
     Returns:
         输出图片路径
@@ -60,147 +308,34 @@ def add_watermark(
     # 打开图片
     img = Image.open(image_path)
 
+    # 限制尺寸：JPEG 用 draft 直接按 1/2、1/4、1/8 缩小解码，省去全尺寸解码的内存和时间
+    if max_dimension and max(img.size) > max_dimension:
+        scale = max_dimension / max(img.size)
+        target = (max(1, round(img.size[0] * scale)), max(1, round(img.size[1] * scale)))
+        if img.format == 'JPEG':
+            img.draft('RGB', target)
+        img.thumbnail(target, Image.LANCZOS)
+
     # 转换为 RGBA 模式（支持透明度）
     if img.mode != 'RGBA':
         img = img.convert('RGBA')
 
-    # 创建一个透明层用于绘制水印
-    watermark_layer = Image.new('RGBA', img.size, (255, 255, 255, 0))
-    draw = ImageDraw.Draw(watermark_layer)
-
-    # 使用混合字体方案：中文用CJK字体，数字/ASCII用西文字体
-    # 这样可以避免CJK字体对ASCII字符支持不完整的问题
-
-    # 加载中文字体
-    cn_font = None
-    cn_font_paths = [
-        "/usr/share/fonts/truetype/droid/DroidSansFallbackFull.ttf",
-        "/usr/share/fonts/truetype/wqy/wqy-microhei.ttf",
-        "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc",
-        "/Library/Fonts/Arial Unicode.ttf",
-        "C:\\Windows\\Fonts\\simhei.ttf",
-    ]
-
-    for font_path in cn_font_paths:
-        if os.path.exists(font_path):
-            try:
-                if font_path.endswith('.ttc'):
-                    cn_font = ImageFont.truetype(font_path, font_size, index=2)
-                else:
-                    cn_font = ImageFont.truetype(font_path, font_size)
-                logger.debug(f"Loaded Chinese font: {font_path}")
-                break
-            except Exception as e:
-                logger.debug(f"Failed to load Chinese font {font_path}: {e}")
-                continue
-
-    # 加载西文/数字字体
-    en_font = None
-    en_font_paths = [
-        "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
-        "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf",
-        "/System/Library/Fonts/Helvetica.ttc",
-        "C:\\Windows\\Fonts\\arial.ttf",
-    ]
-
-    for font_path in en_font_paths:
-        if os.path.exists(font_path):
-            try:
-                en_font = ImageFont.truetype(font_path, font_size)
-                logger.debug(f"Loaded English font: {font_path}")
-                break
-            except Exception as e:
-                logger.debug(f"Failed to load English font {font_path}: {e}")
-                continue
-
-    # 如果无法加载字体，使用默认字体
-    if cn_font is None:
-        cn_font = ImageFont.load_default()
-        logger.warning("Using default font for Chinese")
-    if en_font is None:
-        en_font = ImageFont.load_default()
-        logger.warning("Using default font for English")
-
-    # 将文本分段：中文字符用cn_font，ASCII字符用en_font
-    import re
-    segments = []
-    current_segment = ""
-    current_type = None
-
-    for char in watermark_text:
-        # 判断字符类型：ASCII (包括数字) 或 非ASCII (中文等)
-        is_ascii = ord(char) < 128
-
-        if current_type is None:
-            current_type = 'ascii' if is_ascii else 'chinese'
-            current_segment = char
-        elif (is_ascii and current_type == 'ascii') or (not is_ascii and current_type == 'chinese'):
-            current_segment += char
-        else:
-            segments.append((current_type, current_segment))
-            current_type = 'ascii' if is_ascii else 'chinese'
-            current_segment = char
-
-    if current_segment:
-        segments.append((current_type, current_segment))
-
-    # 计算总宽度
-    total_width = 0
-    max_height = 0
-    for seg_type, seg_text in segments:
-        font = en_font if seg_type == 'ascii' else cn_font
-        try:
-            bbox = draw.textbbox((0, 0), seg_text, font=font)
-            seg_width = bbox[2] - bbox[0]
-            seg_height = bbox[3] - bbox[1]
-        except AttributeError:
-            seg_width, seg_height = draw.textsize(seg_text, font=font)
-        total_width += seg_width
-        max_height = max(max_height, seg_height)
-
-    # 计算起始位置
     img_width, img_height = img.size
-    text_color = (*color, opacity)
+    stamp, total_width, max_height, padding = _text_stamp(
+        watermark_text, font_size, tuple(color), opacity, rotation
+    )
 
+    # 水印直接合成到 img 上：只在印章覆盖的区域（或平铺条带）内分配透明层
     # 如果需要旋转或平铺，使用特殊绘制逻辑
     if rotation != 0 or tile:
-        # 创建文本图层（刚好容纳文本，留一些padding）
-        padding = 50
-        text_layer_w = int(total_width + padding * 2)
-        text_layer_h = int(max_height + padding * 2)
-        text_layer = Image.new('RGBA', (text_layer_w, text_layer_h), (255, 255, 255, 0))
-        text_draw = ImageDraw.Draw(text_layer)
-
-        # 在文本图层中心绘制水印
-        text_x = padding
-        text_y = padding
-        current_x = text_x
-
-        for seg_type, seg_text in segments:
-            font = en_font if seg_type == 'ascii' else cn_font
-            text_draw.text((current_x, text_y), seg_text, font=font, fill=text_color)
-            try:
-                bbox = text_draw.textbbox((current_x, text_y), seg_text, font=font)
-                current_x = bbox[2]
-            except AttributeError:
-                seg_width, _ = text_draw.textsize(seg_text, font=font)
-                current_x += seg_width
-
-        # 旋转文本图层
-        if rotation != 0:
-            text_layer = text_layer.rotate(rotation, expand=True, resample=Image.BICUBIC)
+        text_layer = stamp
 
         # 平铺或单个水印
         if tile:
-            # 计算需要平铺的行数和列数
-            text_w, text_h = text_layer.size
             # 使用原始文本大小作为间距基准
             spacing_x = int(total_width * 1.5)
             spacing_y = int(max_height * 2)
-
-            for y_offset in range(-text_h, img_height + text_h, spacing_y):
-                for x_offset in range(-text_w, img_width + text_w, spacing_x):
-                    watermark_layer.paste(text_layer, (x_offset, y_offset), text_layer)
+            _composite_tiled(img, text_layer, spacing_x, spacing_y)
         else:
             # 单个水印，根据position定位
             text_w, text_h = text_layer.size
@@ -229,7 +364,7 @@ def add_watermark(
                 paste_x = (img_width - text_w) // 2
                 paste_y = (img_height - text_h) // 2
 
-            watermark_layer.paste(text_layer, (paste_x, paste_y), text_layer)
+            _composite_stamp(img, text_layer, paste_x, paste_y, masked=True)
     else:
         # 原有的非旋转逻辑
         if position == "bottom_right":
@@ -257,29 +392,224 @@ def add_watermark(
             x = img_width - total_width - margin
             y = img_height - max_height - margin
 
-        # 分段绘制水印
-        current_x = x
-        for seg_type, seg_text in segments:
-            font = en_font if seg_type == 'ascii' else cn_font
-            draw.text((current_x, y), seg_text, font=font, fill=text_color)
-            try:
-                bbox = draw.textbbox((current_x, y), seg_text, font=font)
-                current_x = bbox[2]
-            except AttributeError:
-                seg_width, _ = draw.textsize(seg_text, font=font)
-                current_x += seg_width
-
-    # 合并图层
-    watermarked = Image.alpha_composite(img, watermark_layer)
+        # 文字印章在 (padding, padding) 处绘制，整体贴到透明层上等价于直接绘制
+        _composite_stamp(img, stamp, int(x) - padding, int(y) - padding, masked=False)
 
     # 如果原图不是 PNG，转回原格式
     if image_path.suffix.lower() in ['.jpg', '.jpeg']:
-        watermarked = watermarked.convert('RGB')
-        watermarked.save(output_path, 'JPEG', quality=95)
+        fmt = 'JPEG'
+        img = img.convert('RGB')
+    else:
+        fmt = 'PNG'
+
+    data, encoding = encode_image(
+        img, fmt, quality=quality, optimize=optimize, progressive=progressive,
+        target_bytes=target_bytes, png_palette=png_palette,
+    )
+    with open(output_path, 'wb') as f:
+        f.write(data)
+
+    if encoding_log is not None:
+        encoding_log.append({"path": str(output_path), **encoding})
+    logger.info(f"Added watermark to {image_path} -> {output_path} ({encoding})")
+    return str(output_path)
+
+
+# 供 docx 嵌入的默认输出策略：A4 300dpi 的长边、单图 800 KB 以内
+DOCX_ENCODING = {
+    "max_dimension": 3508,
+    "quality": 90,
+    "optimize": True,
+    "progressive": True,
+    "target_bytes": 800 * 1024,
+}
+
+# target_bytes 搜索时 JPEG 质量的下限，再低文字边缘会明显出现块效应
+MIN_JPEG_QUALITY = 60
+
+
+def _few_colours(img: Image.Image) -> bool:
+    """不透明且不超过 256 色（线稿、文字类扫描件）：改用调色板是无损的"""
+    if 'A' in img.getbands() and img.getchannel('A').getextrema()[0] < 255:
+        return False
+    return img.getcolors(256) is not None
+
+
+def _encode_once(img: Image.Image, fmt: str, quality: int, optimize: bool,
+                 progressive: bool, palette: bool) -> bytes:
+    buf = io.BytesIO()
+    if fmt == 'JPEG':
+        img.save(buf, 'JPEG', quality=quality, optimize=optimize, progressive=progressive)
+    else:
+        if palette and img.mode != 'P':
+            if _few_colours(img):
+                # 中位切分在颜色数不超过 256 时正好保留每一种颜色
+                img = img.convert('RGB').quantize(256, method=Image.Quantize.MEDIANCUT,
+                                                  dither=Image.Dither.NONE)
+            else:
+                img = img.quantize(256, method=Image.Quantize.FASTOCTREE, dither=Image.Dither.NONE)
+        img.save(buf, 'PNG', optimize=optimize)
+    return buf.getvalue()
+
+
+def encode_image(
+    img: Image.Image,
+    fmt: str,
+    quality: int = 95,
+    optimize: bool = False,
+    progressive: bool = False,
+    target_bytes: int | None = None,
+    png_palette: bool = False,
+) -> tuple[bytes, dict]:
+    """按输出策略编码图片，返回 (编码后的字节, 实际采用的参数)
+
+    有 target_bytes 且首次编码超出时：JPEG 在 [MIN_JPEG_QUALITY, quality] 内二分查找
+    满足目标的最高质量，找不到时用 MIN_JPEG_QUALITY；PNG 只在不透明且不超过 256 色时
+    无损改用调色板（照片类 PNG 量化会出现色带，需 png_palette 显式开启）；仍超出则按面积
+    比例缩小尺寸后重新搜索（最多 3 轮）。返回的参数与字节总是对应实际写出的那次编码。
+    """
+    palette = png_palette
+    data = _encode_once(img, fmt, quality, optimize, progressive, palette)
+    chosen_quality = quality
+
+    rounds = 0
+    while target_bytes and len(data) > target_bytes:
+        if fmt == 'JPEG':
+            # 当前尺寸下满足目标的最高质量
+            lo, hi = MIN_JPEG_QUALITY, quality
+            best = None
+            while lo <= hi:
+                mid = (lo + hi) // 2
+                candidate = _encode_once(img, fmt, mid, optimize, progressive, palette)
+                if len(candidate) <= target_bytes:
+                    best, chosen_quality = candidate, mid
+                    lo = mid + 1
+                else:
+                    hi = mid - 1
+            if best is not None:
+                data = best
+                break
+            # 最低质量也超出：先取最低质量的编码，缩小尺寸按它估算
+            chosen_quality = MIN_JPEG_QUALITY
+            data = _encode_once(img, fmt, chosen_quality, optimize, progressive, palette)
+        elif not palette and _few_colours(img):
+            palette = True
+            data = _encode_once(img, fmt, quality, optimize, progressive, palette)
+            continue
+
+        if rounds == 3:
+            break
+        rounds += 1
+        # 质量/调色板都不够时缩小尺寸，按字节比例估算面积缩放，再回到质量搜索
+        scale = max(0.5, (target_bytes / len(data)) ** 0.5)
+        new_size = (max(1, int(img.size[0] * scale)), max(1, int(img.size[1] * scale)))
+        img = img.resize(new_size, Image.LANCZOS)
+        # 缩小插值会引入新颜色，自动调色板需按新图重新判断
+        palette = png_palette
+        chosen_quality = quality
+        data = _encode_once(img, fmt, chosen_quality, optimize, progressive, palette)
+
+    encoding = {
+        "format": fmt,
+        "size": list(img.size),
+        "bytes": len(data),
+        "optimize": optimize,
+    }
+    if fmt == 'JPEG':
+        encoding.update(quality=chosen_quality, progressive=progressive)
+    else:
+        encoding.update(palette=palette)
+    if target_bytes:
+        encoding.update(target_bytes=target_bytes, target_met=len(data) <= target_bytes)
+    return data, encoding
+
+
+def _file_sha256(path: Path) -> str:
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def add_watermark_cached(
+    image_path: str | Path,
+    output_path: str | Path | None = None,
+    watermark_text: str = "",
+    cache_dir: str | Path = ".watermark_cache",
+    **kwargs
+) -> str:
+    """带缓存的 add_watermark：同一 (原图内容, 水印文字, 参数) 只渲染一次
+
+    加水印的结果单独存放在 cache_dir 中，原图保持不动，因此重跑不会在
+    已加过水印的图上再叠一层，且命中缓存时只需复制一个文件。
+
+    Args:
+        image_path: 原图路径（不会被修改）
+        output_path: 输出路径（从缓存复制）；为 None 时直接返回缓存中的文件路径，
+            调用方不得原地修改该文件
+        watermark_text: 水印文字
+        cache_dir: 水印图缓存目录
+        **kwargs: 传递给 add_watermark 的其他参数
+
+    Returns:
+        输出图片路径
+    """
+    if not watermark_text:
+        logger.warning("Watermark text is empty, skipping watermark")
+        return str(image_path)
+
+    image_path = Path(image_path)
+    if not image_path.exists():
+        raise FileNotFoundError(f"Image not found: {image_path}")
+
+    # 缓存键 = 原图内容哈希 + 水印文字 + 全部参数（含默认值）
+    bound = inspect.signature(add_watermark).bind(
+        image_path, None, watermark_text, **kwargs
+    )
+    bound.apply_defaults()
+    params = {
+        k: v for k, v in bound.arguments.items()
+        if k not in ('image_path', 'output_path', 'encoding_log')
+    }
+    params_json = json.dumps(params, ensure_ascii=False, sort_keys=True, default=str)
+    key = hashlib.sha256(
+        f"{_file_sha256(image_path)}\n{params_json}".encode('utf-8')
+    ).hexdigest()
+
+    suffix = image_path.suffix.lower() or '.png'
+    cached = Path(cache_dir) / key[:2] / f"{key}{suffix}"
+    if cached.exists():
+        logger.debug(f"Watermark cache hit: {image_path} -> {cached}")
     else:
-        watermarked.save(output_path, 'PNG')
+        cached.parent.mkdir(parents=True, exist_ok=True)
+        # 先渲染到同目录临时文件再原子改名，避免并发/中断留下半成品
+        fd, tmp = tempfile.mkstemp(dir=cached.parent, suffix=suffix)
+        os.close(fd)
+        try:
+            encodings = []
+            add_watermark(image_path, tmp, watermark_text, encoding_log=encodings, **kwargs)
+            # 实际采用的编码参数记录在旁边的 .json 里，便于事后核对体积/质量
+            with open(cached.with_suffix('.json'), 'w', encoding='utf-8') as f:
+                json.dump({"source": str(image_path), "params": params,
+                           "encoding": encodings[0] if encodings else None},
+                          f, ensure_ascii=False, indent=2, default=str)
+            os.replace(tmp, cached)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
 
-    logger.info(f"Added watermark to {image_path} -> {output_path}")
+    if output_path is None:
+        return str(cached)
+
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    if output_path.exists():
+        # 旧版本硬链接出的文件也在这里断开，不再与缓存共用 inode
+        output_path.unlink()
+    # 复制而不是硬链接：输出之后可能被原地修改，不能改写缓存中的水印图
+    shutil.copy2(cached, output_path)
     return str(output_path)
 
 
@@ -337,22 +667,58 @@ def get_project_name_from_analysis(analysis_path: str | Path = "分析报告.md"
         return ""
 
 
-def add_watermark_batch(
+IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.bmp', '.gif', '.tiff'}
+
+
+def _watermark_one(job: tuple) -> tuple:
+    """进程池任务：处理单张图片，返回 (输入路径, 输出路径, 错误信息, 输入字节数, 编码参数)
+
+    字体与文字印章缓存是模块级 lru_cache，每个工作进程各自持有一份，
+    首张图之后同一进程内的其他图片只剩粘贴与合成。
+    """
+    image_path, output_path, watermark_text, kwargs = job
+    size = 0
+    encodings = []
+    try:
+        # 输入缺失/不可读时也只记为该文件失败，不中断整批
+        size = os.path.getsize(image_path)
+        result = add_watermark(image_path, output_path, watermark_text,
+                               encoding_log=encodings, **kwargs)
+        return str(image_path), result, None, size, encodings[0] if encodings else None
+    except Exception as e:
+        return str(image_path), None, str(e), size, None
+
+
+def watermark_batch(
     image_dir: str | Path,
     output_dir: str | Path | None = None,
     watermark_text: str = "",
+    workers: int | None = None,
     **kwargs
-) -> list[str]:
-    """批量为目录下的图片添加水印
+) -> dict:
+    """批量为目录下的图片添加水印，返回吞吐与失败汇总
 
     Args:
         image_dir: 输入图片目录
         output_dir: 输出目录（如果为 None，则覆盖原图）
         watermark_text: 水印文字
-        **kwargs: 传递给 add_watermark 的其他参数
+        workers: 工作进程数；None 为 CPU 核数，1 为当前进程内串行。
+            每个进程同一时刻只解码一张图，内存上限约为 workers 张图
+        **kwargs: 传递给 add_watermark 的其他参数（如 max_dimension、target_bytes）
 
     Returns:
-        处理成功的图片路径列表
+        {
+            "processed": [...],          # 成功的输出路径（按文件名排序）
+            "failed": [{"path": ..., "error": ...}],
+            "encodings": [{"path": ..., "format": ..., "bytes": ..., ...}],
+            "total": int,
+            "workers": int,
+            "elapsed_s": float,
+            "images_per_s": float,
+            "input_mb_per_s": float,
+            "input_bytes": int,
+            "output_bytes": int,
+        }
     """
     image_dir = Path(image_dir)
     if not image_dir.exists():
@@ -362,30 +728,77 @@ def add_watermark_batch(
         output_dir = Path(output_dir)
         output_dir.mkdir(parents=True, exist_ok=True)
 
+    images = sorted(p for p in image_dir.iterdir() if p.suffix.lower() in IMAGE_EXTENSIONS)
+    jobs = [
+        (p, output_dir / p.name if output_dir else None, watermark_text, kwargs)
+        for p in images
+    ]
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(jobs)))
+
+    start = time.perf_counter()
+    if workers == 1:
+        results = [_watermark_one(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_watermark_one, jobs, chunksize=4))
+    elapsed = time.perf_counter() - start
+
     processed = []
-    image_extensions = {'.png', '.jpg', '.jpeg', '.bmp', '.gif', '.tiff'}
+    failed = []
+    encodings = []
+    total_bytes = 0
+    for image_path, result, error, size, encoding in results:
+        total_bytes += size
+        if error is None:
+            processed.append(result)
+            if encoding:
+                encodings.append(encoding)
+        else:
+            logger.error(f"Failed to add watermark to {image_path}: {error}")
+            failed.append({"path": image_path, "error": error})
+
+    summary = {
+        "processed": processed,
+        "failed": failed,
+        "encodings": encodings,
+        "total": len(jobs),
+        "workers": workers,
+        "elapsed_s": round(elapsed, 3),
+        "images_per_s": round(len(jobs) / elapsed, 2) if elapsed > 0 else 0.0,
+        "input_mb_per_s": round(total_bytes / 1024 / 1024 / elapsed, 2) if elapsed > 0 else 0.0,
+        "input_bytes": total_bytes,
+        "output_bytes": sum(e["bytes"] for e in encodings),
+    }
+    logger.info(
+        f"Processed {len(processed)}/{len(jobs)} images with {workers} worker(s) "
+        f"in {summary['elapsed_s']}s ({summary['images_per_s']} img/s), {len(failed)} failed"
+    )
+    return summary
 
-    for image_path in image_dir.iterdir():
-        if image_path.suffix.lower() in image_extensions:
-            try:
-                if output_dir:
-                    output_path = output_dir / image_path.name
-                else:
-                    output_path = None
 
-                result_path = add_watermark(
-                    image_path,
-                    output_path,
-                    watermark_text,
-                    **kwargs
-                )
-                processed.append(result_path)
+def add_watermark_batch(
+    image_dir: str | Path,
+    output_dir: str | Path | None = None,
+    watermark_text: str = "",
+    workers: int | None = 1,
+    **kwargs
+) -> list[str]:
+    """批量为目录下的图片添加水印
 
-            except Exception as e:
-                logger.error(f"Failed to add watermark to {image_path}: {e}")
+    Args:
+        image_dir: 输入图片目录
+        output_dir: 输出目录（如果为 None，则覆盖原图）
+        watermark_text: 水印文字
+        workers: 工作进程数（默认 1 串行；None 为 CPU 核数），见 watermark_batch
+        **kwargs: 传递给 add_watermark 的其他参数
 
-    logger.info(f"Processed {len(processed)} images")
-    return processed
+    Returns:
+        处理成功的图片路径列表
+    """
+    return watermark_batch(image_dir, output_dir, watermark_text, workers=workers, **kwargs)["processed"]
 
 
 if __name__ == "__main__":
@@ -415,6 +828,22 @@ if __name__ == "__main__":
                         help="Auto-detect project name from 分析报告.md")
     parser.add_argument("--batch", action="store_true",
                         help="Process all images in directory")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes for batch mode (default: CPU count)")
+    parser.add_argument("--max-dimension", type=int, default=None,
+                        help="Downscale so the longest side is at most this many pixels")
+    parser.add_argument("--quality", type=int, default=95,
+                        help="JPEG quality (upper bound when --target-kb is set)")
+    parser.add_argument("--target-kb", type=int, default=None,
+                        help="Target size per output image in KB")
+    parser.add_argument("--optimize", action="store_true",
+                        help="Optimize JPEG Huffman tables / maximum PNG compression")
+    parser.add_argument("--progressive", action="store_true",
+                        help="Write progressive JPEG")
+    parser.add_argument("--png-palette", action="store_true",
+                        help="Always quantize PNG output to a 256-color palette (lossy on photos; line art only)")
+    parser.add_argument("--docx", action="store_true",
+                        help="Use the docx embedding preset (DOCX_ENCODING)")
 
     args = parser.parse_args()
 
@@ -445,15 +874,29 @@ if __name__ == "__main__":
         print("Error: Invalid color format. Use R,G,B (e.g., 128,128,128)")
         exit(1)
 
+    # 输出编码策略
+    if args.docx:
+        encoding = dict(DOCX_ENCODING)
+    else:
+        encoding = {
+            "max_dimension": args.max_dimension,
+            "quality": args.quality,
+            "optimize": args.optimize,
+            "progressive": args.progressive,
+            "target_bytes": args.target_kb * 1024 if args.target_kb else None,
+        }
+    encoding["png_palette"] = args.png_palette
+
     # 处理图片
     input_path = Path(args.input)
 
     if args.batch or input_path.is_dir():
-        # 批量处理
-        processed = add_watermark_batch(
+        # 批量处理（多进程）
+        summary = watermark_batch(
             input_path,
             args.output,
             watermark_text,
+            workers=args.workers,
             position=args.position,
             opacity=args.opacity,
             font_size=args.font_size,
@@ -461,10 +904,17 @@ if __name__ == "__main__":
             margin=args.margin,
             rotation=args.rotation,
             tile=args.tile,
+            **encoding,
         )
-        print(f"Processed {len(processed)} images")
+        print(f"Processed {len(summary['processed'])}/{summary['total']} images "
+              f"with {summary['workers']} worker(s) in {summary['elapsed_s']}s "
+              f"({summary['images_per_s']} img/s, {summary['input_mb_per_s']} MB/s)")
+        print(f"Size: {summary['input_bytes'] / 1024:.0f} KB -> {summary['output_bytes'] / 1024:.0f} KB")
+        for item in summary["failed"]:
+            print(f"  Failed: {item['path']}: {item['error']}")
     else:
         # 单个图片
+        encodings = []
         result = add_watermark(
             input_path,
             args.output,
@@ -476,5 +926,8 @@ if __name__ == "__main__":
             margin=args.margin,
             rotation=args.rotation,
             tile=args.tile,
+            encoding_log=encodings,
+            **encoding,
         )
         print(f"Watermarked image saved to: {result}")
+        print(f"Encoding: {encodings[0]}")